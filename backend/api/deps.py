@@ -1,29 +1,57 @@
+import secrets
 from fastapi import Depends, HTTPException, Request
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.config import ADMIN_TOKEN, METRICS_TOKEN
 from core.database import get_db
+from core.session_cache import cache_session, get_cached_session
 from crud.user import get_user_by_id
 from crud.session import get_session_by_token
+from schemas.user import User
 from datetime import datetime
 
-async def get_current_user(request: Request, db: Session = Depends(get_db)):
+async def get_current_user(request: Request, db: AsyncSession = Depends(get_db)):
     state = request.query_params.get("state")
     session_token = state or request.cookies.get("session_token")
-    print(f"state: {state}, session_token: {session_token}")
     if not session_token:
         # Try to get from custom header if not in cookies
         session_token = request.headers.get("X-Session-Token")
     if not session_token:
         raise HTTPException(status_code=401, detail="Not authenticated")
 
-    session = get_session_by_token(db, session_token=session_token)
-    print(f"session: {session}")
+    # Most requests are answered from the cache without touching the database
+    cached = get_cached_session(session_token)
+    if cached:
+        request.state.current_user = cached.user
+        request.state.access_token = cached.access_token
+        return cached.user
+
+    session = await get_session_by_token(db, session_token=session_token)
     if not session or session.expires_at < datetime.utcnow():
         raise HTTPException(status_code=401, detail="Invalid session")
 
-    user = get_user_by_id(db, user_id=session.user_id)
-    if not user:
+    db_user = await get_user_by_id(db, user_id=session.user_id)
+    if not db_user:
         raise HTTPException(status_code=404, detail="User not found")
 
+    user = User.model_validate(db_user)
+    cache_session(session_token, user, session.access_token, session.expires_at)
     request.state.current_user = user
     request.state.access_token = session.access_token
-    return user
\ No newline at end of file
+    return user
+
+def require_admin(request: Request):
+    """Admin endpoints take the X-Admin-Token header; they are off unless ADMIN_TOKEN is set."""
+    token = request.headers.get("X-Admin-Token")
+    if not ADMIN_TOKEN or not token or not secrets.compare_digest(token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Not allowed")
+
+def require_metrics_token(request: Request):
+    """
+    /metrics takes METRICS_TOKEN as a bearer token, which is what Prometheus
+    sends, or the admin token. It is off unless one of them is set.
+    """
+    authorization = request.headers.get("Authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if METRICS_TOKEN and scheme.lower() == "bearer" and token and secrets.compare_digest(token, METRICS_TOKEN):
+        return
+    require_admin(request)
@@ -0,0 +1,36 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from api.deps import require_admin
+from core.tracing import format_waterfall, get_trace, slowest_traces, to_otlp, waterfall
+
+router = APIRouter(prefix="/admin", dependencies=[Depends(require_admin)])
+
+@router.get("/traces")
+async def list_slowest_traces(
+    limit: int = Query(10, ge=1, le=100),
+    name: Optional[str] = None,
+    format: str = Query("json", pattern="^(json|text)$"),
+):
+    """
+    The slowest recent traces as waterfalls, slowest first. `name` filters by
+    root span, e.g. "POST /api/schedule/{link_id}/book"; format=text renders
+    them for a terminal.
+    """
+    traces = [waterfall(spans) for spans in slowest_traces(limit, name)]
+    if format == "text":
+        return PlainTextResponse("\n\n".join(format_waterfall(trace) for trace in traces) + "\n")
+    return traces
+
+@router.get("/traces/{trace_id}")
+async def read_trace(trace_id: str, format: str = Query("json", pattern="^(json|text|otlp)$")):
+    """One trace as a waterfall, or as an OTLP/JSON export body with format=otlp."""
+    spans = get_trace(trace_id)
+    if not spans:
+        raise HTTPException(status_code=404, detail="Trace not found (it may have left the buffer).")
+    if format == "otlp":
+        return to_otlp(spans)
+    trace = waterfall(spans)
+    if format == "text":
+        return PlainTextResponse(format_waterfall(trace) + "\n")
+    return trace
@@ -1,11 +1,12 @@
-from datetime import datetime, timedelta
+from datetime import datetime, time, timedelta
 from distutils.command import build
+from typing import Optional
 import uuid
-from fastapi import APIRouter, Depends, HTTPException, Request, Response, Body
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, Body
 from fastapi.responses import JSONResponse, RedirectResponse
-from httpx import AsyncClient, HTTPStatusError
+from httpx import HTTPStatusError
 import httpx
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from authlib.integrations.starlette_client import OAuth
 from starlette.config import Config
 from core.database import get_db
@@ -16,13 +17,22 @@ from schemas.calendar import ConnectedGoogleAccount, ConnectedGoogleAccountCreat
 from crud.calendar import (
     get_connected_account_by_google_account_id,
     create_connected_account,
-    get_connected_accounts_by_user_id
+    get_connected_accounts_by_user_id,
+    update_connected_account_tokens
 )
 from crud.session import create_session, delete_session, get_session_by_token
 from core import config
+from core.availability import to_naive_utc
+from core.credentials import credentials
+from core.calendar_watch import watch_renewer
+from core.http_client import GOOGLE, get_http_client
+from core.calendar_sync import sync_accounts_events
+from crud.calendar_event import get_calendar_events_by_account_id
+import logging
 import os
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 config_starlette = Config(environ=os.environ)
 oauth = OAuth(config_starlette)
@@ -40,6 +50,20 @@ oauth.register(
     },
 )
 
+def token_expiry(token):
+    """When an authlib token expires, as naive UTC like the rest of the schema."""
+    expires_at = token.get('expires_at')
+    return datetime.utcfromtimestamp(expires_at) if expires_at else None
+
+async def store_google_tokens(db: AsyncSession, account_id: int, token):
+    """Keep an already connected account's tokens current when its owner signs in again."""
+    if not token.get('access_token'):
+        return
+    await update_connected_account_tokens(
+        db, account_id, token['access_token'], token_expiry(token), token.get('refresh_token'))
+    await db.commit()
+    credentials.forget(GOOGLE, account_id)
+
 @router.get("/auth/google/login")
 async def google_login(request: Request):
     """
@@ -50,7 +74,7 @@ async def google_login(request: Request):
 
 @router.get("/auth/google/callback", name="google_callback")
 async def google_callback(
-    request: Request, response: Response, db: Session = Depends(get_db)):
+    request: Request, response: Response, db: AsyncSession = Depends(get_db)):
     """
     Handle the callback from Google's authorization page.
     """
@@ -70,18 +94,21 @@ async def google_callback(
     email = userinfo.get('email')
     name = userinfo.get('name')
 
-    user = get_user_by_google_id(db, google_id=google_id)
+    user = await get_user_by_google_id(db, google_id=google_id)
     if not user:
         user_create = UserCreate(google_id=google_id, email=email, name=name)
-        user = create_user(db, user=user_create)
+        user = await create_user(db, user=user_create)
     
-    existing_account = get_connected_account_by_google_account_id(
+    existing_account = await get_connected_account_by_google_account_id(
         db, google_account_id=google_id, user_id=user.id)
-    if not existing_account:
+    if existing_account:
+        await store_google_tokens(db, existing_account.id, token)
+    else:
         connected_account_create = ConnectedGoogleAccountCreate(
             google_account_id=google_id,
             access_token=token.get('access_token', ''),
             refresh_token=token.get('refresh_token', ''),
+            token_expires_at=token_expiry(token),
             email=email,
             name=name,
             picture=userinfo.get('picture', ''),
@@ -89,10 +116,11 @@ async def google_callback(
             verified=userinfo.get('verified', False),
             hd=userinfo.get('hd', ''),
         )
-        create_connected_account(
+        await create_connected_account(
             db,
             connected_account=connected_account_create,
             user_id=user.id)
+        watch_renewer.notify()
     
     access_token = token.get('access_token')
     if access_token:
@@ -110,7 +138,7 @@ async def google_callback(
         return RedirectResponse(frontend_redirect_url, status_code=302)
 
 @router.get("/auth/me")
-async def get_me(request: Request, db: Session = Depends(get_db)):
+async def get_me(request: Request, db: AsyncSession = Depends(get_db)):
     """
     Get the current user's information.
     """
@@ -120,39 +148,38 @@ async def get_me(request: Request, db: Session = Depends(get_db)):
 
     google_access_token = authorization_header.split("Bearer ")[1]
 
-    async with AsyncClient() as client:
-        userinfo_url = "https://www.googleapis.com/oauth2/v3/userinfo"
-        headers = {"Authorization": f"Bearer {google_access_token}"}
-        try:
-            response = await client.get(userinfo_url, headers=headers)
-            response.raise_for_status()
-            userinfo = response.json()
-
-            google_id = userinfo.get('sub')
-
-            if not google_id:
-                raise HTTPException(
-                    status_code=401, detail="Invalid Google access token")
+    client = get_http_client(GOOGLE)
+    userinfo_url = "https://www.googleapis.com/oauth2/v3/userinfo"
+    headers = {"Authorization": f"Bearer {google_access_token}"}
+    try:
+        response = await client.get(userinfo_url, headers=headers)
+        response.raise_for_status()
+        userinfo = response.json()
 
-            user = get_user_by_google_id(db, google_id=google_id)
-            if user:
-                return {"user": User.model_validate(user)}
-            else:
-                raise HTTPException(status_code=404, detail="User not found")
+        google_id = userinfo.get('sub')
 
-        except HTTPStatusError as e:
-            print(f"Error fetching user info from Google: {e}")
+        if not google_id:
             raise HTTPException(
                 status_code=401, detail="Invalid Google access token")
-        except Exception as e:
-            print(f"Unexpected error fetching user info: {e}")
-            raise HTTPException(
-                status_code=500, detail="Internal server error")
+
+        user = await get_user_by_google_id(db, google_id=google_id)
+        if user:
+            return {"user": User.model_validate(user)}
+        else:
+            raise HTTPException(status_code=404, detail="User not found")
+
+    except HTTPStatusError as e:
+        logger.warning(f"Error fetching user info from Google: {e}")
+        raise HTTPException(
+            status_code=401, detail="Invalid Google access token")
+    except Exception as e:
+        logger.exception(f"Unexpected error fetching user info: {e}")
+        raise HTTPException(
+            status_code=500, detail="Internal server error")
 
 @router.get("/calendars/connect/new")
 async def connect_new_google_calendar(request: Request):
     session_token = request.cookies.get("session_token") or request.headers.get("X-Session-Token")
-    print(f"session_token: {session_token}")
     redirect_uri = str(request.url_for('google_connect_callback'))
     return await oauth.google.authorize_redirect(request, redirect_uri, state=session_token)
 
@@ -160,7 +187,7 @@ async def connect_new_google_calendar(request: Request):
 async def google_connect_callback(
     request: Request,
     response: Response,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)):
     try:
         token = await oauth.google.authorize_access_token(request)
@@ -175,13 +202,14 @@ async def google_connect_callback(
         frontend_redirect_url = f"{config.FRONTEND_URL}/auth/google/callback?error=connect_error"
         return RedirectResponse(frontend_redirect_url, status_code=302)
 
-    existing_account = get_connected_account_by_google_account_id(
+    existing_account = await get_connected_account_by_google_account_id(
         db, google_account_id=google_account_id)
     if not existing_account:
         connected_account_create = ConnectedGoogleAccountCreate(
             google_account_id=google_account_id,
             access_token=token.get('access_token', ''),
             refresh_token=token.get('refresh_token', ''),
+            token_expires_at=token_expiry(token),
             email=userinfo.get('email', ''),
             name=userinfo.get('name', ''),
             picture=userinfo.get('picture', ''),
@@ -189,10 +217,11 @@ async def google_connect_callback(
             verified=userinfo.get('verified', False),
             hd=userinfo.get('hd', ''),
         )
-        create_connected_account(
+        await create_connected_account(
             db,
             connected_account=connected_account_create,
             user_id=current_user.id)
+        watch_renewer.notify()
         access_token = request.state.access_token
         user_id = current_user.id
         frontend_redirect_url = str(
@@ -205,83 +234,100 @@ async def google_connect_callback(
         return RedirectResponse(frontend_redirect_url, status_code=302)
 
 async def get_google_account_details(access_token: str):
-    async with httpx.AsyncClient() as client:
-        userinfo_url = "https://www.googleapis.com/oauth2/v3/userinfo"
-        headers = {"Authorization": f"Bearer {access_token}"}
-        try:
-            response = await client.get(userinfo_url, headers=headers)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as e:
-            print(f"Error fetching Google account details: {e}")
-            return None
-        except Exception as e:
-            print(f"Unexpected error fetching Google account details: {e}")
-            return None
+    client = get_http_client(GOOGLE)
+    userinfo_url = "https://www.googleapis.com/oauth2/v3/userinfo"
+    headers = {"Authorization": f"Bearer {access_token}"}
+    try:
+        response = await client.get(userinfo_url, headers=headers)
+        response.raise_for_status()
+        return response.json()
+    except httpx.HTTPStatusError as e:
+        logger.warning(f"Error fetching Google account details: {e}")
+        return None
+    except Exception as e:
+        logger.exception(f"Unexpected error fetching Google account details: {e}")
+        return None
 
 @router.get("/calendars/connected")
 async def list_connected_calendars(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    connected_accounts = get_connected_accounts_by_user_id(
+    connected_accounts = await get_connected_accounts_by_user_id(
         db, user_id=current_user.id
     )
     return [ConnectedGoogleAccount.model_validate(account) for account in connected_accounts]
 
 @router.get("/events")
-async def list_calendar_events(request: Request, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def list_calendar_events(
+    request: Request,
+    range_start: Optional[datetime] = Query(None, alias="from"),
+    range_end: Optional[datetime] = Query(None, alias="to"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
     """
     List calendar events for the logged-in user from all connected Google accounts, grouped by account.
+    Events are served from the local store after an incremental sync; accounts
+    are synced concurrently and any account that fails reports an "error".
+    Stored tokens are refreshed first when they are about to expire.
+    `from`/`to` pick the events overlapping that range, by default the last
+    EVENTS_DEFAULT_PAST_DAYS and the next EVENTS_DEFAULT_FUTURE_DAYS days.
+    The store only holds events from GOOGLE_SYNC_LOOKBACK_DAYS back onwards,
+    so an earlier `from` is rejected rather than answered with a partial list.
     """
-    connected_accounts = get_connected_accounts_by_user_id(db, user_id=current_user.id)
-    calendar_url = "https://www.googleapis.com/calendar/v3/calendars/primary/events"
+    now = datetime.utcnow()
+    today = datetime.combine(now.date(), time.min)
+    earliest = now - timedelta(days=config.GOOGLE_SYNC_LOOKBACK_DAYS)
+    if range_start:
+        range_start = to_naive_utc(range_start)
+    else:
+        range_start = max(today - timedelta(days=config.EVENTS_DEFAULT_PAST_DAYS), earliest)
+    range_end = to_naive_utc(range_end) if range_end else today + timedelta(days=config.EVENTS_DEFAULT_FUTURE_DAYS + 1)
+    if range_end <= range_start:
+        raise HTTPException(status_code=400, detail="`to` must be after `from`.")
+    if range_start < earliest:
+        raise HTTPException(
+            status_code=400,
+            detail=f"`from` must be within the last {config.GOOGLE_SYNC_LOOKBACK_DAYS} days "
+                   f"(no earlier than {earliest.isoformat(timespec='seconds')}Z).")
+    connected_accounts = await get_connected_accounts_by_user_id(db, user_id=current_user.id)
+    browser_tokens = {}
+    for account in connected_accounts:
+        google_access_token = None
+        if account.email == current_user.email:
+            google_access_token = request.cookies.get("google_access_token")
+            if not google_access_token:
+                # Try to get from custom header if not in cookies
+                google_access_token = request.headers.get("X-Google-Access-Token")
+        if google_access_token:
+            browser_tokens[account.id] = google_access_token
+    # Hand this request's connection back before the sync (and any token
+    # refresh) checks out its own; holding both deadlocks the pool once
+    # enough requests are in flight
+    await db.commit()
+    tokens, errors = await credentials.google_tokens(
+        account for account in connected_accounts if account.id not in browser_tokens)
+    tokens.update(browser_tokens)
+    errors.update(await sync_accounts_events(get_http_client(GOOGLE), tokens))
     result = []
-    async with httpx.AsyncClient() as client:
-        for account in connected_accounts:
-            if account.email == current_user.email:
-                google_access_token = request.cookies.get("google_access_token")
-                if not google_access_token:
-                    # Try to get from custom header if not in cookies
-                    google_access_token = request.headers.get("X-Google-Access-Token")
-                if google_access_token:
-                    headers = {"Authorization": f"Bearer {google_access_token}"}
-                else:
-                    headers = {"Authorization": f"Bearer {account.access_token}"}
-            else:
-                headers = {"Authorization": f"Bearer {account.access_token}"}
-            page_token = None
-            all_events = []
-            while True:
-                params = {"maxResults": 100}
-                if page_token:
-                    params["pageToken"] = page_token
-                try:
-                    response = await client.get(calendar_url, headers=headers, params=params)
-                    response.raise_for_status()
-                    data = response.json()
-                    events = data.get("items", [])
-                    all_events.extend(events)
-                    page_token = data.get("nextPageToken")
-                    if not page_token:
-                        break
-                except Exception as e:
-                    print(f"Error fetching calendar events for account {account.google_account_id}: {e}")
-                    break
-            result.append({
-                "google_account_id": account.google_account_id,
-                "email": account.email,
-                "events": all_events
-            })
+    for account in connected_accounts:
+        events = await get_calendar_events_by_account_id(db, account.id, range_start, range_end)
+        result.append({
+            "google_account_id": account.google_account_id,
+            "email": account.email,
+            "events": [event.data for event in events],
+            "error": errors.get(account.id),
+        })
     return result
 
 @router.post("/auth/logout")
-async def logout(response: Response, request: Request, db: Session = Depends(get_db)):
+async def logout(response: Response, request: Request, db: AsyncSession = Depends(get_db)):
     session_token = request.cookies.get("session_token")
     if not session_token:
         session_token = request.headers.get("X-Session-Token")
     if session_token:
-        delete_session(db, session_token=session_token)
+        await delete_session(db, session_token=session_token)
         response.delete_cookie(key="session_token", path="/")
         return {"message": "Logout successful"}
     raise HTTPException(status_code=401, detail="Not authenticated")
@@ -296,14 +342,14 @@ async def set_session_cookie(
     request: Request,
     response: Response,
     body: SetSessionRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     access_token = request.cookies.get("google_access_token")
     if not access_token:
         access_token = request.headers.get("X-Google-Access-Token")
     session_token = uuid.uuid4().hex
     expires_at = datetime.utcnow() + timedelta(hours=24)
-    create_session(
+    await create_session(
         db,
         user_id=body.user_id,
         session_token=session_token,
@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.calendar_watch import handle_notification
+from core.database import get_db
+
+router = APIRouter()
+
+@router.post("/google/calendar/notifications", status_code=204)
+async def google_calendar_notification(request: Request, db: AsyncSession = Depends(get_db)):
+    """
+    Receiver for Google Calendar push notifications (GOOGLE_WEBHOOK_URL).
+    Everything is in the X-Goog-* headers; the body is empty. Anything but a
+    2xx makes Google retry, so notifications for channels we no longer know
+    are acknowledged and dropped.
+    """
+    channel_id = request.headers.get("X-Goog-Channel-ID")
+    if not channel_id:
+        raise HTTPException(status_code=400, detail="Missing X-Goog-Channel-ID header.")
+    outcome = await handle_notification(
+        db,
+        channel_id,
+        request.headers.get("X-Goog-Channel-Token"),
+        request.headers.get("X-Goog-Resource-ID"),
+        request.headers.get("X-Goog-Resource-State"),
+    )
+    if outcome == "rejected":
+        raise HTTPException(status_code=403, detail="Channel token does not match.")
+    return Response(status_code=204)
@@ -1,18 +1,23 @@
+import logging
 from fastapi import APIRouter, Depends, Request, HTTPException, status
 from fastapi.responses import RedirectResponse, JSONResponse
-from sqlalchemy.orm import Session
-import httpx
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.http_client import HUBSPOT, get_http_client
 from core.database import get_db
 from api.deps import get_current_user
+from core.hubspot_utils import invalidate_hubspot_contact_cache
 from crud.hubspot import create_hubspot_connection, get_hubspot_connection_by_user_id, delete_hubspot_connection_by_user_id
 from datetime import datetime, timedelta
 from core.config import (
     HUBSPOT_CLIENT_ID, 
     HUBSPOT_CLIENT_SECRET, 
     HUBSPOT_REDIRECT_URI, 
+    HUBSPOT_TOKEN_URL,
     FRONTEND_URL
 )
+from core.credentials import credentials
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 HUBSPOT_SCOPES = "oauth crm.objects.contacts.read"
 
@@ -22,7 +27,6 @@ async def hubspot_connect_new(request: Request):
     Redirect user to Hubspot OAuth authorization URL.
     """
     session_token = request.cookies.get("session_token") or request.headers.get("X-Session-Token")
-    print(f"session_token: {session_token}")
     params = {
         "client_id": HUBSPOT_CLIENT_ID,
         "redirect_uri": HUBSPOT_REDIRECT_URI,
@@ -35,14 +39,13 @@ async def hubspot_connect_new(request: Request):
     return RedirectResponse(f"{url}?{query}")
 
 @router.get("/hubspot/connect/callback")
-async def hubspot_connect_callback(request: Request, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+async def hubspot_connect_callback(request: Request, db: AsyncSession = Depends(get_db), current_user=Depends(get_current_user)):
     """
     Handle Hubspot OAuth callback, exchange code for tokens, store connection.
     """
     code = request.query_params.get("code")
     if not code:
         raise HTTPException(status_code=400, detail="Missing code from Hubspot callback.")
-    token_url = "https://api.hubapi.com/oauth/v1/token"
     data = {
         "grant_type": "authorization_code",
         "client_id": HUBSPOT_CLIENT_ID,
@@ -51,38 +54,36 @@ async def hubspot_connect_callback(request: Request, db: Session = Depends(get_d
         "code": code,
     }
     headers = {"Content-Type": "application/x-www-form-urlencoded"}
-    async with httpx.AsyncClient() as client:
-        resp = await client.post(token_url, data=data, headers=headers)
-        if resp.status_code != 200:
-            raise HTTPException(status_code=400, detail=f"Failed to get tokens from Hubspot: {resp.text}")
-        tokens = resp.json()
-        access_token = tokens["access_token"]
-        refresh_token = tokens.get("refresh_token")
-        expires_in = tokens.get("expires_in", 21600)  # default 6 hours
-        expires_at = datetime.utcnow() + timedelta(seconds=expires_in)
+    client = get_http_client(HUBSPOT)
+    resp = await client.post(HUBSPOT_TOKEN_URL, data=data, headers=headers)
+    if resp.status_code != 200:
+        raise HTTPException(status_code=400, detail=f"Failed to get tokens from Hubspot: {resp.text}")
+    tokens = resp.json()
+    access_token = tokens["access_token"]
+    refresh_token = tokens.get("refresh_token")
+    expires_in = tokens.get("expires_in", 21600)  # default 6 hours
+    expires_at = datetime.utcnow() + timedelta(seconds=expires_in)
 
-        # Get Hubspot user ID and more info
-        userinfo_url = "https://api.hubapi.com/integrations/v1/me"
-        userinfo_headers = {"Authorization": f"Bearer {access_token}"}
-        userinfo_resp = await client.get(userinfo_url, headers=userinfo_headers)
-        if userinfo_resp.status_code != 200:
-            raise HTTPException(status_code=400, detail="Failed to get Hubspot user info.")
-        userinfo = userinfo_resp.json()
-        print(f"userinfo: {userinfo}")
-        print(f'tokens: {tokens}')
-        portal_id = str(userinfo.get("portalId")) if userinfo.get("portalId") else None
+    # Get Hubspot user ID and more info
+    userinfo_url = "https://api.hubapi.com/integrations/v1/me"
+    userinfo_headers = {"Authorization": f"Bearer {access_token}"}
+    userinfo_resp = await client.get(userinfo_url, headers=userinfo_headers)
+    if userinfo_resp.status_code != 200:
+        raise HTTPException(status_code=400, detail="Failed to get Hubspot user info.")
+    userinfo = userinfo_resp.json()
+    portal_id = str(userinfo.get("portalId")) if userinfo.get("portalId") else None
 
-        create_hubspot_connection(
-            db=db,
-            user_id=current_user.id,
-            access_token=access_token,
-            refresh_token=refresh_token,
-            expires_at=expires_at,
-            portal_id=portal_id,
-        )
+    await create_hubspot_connection(
+        db=db,
+        user_id=current_user.id,
+        access_token=access_token,
+        refresh_token=refresh_token,
+        expires_at=expires_at,
+        portal_id=portal_id,
+    )
     access_token = request.state.access_token
     user_id = current_user.id
-    print(f"user_id: {user_id}")
+    logger.info(f"HubSpot portal {portal_id} connected for user {user_id}")
     frontend_redirect_url = str(
         f"{FRONTEND_URL}/auth/callback-loading?"
         f"accessToken={access_token}&userId={user_id}"
@@ -90,8 +91,8 @@ async def hubspot_connect_callback(request: Request, db: Session = Depends(get_d
     return RedirectResponse(frontend_redirect_url, status_code=302)
 
 @router.get("/hubspot/connection/status")
-async def hubspot_connection_status(db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    connection = get_hubspot_connection_by_user_id(db, current_user.id)
+async def hubspot_connection_status(db: AsyncSession = Depends(get_db), current_user=Depends(get_current_user)):
+    connection = await get_hubspot_connection_by_user_id(db, current_user.id)
     if connection:
         return {
             "connected": True,
@@ -100,8 +101,14 @@ async def hubspot_connection_status(db: Session = Depends(get_db), current_user=
         return {"connected": False}
 
 @router.post("/hubspot/disconnect")
-async def hubspot_disconnect(db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    success = delete_hubspot_connection_by_user_id(db, current_user.id)
+async def hubspot_disconnect(db: AsyncSession = Depends(get_db), current_user=Depends(get_current_user)):
+    connection = await get_hubspot_connection_by_user_id(db, current_user.id)
+    portal_id = connection.portal_id if connection else None
+    if connection:
+        credentials.forget(HUBSPOT, connection.id)
+    success = await delete_hubspot_connection_by_user_id(db, current_user.id)
+    if success and portal_id:
+        invalidate_hubspot_contact_cache(portal_id)
     if success:
         return JSONResponse({"success": True}, status_code=status.HTTP_200_OK)
     else:
@@ -0,0 +1,12 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+from api.deps import require_metrics_token
+from core.metrics import render
+
+# Mounted at the root, outside /api, for scrapers only
+router = APIRouter(dependencies=[Depends(require_metrics_token)])
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def read_metrics():
+    """Request, database, integration, cache and event-loop metrics in the Prometheus text format."""
+    return PlainTextResponse(render(), media_type="text/plain; version=0.0.4; charset=utf-8")
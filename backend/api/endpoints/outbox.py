@@ -0,0 +1,15 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.database import get_db
+from api.deps import require_admin
+from crud.outbox import get_outbox_depth
+
+router = APIRouter(prefix="/admin", dependencies=[Depends(require_admin)])
+
+@router.get("/outbox/status")
+async def outbox_status(db: AsyncSession = Depends(get_db)):
+    """
+    Number of queued (pending), in-flight (sending) and permanently failed
+    outgoing emails, across all advisors.
+    """
+    return await get_outbox_depth(db)
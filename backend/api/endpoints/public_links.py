@@ -1,33 +1,65 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from core.database import get_db
-from db.models import SchedulingLink, User
-from typing import Dict
+import json
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.config import PUBLIC_LINKS_CACHE_TTL_SECONDS, PUBLIC_LINKS_PAGE_SIZE, PUBLIC_LINKS_PAGE_SIZE_MAX
+from core.database import get_read_db
+from core.public_links import cache_page, current_generation, get_cached_page
+from crud.scheduling_link import get_public_links_page
 
 router = APIRouter()
 
 @router.get("/public/scheduling-links")
-async def public_scheduling_links(db: Session = Depends(get_db)):
-    # Get all scheduling links and their advisors
-    links = db.query(SchedulingLink).all()
-    advisors: Dict[int, Dict] = {}
-    for link in links:
-        user = db.query(User).filter_by(id=link.user_id).first()
-        if not user:
-            continue
-        if user.id not in advisors:
-            advisors[user.id] = {
+async def public_scheduling_links(
+    request: Request,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(PUBLIC_LINKS_PAGE_SIZE, ge=1, le=PUBLIC_LINKS_PAGE_SIZE_MAX),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Advisors with bookable links, a page of advisors at a time. Expired and
+    used-up links are left out. A Link header points at the next page, and
+    the rendered page is cached and served with an ETag.
+    """
+    page = get_cached_page(offset, limit)
+    if page is None:
+        generation = current_generation()
+        advisors, has_more = await get_public_links_page(db, datetime.utcnow(), limit, offset)
+        body = [
+            {
                 "advisor_name": user.name,
                 "advisor_email": user.email,
-                "links": []
+                "links": [
+                    {
+                        "link_id": link.link_id,
+                        "usage_limit": link.usage_limit,
+                        "expiration_date": link.expiration_date,
+                        "meeting_length": link.meeting_length,
+                        "advance_schedule_days": link.advance_schedule_days,
+                        "questions": link.questions,
+                    }
+                    for link in links
+                ],
             }
-        advisors[user.id]["links"].append({
-            "link_id": link.link_id,
-            "usage_limit": link.usage_limit,
-            "expiration_date": link.expiration_date,
-            "meeting_length": link.meeting_length,
-            "advance_schedule_days": link.advance_schedule_days,
-            "questions": link.questions,
-        })
-    # Return as a list of advisors
-    return list(advisors.values()) 
\ No newline at end of file
+            for user, links in advisors
+        ]
+        expirations = [link.expiration_date for _, links in advisors for link in links if link.expiration_date]
+        page = cache_page(
+            generation, offset, limit,
+            json.dumps(jsonable_encoder(body)).encode("utf-8"),
+            has_more,
+            expires_at=min(expirations, default=None),
+        )
+
+    headers = {
+        "ETag": page.etag,
+        "Cache-Control": f"public, max-age={int(PUBLIC_LINKS_CACHE_TTL_SECONDS)}, must-revalidate",
+    }
+    if page.has_more:
+        next_url = request.url.include_query_params(offset=offset + limit, limit=limit)
+        headers["Link"] = f'<{next_url}>; rel="next"'
+    if request.headers.get("if-none-match") == page.etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=page.body, media_type="application/json", headers=headers)
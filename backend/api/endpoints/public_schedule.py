@@ -1,51 +1,138 @@
-from fastapi import APIRouter, HTTPException, Path, Depends
-from sqlalchemy.orm import Session
-from core.database import get_db
-from db.models import SchedulingLink, SchedulingWindow, User
-from datetime import datetime, timedelta, date, time
-from typing import Dict, List
+import json
+from fastapi import APIRouter, HTTPException, Path, Depends, Request, Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.database import get_read_db
+from core.availability import compute_available_slots, horizon_bounds
+from core.cache import make_etag
+from core.calendar_sync import sync_accounts_events
+from core.config import (
+    GOOGLE_BUSY_SOURCE,
+    GOOGLE_SYNC_MIN_INTERVAL_SECONDS,
+    GOOGLE_WATCHED_SYNC_INTERVAL_SECONDS,
+    GOOGLE_WEBHOOK_URL,
+)
+from core.credentials import credentials
+from core.freebusy import get_busy_intervals
+from core.http_client import GOOGLE, get_http_client
+from core.slot_cache import cache_days, get_cached_days, horizon_days, slot_generation
+from crud.calendar import get_connected_accounts_by_user_id
+from crud.calendar_watch import get_watched_account_ids
+from crud.calendar_event import get_busy_intervals_in_range, get_recently_synced_account_ids
+from crud.meeting import get_meeting_intervals_in_range
+from crud.scheduling_link import get_scheduling_link_by_link_id
+from crud.scheduling_window import get_scheduling_windows_by_user_id
+from crud.user import get_user_by_id
+from db.models import SchedulingLink
+from datetime import datetime, timedelta
 
 router = APIRouter()
 
+async def sync_google_accounts(db: AsyncSession, accounts, now: datetime):
+    """
+    Bring the connected accounts' event stores up to date with a concurrent
+    delta sync, skipping accounts synced in the last
+    GOOGLE_SYNC_MIN_INTERVAL_SECONDS. Accounts that push their changes
+    (core.calendar_watch) are only polled every
+    GOOGLE_WATCHED_SYNC_INTERVAL_SECONDS. Accounts that fail to sync are
+    served from whatever is already stored.
+    """
+    account_ids = [account.id for account in accounts]
+    recent = await get_recently_synced_account_ids(
+        db, account_ids, now - timedelta(seconds=GOOGLE_SYNC_MIN_INTERVAL_SECONDS))
+    if GOOGLE_WEBHOOK_URL:
+        watched = await get_watched_account_ids(db, [i for i in account_ids if i not in recent], now)
+        if watched:
+            recent |= await get_recently_synced_account_ids(
+                db, list(watched), now - timedelta(seconds=GOOGLE_WATCHED_SYNC_INTERVAL_SECONDS))
+    tokens, _ = await credentials.google_tokens(
+        account for account in accounts
+        if (account.access_token or account.refresh_token) and account.id not in recent
+    )
+    if tokens:
+        await sync_accounts_events(get_http_client(GOOGLE), tokens)
+
+async def compute_link_slots(db: AsyncSession, link: SchedulingLink, account_ids, first_day, external_busy=()):
+    """
+    Slots for every day of the link's horizon, including ones already past.
+    Busy time comes from the stored events of account_ids plus external_busy.
+    """
+    range_start, range_end = horizon_bounds(first_day, link.advance_schedule_days)
+    windows = await get_scheduling_windows_by_user_id(db, link.user_id)
+    meetings = await get_meeting_intervals_in_range(
+        db, link.user_id, range_start, range_end)
+    stored_busy = await get_busy_intervals_in_range(
+        db, account_ids, range_start, range_end)
+    # Subtract busy time from the weekly windows and cut the rest into slots
+    return compute_available_slots(
+        windows=[(w.weekday, w.start_time, w.end_time) for w in windows],
+        busy=[(m.start_time, m.end_time) for m in meetings]
+        + [(e.start_time, e.end_time) for e in stored_busy]
+        + list(external_busy),
+        meeting_length=link.meeting_length,
+        first_day=first_day,
+        days=link.advance_schedule_days,
+    )
+
 @router.get("/schedule/{link_id}")
 async def public_schedule(
+    request: Request,
     link_id: str = Path(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
+    """
+    The link's bookable slots. Busy time comes from Google's FreeBusy API
+    (core.freebusy) or, with GOOGLE_BUSY_SOURCE=events, from the synced
+    event store. Each day's slots are cached per link and dropped by the
+    write paths that change windows, meetings or busy time; responses carry
+    an ETag and honour If-None-Match.
+    """
     # 1. Retrieve the SchedulingLink
-    link = db.query(SchedulingLink).filter_by(link_id=link_id).first()
+    link = await get_scheduling_link_by_link_id(db, link_id)
     if not link:
         raise HTTPException(status_code=404, detail="Scheduling link not found.")
     # 2. Check expiration and usage limit
-    if link.expiration_date and link.expiration_date < datetime.utcnow():
+    now = datetime.utcnow()
+    if link.expiration_date and link.expiration_date < now:
         return {"error": "This scheduling link has expired."}
     if link.usage_limit is not None and link.usage_limit <= 0:
         return {"error": "This scheduling link has reached its usage limit."}
     # 3. Get advisor info
-    user = db.query(User).filter_by(id=link.user_id).first()
+    user = await get_user_by_id(db, link.user_id)
     advisor_name = user.name if user else "Advisor"
-    # 4. Get scheduling windows
-    windows = db.query(SchedulingWindow).filter_by(user_id=link.user_id).all()
-    # 5. Calculate available slots (placeholder logic)
-    today = date.today()
-    available_slots: Dict[str, List[str]] = {}
-    for day_offset in range(link.advance_schedule_days + 1):
-        d = today + timedelta(days=day_offset)
-        slots = []
-        for w in windows:
-            # Example: generate slots every meeting_length minutes between start and end
-            start = datetime.combine(d, w.start_time)
-            end = datetime.combine(d, w.end_time)
-            t = start
-            while t + timedelta(minutes=link.meeting_length) <= end:
-                slots.append(t.strftime('%H:%M'))
-                t += timedelta(minutes=link.meeting_length)
+    # 4. Pick up calendar changes; busy time that changed invalidates the cache
+    accounts = await get_connected_accounts_by_user_id(db, user_id=link.user_id)
+    today = now.date()
+    if GOOGLE_BUSY_SOURCE == "freebusy":
+        # Accounts Google fails for are served from their stored events
+        external_busy, store_account_ids = await get_busy_intervals(
+            accounts, *horizon_bounds(today, link.advance_schedule_days))
+    else:
+        await sync_google_accounts(db, accounts, now)
+        external_busy, store_account_ids = [], [account.id for account in accounts]
+    # 5. Serve the horizon from the slot cache, computing it on a miss
+    days = horizon_days(today, link.advance_schedule_days)
+    slots_by_day = get_cached_days(link.user_id, link.link_id, days)
+    if slots_by_day is None:
+        generation = slot_generation(link.user_id)
+        computed = await compute_link_slots(db, link, store_account_ids, today, external_busy)
+        slots_by_day = {day: computed.get(day, []) for day in days}
+        cache_days(generation, link.user_id, link.link_id, slots_by_day)
+    available_slots = {}
+    for day, slots in slots_by_day.items():
+        if day == days[0]:
+            slots = [s for s in slots if datetime.fromisoformat(f"{day}T{s}") >= now]
         if slots:
-            available_slots[d.isoformat()] = slots
-    return {
+            available_slots[day] = slots
+
+    body = json.dumps(jsonable_encoder({
         "link_id": link.link_id,
         "advisor_name": advisor_name,
         "meeting_length": link.meeting_length,
         "available_slots": available_slots,
         "questions": link.questions,
-    } 
\ No newline at end of file
+    })).encode("utf-8")
+    headers = {"ETag": make_etag(body), "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
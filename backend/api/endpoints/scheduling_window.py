@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from datetime import datetime
 from core.database import get_db
@@ -9,13 +9,13 @@ from crud.scheduling_window import (
     get_scheduling_windows_by_user_id,
     update_scheduling_window,
     delete_scheduling_window,
+    get_scheduling_window_by_id,
 )
 from schemas.scheduling_window import (
     SchedulingWindowCreate,
     SchedulingWindowUpdate,
     SchedulingWindowOut,
 )
-from db.models import SchedulingWindow
 
 router = APIRouter()
 
@@ -34,7 +34,7 @@ def parse_time(s):
 @router.post("/scheduling-windows", response_model=SchedulingWindowOut)
 async def create_window(
     data: SchedulingWindowCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user=Depends(get_current_user),
 ):
     start = parse_time(data.start_time)
@@ -42,7 +42,7 @@ async def create_window(
     if start >= end:
         raise HTTPException(
             status_code=400, detail="Start time must be before end time.")
-    window = create_scheduling_window(
+    window = await create_scheduling_window(
         db,
         user_id=current_user.id,
         weekday=data.weekday,
@@ -53,10 +53,10 @@ async def create_window(
 
 @router.get("/scheduling-windows", response_model=List[SchedulingWindowOut])
 async def list_windows(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user=Depends(get_current_user),
 ):
-    return get_scheduling_windows_by_user_id(db, current_user.id)
+    return await get_scheduling_windows_by_user_id(db, current_user.id)
 
 @router.put(
         "/scheduling-windows/{window_id}",
@@ -64,14 +64,11 @@ async def list_windows(
 async def update_window(
     window_id: int,
     data: SchedulingWindowUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user=Depends(get_current_user),
 ):
-    window =\
-        db.query(
-            SchedulingWindow).filter_by(
-                id=window_id, user_id=current_user.id).first()
-    if not window:
+    window = await get_scheduling_window_by_id(db, window_id)
+    if not window or window.user_id != current_user.id:
         raise HTTPException(
             status_code=404, detail="Scheduling window not found.")
     start =\
@@ -80,7 +77,7 @@ async def update_window(
     if start >= end:
         raise HTTPException(
             status_code=400, detail="Start time must be before end time.")
-    updated = update_scheduling_window(
+    updated = await update_scheduling_window(
         db,
         window_id,
         start,
@@ -92,15 +89,12 @@ async def update_window(
 @router.delete("/scheduling-windows/{window_id}")
 async def delete_window(
     window_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user=Depends(get_current_user),
 ):
-    window =\
-        db.query(
-            SchedulingWindow).filter_by(
-                id=window_id, user_id=current_user.id).first()
-    if not window:
+    window = await get_scheduling_window_by_id(db, window_id)
+    if not window or window.user_id != current_user.id:
         raise HTTPException(
             status_code=404, detail="Scheduling window not found.")
-    delete_scheduling_window(db, window_id)
+    await delete_scheduling_window(db, window_id)
     return { "success": True }
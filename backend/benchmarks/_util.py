@@ -0,0 +1,15 @@
+"""Helpers shared by the benchmark and check scripts."""
+import socket
+
+
+def free_port():
+    """A TCP port on 127.0.0.1 that nothing is listening on."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def check(name, ok, detail):
+    """Print one PASS/FAIL line and return ok, for `ok &= check(...)`."""
+    print(f"{'PASS' if ok else 'FAIL'} {name}: {detail}")
+    return ok
@@ -0,0 +1,157 @@
+"""
+Concurrency stress test for the atomic booking path.
+
+Boots main:app under uvicorn on a scratch SQLite database with the production
+profile, the stubs from benchmarks.stubs standing in for the integrations the
+job workers call, and fires many simultaneous requests at
+POST /api/schedule/{link_id}/book. Checks that bookings never double-book an
+advisor or drive usage_limit negative, and that every request gets a
+booking, a 409 conflict or a 503 asking the client to retry.
+
+    cd backend && python -m benchmarks.booking_contention --bookings 300
+"""
+import argparse
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+import httpx
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from benchmarks._util import check, free_port
+from benchmarks.e2e import start, wait_for
+from core.database import ALEMBIC_INI
+from db.models import SchedulingLink, User
+
+OUTCOMES = {200: "booked", 400: "limit_reached", 409: "conflict", 503: "busy"}
+
+
+def seed(url, usage_limit):
+    config = Config(ALEMBIC_INI)
+    config.set_main_option("sqlalchemy.url", url)
+    config.attributes["configure_logger"] = False
+    command.upgrade(config, "head")
+
+    engine = create_engine(url)
+    with Session(engine) as db:
+        advisor = User(google_id="advisor", email="advisor@example.com", name="Advisor")
+        db.add(advisor)
+        db.flush()
+        db.add_all([
+            SchedulingLink(user_id=advisor.id, link_id="same-slot", usage_limit=None, meeting_length=30),
+            SchedulingLink(user_id=advisor.id, link_id="other-link", usage_limit=None, meeting_length=30),
+            SchedulingLink(user_id=advisor.id, link_id="limited", usage_limit=usage_limit, meeting_length=30),
+        ])
+        db.commit()
+    engine.dispose()
+
+
+async def run_bookings(base_url, link_id, starts):
+    """POST a booking for every start time, all at once."""
+    outcomes = Counter()
+
+    async def book(client, n, start):
+        response = await client.post(f"/api/schedule/{link_id}/book", json={
+            "time": start.isoformat(), "email": f"client-{n}@example.com", "linkedin": None, "answers": [],
+        })
+        outcomes[OUTCOMES.get(response.status_code, f"http_{response.status_code}")] += 1
+
+    # A client per burst: uvicorn closes the connections left idle in between
+    limits = httpx.Limits(max_connections=len(starts))
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        began = time.perf_counter()
+        await asyncio.gather(*(book(client, n, start) for n, start in enumerate(starts)))
+        return outcomes, time.perf_counter() - began
+
+
+def unexpected(outcomes):
+    return sum(count for outcome, count in outcomes.items() if outcome.startswith("http_"))
+
+
+async def run_checks(base_url, db_path, args):
+    ok = True
+    slot = datetime(2030, 1, 7, 9, 0)
+
+    # 1. Everyone races for the same slot on one link
+    outcomes, elapsed = await run_bookings(base_url, "same-slot", [slot] * args.bookings)
+    ok &= check("one winner per slot", outcomes["booked"] == 1 and not unexpected(outcomes),
+                f"{dict(outcomes)} in {elapsed:.2f}s ({args.bookings / elapsed:.0f} attempts/s)")
+
+    # 2. The same advisor's other link cannot take an overlapping slot
+    outcomes, _ = await run_bookings(base_url, "other-link", [slot + timedelta(minutes=15)] * 10)
+    ok &= check("overlap detected across links", outcomes["booked"] == 0 and not unexpected(outcomes),
+                dict(outcomes))
+
+    # 3. Distinct slots, but only usage_limit of them may be booked
+    starts = [slot + timedelta(days=1, minutes=30 * i) for i in range(args.bookings)]
+    outcomes, elapsed = await run_bookings(base_url, "limited", starts)
+    with sqlite3.connect(db_path) as db:
+        remaining = db.execute("SELECT usage_limit FROM scheduling_links WHERE link_id = 'limited'").fetchone()[0]
+        booked = db.execute("SELECT count(*) FROM meetings WHERE link_id = 'limited'").fetchone()[0]
+    ok &= check("usage limit respected",
+                booked == outcomes["booked"] == args.usage_limit and remaining == 0 and not unexpected(outcomes),
+                f"{dict(outcomes)}, {booked} meetings, usage_limit now {remaining}, {elapsed:.2f}s")
+
+    # 4. Distinct slots on an unlimited link: each one is booked or told to retry
+    after = starts[-1] + timedelta(days=1)
+    starts = [after + timedelta(minutes=30 * i) for i in range(args.bookings)]
+    outcomes, elapsed = await run_bookings(base_url, "other-link", starts)
+    ok &= check("burst of distinct slots", outcomes["booked"] + outcomes["busy"] == args.bookings,
+                f"{dict(outcomes)} in {elapsed:.2f}s ({outcomes['booked'] / elapsed:.0f} bookings/s)")
+    return ok
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bookings", type=int, default=300, help="concurrent booking attempts per scenario")
+    parser.add_argument("--usage-limit", type=int, default=5, help="usage limit for the distinct-slots scenario")
+    args = parser.parse_args(argv)
+
+    http_port, smtp_port, app_port = free_port(), free_port(), free_port()
+    stubs_url = f"http://127.0.0.1:{http_port}"
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "app.db")
+        seed(f"sqlite:///{db_path}", args.usage_limit)
+        env = dict(
+            os.environ,
+            DATABASE_URL=f"sqlite:///{db_path}",
+            HUBSPOT_API_URL=f"{stubs_url}/hubspot",
+            OPENAI_BASE_URL=f"{stubs_url}/openai/v1",
+            OPENAI_API_KEY="stub",
+            LINKEDIN_SCRAPING_ENABLED="false",
+            SMTP_HOST="127.0.0.1",
+            SMTP_PORT=str(smtp_port),
+            SMTP_STARTTLS="false",
+            SMTP_USER="",
+            EMAIL_FROM="bookings@example.com",
+            SECRET_KEY="benchmark",
+        )
+        stub_log, app_log = os.path.join(tmp, "stubs.log"), os.path.join(tmp, "app.log")
+        stubs = start([
+            sys.executable, "-m", "benchmarks.stubs", "--http-port", str(http_port), "--smtp-port", str(smtp_port),
+        ], env, stub_log)
+        app = start([
+            sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(app_port),
+            "--log-level", "warning",
+        ], env, app_log)
+        try:
+            wait_for(f"{stubs_url}/openapi.json", stubs, stub_log)
+            wait_for(f"http://127.0.0.1:{app_port}/api/", app, app_log)
+            ok = asyncio.run(run_checks(f"http://127.0.0.1:{app_port}", db_path, args))
+        finally:
+            for process in (app, stubs):
+                process.terminate()
+                process.wait(timeout=30)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
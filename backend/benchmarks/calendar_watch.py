@@ -0,0 +1,152 @@
+"""
+Checks Google Calendar push notifications end to end.
+
+Boots main:app with GOOGLE_WEBHOOK_URL pointing at itself and the stubs from
+benchmarks.stubs playing Google, whose /stub/calendar/push posts change
+notifications with the X-Goog-* headers to every open channel. Checks that:
+
+- every account gets a channel
+- a burst of notifications becomes one sync per account, which stores the
+  change
+- forged notifications are rejected
+- watched accounts are not polled by public page views
+- channels are renewed and the old ones stopped before they expire
+
+    cd backend && python -m benchmarks.calendar_watch --advisors 5 --burst 20
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks._util import check, free_port
+from benchmarks.e2e import seed, start, wait_for
+
+
+def wait_until(condition, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.1)
+    return condition()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--advisors", type=int, default=5)
+    parser.add_argument("--burst", type=int, default=20, help="notifications per channel in the burst")
+    parser.add_argument("--channel-ttl", type=int, default=8, help="seconds a channel lives before renewal is due")
+    args = parser.parse_args(argv)
+
+    http_port, smtp_port, app_port = free_port(), free_port(), free_port()
+    stubs_url, app_url = f"http://127.0.0.1:{http_port}", f"http://127.0.0.1:{app_port}"
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "app.db")
+        seed(f"sqlite:///{db_path}", args.advisors)
+        env = dict(
+            os.environ,
+            DATABASE_URL=f"sqlite:///{db_path}",
+            GOOGLE_CALENDAR_API_URL=f"{stubs_url}/calendar/v3",
+            GOOGLE_TOKEN_URL=f"{stubs_url}/google/token",
+            HUBSPOT_API_URL=f"{stubs_url}/hubspot",
+            OPENAI_API_KEY="stub",
+            SECRET_KEY="benchmark",
+            GOOGLE_WEBHOOK_URL=f"{app_url}/api/google/calendar/notifications",
+            GOOGLE_WATCH_TTL_SECONDS=str(args.channel_ttl),
+            GOOGLE_WATCH_RENEW_BEFORE_SECONDS=str(args.channel_ttl / 2),
+            GOOGLE_WATCH_CHECK_INTERVAL_SECONDS="1",
+            GOOGLE_WATCH_DEBOUNCE_SECONDS="0.5",
+            JOB_POLL_INTERVAL_SECONDS="0.2",
+        )
+        stub_log, app_log = os.path.join(tmp, "stubs.log"), os.path.join(tmp, "app.log")
+        stubs = start([
+            sys.executable, "-m", "benchmarks.stubs", "--http-port", str(http_port), "--smtp-port", str(smtp_port),
+            "--google-latency-ms", "20",
+        ], env, stub_log)
+        app = start([
+            sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(app_port),
+            "--log-level", "warning",
+        ], env, app_log)
+
+        def stats():
+            return httpx.get(f"{stubs_url}/stats").json()
+
+        def channel_count():
+            with sqlite3.connect(db_path) as db:
+                return db.execute("SELECT count(*) FROM calendar_watch_channels").fetchone()[0]
+
+        def synced_once():
+            with sqlite3.connect(db_path) as db:
+                return db.execute("SELECT count(*) FROM background_jobs WHERE kind = 'sync_calendar' "
+                                  "AND status = 'done'").fetchone()[0] >= args.advisors
+
+        ok = True
+        try:
+            wait_for(f"{stubs_url}/openapi.json", stubs, stub_log)
+            wait_for(f"{app_url}/api/", app, app_log)
+
+            # 1. Every account is watched, and the handshake is acknowledged
+            ok &= check("channel per account", wait_until(
+                lambda: channel_count() == args.advisors and stats().get("push_204", 0) >= args.advisors, 10),
+                f"{channel_count()} channels, {stats().get('push_204', 0)} sync messages acknowledged")
+            # The first channel also queues a catch-up sync
+            wait_until(synced_once, 10)
+
+            # 2. A burst of notifications: one delta sync per account, and the change is stored
+            before = stats()
+            burst = httpx.post(f"{stubs_url}/stub/calendar/push", params={"notifications": args.burst}, timeout=60).json()
+            stored = wait_until(lambda: stats().get("google", 0) - before.get("google", 0) >= args.advisors, 10)
+            time.sleep(1.5)
+            syncs = stats().get("google", 0) - before.get("google", 0)
+            with sqlite3.connect(db_path) as db:
+                pushed = db.execute("SELECT count(DISTINCT account_id) FROM calendar_events "
+                                    "WHERE event_id = 'pushed-0'").fetchone()[0]
+            ok &= check("burst coalesced into one sync per account",
+                        stored and syncs == args.advisors and pushed == args.advisors,
+                        f"{burst['statuses']} for {args.burst * args.advisors} notifications, "
+                        f"{syncs} syncs, change stored for {pushed} accounts")
+
+            # 3. Forged and stale notifications
+            with sqlite3.connect(db_path) as db:
+                channel_id, resource_id = db.execute(
+                    "SELECT channel_id, resource_id FROM calendar_watch_channels LIMIT 1").fetchone()
+            forged = httpx.post(f"{app_url}/api/google/calendar/notifications", headers={
+                "X-Goog-Channel-ID": channel_id, "X-Goog-Channel-Token": "guess",
+                "X-Goog-Resource-ID": resource_id, "X-Goog-Resource-State": "exists"})
+            unknown = httpx.post(f"{app_url}/api/google/calendar/notifications", headers={
+                "X-Goog-Channel-ID": "no-such-channel", "X-Goog-Resource-State": "exists"})
+            ok &= check("forged token rejected, unknown channel acknowledged",
+                        forged.status_code == 403 and unknown.status_code == 204,
+                        f"{forged.status_code}, {unknown.status_code}")
+
+            # 4. Public pages no longer poll watched accounts
+            before = stats().get("google", 0)
+            for n in range(args.advisors):
+                httpx.get(f"{app_url}/api/schedule/e2e-{n}-0", timeout=30).raise_for_status()
+            ok &= check("watched accounts not polled", stats().get("google", 0) == before,
+                        f"{stats().get('google', 0) - before} Google calls for {args.advisors} page views")
+
+            # 5. Renewal: new channels before the old ones expire, old ones stopped
+            watches = stats().get("google_watch", 0)
+            renewed = wait_until(lambda: stats().get("google_watch", 0) >= watches + args.advisors
+                                 and stats().get("google_watch_stop", 0) >= args.advisors, args.channel_ttl + 5)
+            ok &= check("channels renewed", renewed and channel_count() == args.advisors,
+                        f"{stats().get('google_watch', 0)} watches, {stats().get('google_watch_stop', 0)} stops, "
+                        f"{channel_count()} channels open")
+        finally:
+            for process in (app, stubs):
+                process.terminate()
+                process.wait(timeout=30)
+        if not ok:
+            with open(app_log) as f:
+                sys.stderr.write(f.read()[-4000:])
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""
+Concurrent request throughput against a running server.
+
+Seed a scratch database, start uvicorn from the directory that holds it, then
+drive the authenticated read endpoints with a fixed number of in-flight
+requests and report requests/second and latency percentiles:
+
+    cd backend && python -m benchmarks.concurrency seed /tmp/bench
+    (cd /tmp/bench && PYTHONPATH=$OLDPWD uvicorn main:app --port 8000 --log-level warning)
+    python -m benchmarks.concurrency run --base-url http://127.0.0.1:8000 --concurrency 50
+
+Run it against two checkouts to compare them under the same load.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, time as dtime, timedelta
+
+import httpx
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from core.database import ALEMBIC_INI
+from db.models import Meeting, SchedulingLink, SchedulingWindow, User
+from db.models import Session as UserSession
+
+SESSION_TOKEN = "benchmark-session"
+PATHS = ["/api/meetings?limit=50", "/api/scheduling-links", "/api/scheduling-windows"]
+
+
+def seed(directory, advisors=50, meetings_per_advisor=500):
+    """Create directory/app.db with enough rows that each request does real work."""
+    os.makedirs(directory, exist_ok=True)
+    url = f"sqlite:///{os.path.join(directory, 'app.db')}"
+    config = Config(ALEMBIC_INI)
+    config.set_main_option("sqlalchemy.url", url)
+    config.attributes["configure_logger"] = False
+    command.upgrade(config, "head")
+
+    engine = create_engine(url)
+    start = datetime(2030, 1, 7, 9, 0)
+    with Session(engine) as db:
+        for n in range(advisors):
+            user = User(google_id=f"bench-{n}", email=f"bench-{n}@example.com", name=f"Advisor {n}")
+            db.add(user)
+            db.flush()
+            db.add_all(SchedulingLink(
+                user_id=user.id, link_id=f"bench-{user.id}-{k}", usage_limit=100, expiration_date=start,
+                meeting_length=30, advance_schedule_days=30, questions=["Why?"]) for k in range(5))
+            db.add_all(SchedulingWindow(user_id=user.id, weekday=d, start_time=dtime(9), end_time=dtime(17)) for d in range(5))
+            db.add_all(
+                Meeting(advisor_id=user.id, link_id=f"bench-{user.id}-{i % 5}", client_email="c@example.com",
+                        start_time=start + timedelta(hours=i), end_time=start + timedelta(hours=i, minutes=30))
+                for i in range(meetings_per_advisor)
+            )
+        db.add(UserSession(user_id=user.id, session_token=SESSION_TOKEN, expires_at=datetime.utcnow() + timedelta(days=30)))
+        db.commit()
+    engine.dispose()
+    print(f"Seeded {url}; session token {SESSION_TOKEN}")
+
+
+async def run(base_url, paths, concurrency, requests, warmup):
+    latencies = []
+    errors = 0
+    counter = iter(range(requests))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, headers={"X-Session-Token": SESSION_TOKEN},
+                                 limits=limits, timeout=60) as client:
+        for i in range(warmup):
+            await client.get(paths[i % len(paths)])
+
+        async def worker():
+            nonlocal errors
+            for i in counter:
+                began = time.perf_counter()
+                response = await client.get(paths[i % len(paths)])
+                latencies.append(time.perf_counter() - began)
+                if response.status_code != 200:
+                    errors += 1
+
+        began = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - began
+
+    latencies.sort()
+    pct = lambda p: latencies[min(int(len(latencies) * p), len(latencies) - 1)] * 1000
+    print(f"{requests} requests, concurrency {concurrency}, {errors} errors")
+    print(f"  {requests / elapsed:.0f} req/s over {elapsed:.2f}s")
+    print(f"  latency ms: p50 {pct(0.50):.1f}  p95 {pct(0.95):.1f}  p99 {pct(0.99):.1f}  "
+          f"mean {statistics.mean(latencies) * 1000:.1f}")
+    return 0 if errors == 0 else 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    seed_parser = sub.add_parser("seed", help="create a benchmark database in a directory")
+    seed_parser.add_argument("directory")
+    run_parser = sub.add_parser("run", help="load a running server")
+    run_parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    run_parser.add_argument("--path", action="append", dest="paths", help="path to request (repeatable)")
+    run_parser.add_argument("--concurrency", type=int, default=50)
+    run_parser.add_argument("--requests", type=int, default=3000)
+    run_parser.add_argument("--warmup", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    if args.command == "seed":
+        seed(args.directory)
+        return 0
+    return asyncio.run(run(args.base_url, args.paths or PATHS, args.concurrency, args.requests, args.warmup))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+"""
+Checks the OAuth credential manager against the stand-in token endpoints.
+
+Runs the stubs' Google and HubSpot token endpoints in-process and a scratch
+SQLite database, then checks that tokens are refreshed ahead of expiry, that
+concurrent callers share a single refresh per connection, that refreshed
+tokens are served from memory and stored, and that a revoked refresh token
+falls back to the current token while it lasts.
+
+    cd backend && python -m benchmarks.credentials --callers 200
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+import uvicorn
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from benchmarks._util import check, free_port
+from benchmarks.stubs import build_app
+from core.credentials import PROVIDERS, CredentialError, CredentialManager
+from core.database import Base
+from core.http_client import GOOGLE, HUBSPOT, close_http_clients
+from db.models import ConnectedGoogleAccount, HubspotConnection, User
+
+
+async def concurrently(callers, get_token):
+    """Call get_token from `callers` tasks at once; returns (distinct tokens, seconds)."""
+    began = time.perf_counter()
+    tokens = await asyncio.gather(*(get_token() for _ in range(callers)))
+    return set(tokens), time.perf_counter() - began
+
+
+async def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--callers", type=int, default=200, help="concurrent token requests per connection")
+    parser.add_argument("--accounts", type=int, default=20, help="accounts refreshed together in the fan-out check")
+    parser.add_argument("--latency-ms", type=float, default=100, help="token endpoint latency")
+    args = parser.parse_args(argv)
+    latency = args.latency_ms / 1000
+
+    calls = Counter()
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(
+        build_app(latency, latency, 0, 0, calls), host="127.0.0.1", port=port, log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tmp, 'credentials.db')}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        Session = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+        manager = CredentialManager(Session, margin=300, providers={
+            GOOGLE: PROVIDERS[GOOGLE]._replace(token_url=f"http://127.0.0.1:{port}/google/token"),
+            HUBSPOT: PROVIDERS[HUBSPOT]._replace(token_url=f"http://127.0.0.1:{port}/hubspot/oauth/v1/token"),
+        })
+
+        now = datetime.utcnow()
+        async with Session() as db:
+            user = User(google_id="advisor", email="advisor@example.com", name="Advisor")
+            db.add(user)
+            await db.flush()
+
+            def account(name, expires_at, refresh_token="refresh"):
+                return ConnectedGoogleAccount(
+                    user_id=user.id, google_account_id=name, email=f"{name}@example.com",
+                    access_token=f"{name}-stored", refresh_token=refresh_token, token_expires_at=expires_at)
+
+            fresh = account("fresh", now + timedelta(hours=1))
+            expiring = account("expiring", now + timedelta(minutes=2))
+            legacy = account("legacy", None)
+            revoked_valid = account("revoked-valid", now + timedelta(minutes=1), refresh_token="revoked")
+            revoked_expired = account("revoked-expired", now - timedelta(minutes=1), refresh_token="revoked")
+            fan_out = [account(f"fan-out-{n}", now + timedelta(seconds=30)) for n in range(args.accounts)]
+            hubspot = HubspotConnection(user_id=user.id, access_token="hubspot-stored", refresh_token="refresh",
+                                        expires_at=now + timedelta(minutes=1), portal_id="1")
+            db.add_all([fresh, expiring, legacy, revoked_valid, revoked_expired, *fan_out, hubspot])
+            await db.commit()
+
+        ok = True
+
+        # 1. A token well inside its lifetime is used as stored
+        tokens, _ = await concurrently(args.callers, lambda: manager.google_token(fresh))
+        ok &= check("fresh token used as is", tokens == {"fresh-stored"} and calls["google_token"] == 0,
+                    f"{tokens}, {calls['google_token']} refreshes")
+
+        # 2. Inside the refresh margin: every caller waits on the same refresh
+        tokens, elapsed = await concurrently(args.callers, lambda: manager.google_token(expiring))
+        ok &= check("one refresh for concurrent callers",
+                    len(tokens) == 1 and "expiring-stored" not in tokens and calls["google_token"] == 1,
+                    f"{args.callers} callers, {calls['google_token']} refreshes, {elapsed * 1000:.0f} ms")
+
+        # 3. The stale row is still what callers hold; the new token comes from memory
+        refreshed = tokens.pop()
+        tokens, elapsed = await concurrently(args.callers, lambda: manager.google_token(expiring))
+        ok &= check("refreshed token served from memory", tokens == {refreshed} and calls["google_token"] == 1,
+                    f"{calls['google_token']} refreshes, {elapsed * 1000:.1f} ms for {args.callers} callers")
+        async with Session() as db:
+            stored = await db.get(ConnectedGoogleAccount, expiring.id)
+        ok &= check("refreshed token stored",
+                    stored.access_token == refreshed and stored.token_expires_at > now + timedelta(minutes=50),
+                    f"expires {stored.token_expires_at:%H:%M:%S}")
+
+        # 4. Accounts connected before expiry was recorded are refreshed once
+        before = calls["google_token"]
+        tokens, _ = await concurrently(args.callers, lambda: manager.google_token(legacy))
+        ok &= check("unknown expiry refreshed once", calls["google_token"] - before == 1 and "legacy-stored" not in tokens,
+                    f"{calls['google_token'] - before} refreshes")
+
+        # 5. A revoked refresh token: keep using a token that has not expired yet, fail once it has
+        tokens, _ = await concurrently(10, lambda: manager.google_token(revoked_valid))
+        ok &= check("rejected refresh falls back to the current token", tokens == {"revoked-valid-stored"}, tokens)
+        try:
+            await manager.google_token(revoked_expired)
+            ok &= check("expired token with rejected refresh fails", False, "no error")
+        except CredentialError as e:
+            ok &= check("expired token with rejected refresh fails", True, e)
+
+        # 6. HubSpot connections work the same way
+        tokens, _ = await concurrently(args.callers, lambda: manager.hubspot_token(hubspot))
+        ok &= check("one HubSpot refresh", len(tokens) == 1 and calls["hubspot_token"] == 1,
+                    f"{calls['hubspot_token']} refreshes")
+
+        # 7. Many expiring accounts refresh in parallel, each exactly once
+        before = calls["google_token"]
+        began = time.perf_counter()
+        results = await asyncio.gather(*(manager.google_tokens(fan_out) for _ in range(10)))
+        elapsed = time.perf_counter() - began
+        ok &= check("accounts refreshed in parallel",
+                    calls["google_token"] - before == args.accounts and all(not errors for _, errors in results)
+                    and elapsed < latency * args.accounts / 2,
+                    f"{calls['google_token'] - before} refreshes for {args.accounts} accounts in {elapsed * 1000:.0f} ms "
+                    f"(one after another: {latency * args.accounts * 1000:.0f} ms)")
+
+        await engine.dispose()
+
+    await close_http_clients()
+    server.should_exit = True
+    await serving
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
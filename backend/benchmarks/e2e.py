@@ -0,0 +1,298 @@
+"""
+End-to-end performance benchmark.
+
+Boots main:app under uvicorn on a scratch database, with Google Calendar,
+HubSpot, OpenAI and SMTP replaced by the local stubs in benchmarks.stubs,
+then measures throughput and p50/p95/p99 latency for booking a meeting, the
+public schedule, /events and /meetings at several concurrency levels. The
+results are written as JSON and, given a baseline report, compared against
+it; the run fails when any scenario regresses beyond the tolerance.
+
+    cd backend && python -m benchmarks.e2e --output report.json --baseline benchmarks/baseline.json
+
+Baselines are machine specific: refresh the stored one on the machine that
+runs the comparison with --output benchmarks/baseline.json.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import date, datetime, time as dtime, timedelta
+
+import httpx
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from benchmarks._util import free_port
+from core.database import ALEMBIC_INI
+from db.models import ConnectedGoogleAccount, HubspotConnection, Meeting, SchedulingLink, SchedulingWindow, User
+from db.models import Session as UserSession
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCENARIOS = ["book_meeting", "public_schedule", "events", "meetings"]
+LINKS_PER_ADVISOR = 3
+SLOTS_PER_DAY = 16
+
+
+def seed(url, advisors):
+    """Advisors with windows, links, history, a Google account, HubSpot and a session each."""
+    config = Config(ALEMBIC_INI)
+    config.set_main_option("sqlalchemy.url", url)
+    config.attributes["configure_logger"] = False
+    command.upgrade(config, "head")
+
+    engine = create_engine(url)
+    past = datetime.utcnow() - timedelta(days=400)
+    with Session(engine) as db:
+        for n in range(advisors):
+            user = User(google_id=f"e2e-{n}", email=f"advisor-{n}@example.com", name=f"Advisor {n}")
+            db.add(user)
+            db.flush()
+            db.add(ConnectedGoogleAccount(
+                user_id=user.id, google_account_id=f"e2e-{n}", email=user.email, access_token=f"google-{n}"))
+            db.add(HubspotConnection(user_id=user.id, access_token=f"hubspot-{n}", portal_id=str(n)))
+            db.add(UserSession(user_id=user.id, session_token=f"e2e-session-{n}",
+                               expires_at=datetime.utcnow() + timedelta(days=1)))
+            db.add_all(SchedulingWindow(user_id=user.id, weekday=d, start_time=dtime(9), end_time=dtime(17)) for d in range(5))
+            db.add_all(SchedulingLink(
+                user_id=user.id, link_id=f"e2e-{n}-{k}", meeting_length=30, advance_schedule_days=30,
+                questions=["What would you like to discuss?"]) for k in range(LINKS_PER_ADVISOR))
+            db.add_all(
+                Meeting(advisor_id=user.id, link_id=f"e2e-{n}-{i % LINKS_PER_ADVISOR}",
+                        client_email=f"client-{i}@example.com", answers=["History"],
+                        start_time=past + timedelta(hours=i), end_time=past + timedelta(hours=i, minutes=30))
+                for i in range(200)
+            )
+        db.commit()
+    engine.dispose()
+
+
+def booking_days(count):
+    """The next `count` weekdays, starting tomorrow."""
+    days, day = [], date.today()
+    while len(days) < count:
+        day += timedelta(days=1)
+        if day.weekday() < 5:
+            days.append(day)
+    return days
+
+
+class Workload:
+    """Builds the i-th request of each scenario, spreading load across advisors."""
+
+    def __init__(self, advisors):
+        self.advisors = advisors
+        self.booked = 0
+        self.days = booking_days(20)
+
+    def session(self, i):
+        return {"X-Session-Token": f"e2e-session-{i % self.advisors}"}
+
+    def request(self, scenario, i):
+        advisor = i % self.advisors
+        link = f"e2e-{advisor}-{i % LINKS_PER_ADVISOR}"
+        if scenario == "book_meeting":
+            # Every booking gets a slot of its own, so conflicts are not measured
+            k = self.booked // self.advisors
+            advisor = self.booked % self.advisors
+            self.booked += 1
+            start = datetime.combine(self.days[k // SLOTS_PER_DAY], dtime(9)) + timedelta(minutes=30 * (k % SLOTS_PER_DAY))
+            return "POST", f"/api/schedule/e2e-{advisor}-0/book", {}, {
+                "time": start.isoformat(), "email": f"client-{self.booked}@example.com",
+                "linkedin": None, "answers": ["Retirement planning"]}
+        if scenario == "public_schedule":
+            return "GET", f"/api/schedule/{link}", {}, None
+        if scenario == "events":
+            return "GET", "/api/events", self.session(i), None
+        return "GET", "/api/meetings?limit=50", self.session(i), None
+
+
+def percentile(values, p):
+    return values[min(int(len(values) * p), len(values) - 1)] * 1000 if values else None
+
+
+async def measure(client, workload, scenario, concurrency, requests):
+    latencies, failures = [], Counter()
+    counter = iter(range(requests))
+
+    async def worker():
+        for i in counter:
+            method, path, headers, body = workload.request(scenario, i)
+            began = time.perf_counter()
+            try:
+                response = await client.request(method, path, headers=headers, json=body)
+                if response.status_code >= 400:
+                    failures[str(response.status_code)] += 1
+            except httpx.HTTPError as e:
+                failures[type(e).__name__] += 1
+            latencies.append(time.perf_counter() - began)
+
+    began = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - began
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": sum(failures.values()),
+        "failures": dict(failures),
+        "rps": round(requests / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50), 1),
+        "p95_ms": round(percentile(latencies, 0.95), 1),
+        "p99_ms": round(percentile(latencies, 0.99), 1),
+    }
+
+
+async def run_scenarios(base_url, args):
+    workload = Workload(args.advisors)
+    results = {}
+    # Idle connections are dropped before uvicorn's 5 s keep-alive timeout, so a
+    # level never reuses a connection the server is closing
+    limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency),
+                          keepalive_expiry=2)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        for scenario in args.scenarios:
+            results[scenario] = {}
+            for concurrency in args.concurrency:
+                results[scenario][str(concurrency)] = result = await measure(
+                    client, workload, scenario, concurrency, args.requests)
+                print(f"{scenario:16} c={concurrency:<4} {result['rps']:8.1f} req/s  p50 {result['p50_ms']:8.1f}  "
+                      f"p95 {result['p95_ms']:8.1f}  p99 {result['p99_ms']:8.1f} ms  errors {result['errors']} {result['failures'] or ''}",
+                      flush=True)
+    return results
+
+
+def compare(report, baseline, tolerance):
+    """Return a line per scenario and level that is slower than the baseline beyond the tolerance."""
+    regressions = []
+    for scenario, levels in report["results"].items():
+        for concurrency, result in levels.items():
+            base = baseline.get("results", {}).get(scenario, {}).get(concurrency)
+            if not base:
+                continue
+            if result["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+                regressions.append(f"{scenario} c={concurrency}: p95 {result['p95_ms']} ms vs {base['p95_ms']} ms")
+            if result["rps"] < base["rps"] * (1 - tolerance):
+                regressions.append(f"{scenario} c={concurrency}: {result['rps']} req/s vs {base['rps']} req/s")
+            if result["errors"] > base["errors"]:
+                regressions.append(f"{scenario} c={concurrency}: {result['errors']} errors vs {base['errors']}")
+    return regressions
+
+
+def wait_for(url, process, log_path, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            break
+        try:
+            httpx.get(url, timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    with open(log_path) as f:
+        sys.stderr.write(f.read()[-4000:])
+    raise RuntimeError(f"{url} did not come up")
+
+
+def start(argv, env, log_path):
+    return subprocess.Popen(argv, cwd=BACKEND_DIR, env=env, stdout=open(log_path, "w"), stderr=subprocess.STDOUT)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario and concurrency level")
+    parser.add_argument("--advisors", type=int, default=20)
+    parser.add_argument("--google-latency-ms", type=float, default=80)
+    parser.add_argument("--hubspot-latency-ms", type=float, default=120)
+    parser.add_argument("--openai-latency-ms", type=float, default=800)
+    parser.add_argument("--smtp-latency-ms", type=float, default=50)
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--baseline", help="compare against this JSON report")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown against the baseline")
+    args = parser.parse_args(argv)
+
+    http_port, smtp_port, app_port = free_port(), free_port(), free_port()
+    latencies = {
+        "google_latency_ms": args.google_latency_ms,
+        "hubspot_latency_ms": args.hubspot_latency_ms,
+        "openai_latency_ms": args.openai_latency_ms,
+        "smtp_latency_ms": args.smtp_latency_ms,
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        db_url = f"sqlite:///{os.path.join(tmp, 'app.db')}"
+        seed(db_url, args.advisors)
+        env = dict(
+            os.environ,
+            DATABASE_URL=db_url,
+            GOOGLE_CALENDAR_API_URL=f"http://127.0.0.1:{http_port}/calendar/v3",
+            GOOGLE_TOKEN_URL=f"http://127.0.0.1:{http_port}/google/token",
+            HUBSPOT_API_URL=f"http://127.0.0.1:{http_port}/hubspot",
+            OPENAI_BASE_URL=f"http://127.0.0.1:{http_port}/openai/v1",
+            OPENAI_API_KEY="stub",
+            AI_CACHE_ENABLED="false",
+            LINKEDIN_SCRAPING_ENABLED="false",
+            SMTP_HOST="127.0.0.1",
+            SMTP_PORT=str(smtp_port),
+            SMTP_STARTTLS="false",
+            SMTP_USER="",
+            EMAIL_FROM="bookings@example.com",
+            SECRET_KEY="benchmark",
+            TRACE_EXPORT_URL=f"http://127.0.0.1:{http_port}/otlp/v1/traces",
+            TRACE_EXPORT_INTERVAL_SECONDS="1",
+        )
+        stub_log, app_log = os.path.join(tmp, "stubs.log"), os.path.join(tmp, "app.log")
+        stubs = start([
+            sys.executable, "-m", "benchmarks.stubs", "--http-port", str(http_port), "--smtp-port", str(smtp_port),
+            *(f"--{name.replace('_', '-')}={value}" for name, value in latencies.items()),
+        ], env, stub_log)
+        app = start([
+            sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(app_port),
+            "--log-level", "warning",
+        ], env, app_log)
+        try:
+            wait_for(f"http://127.0.0.1:{http_port}/openapi.json", stubs, stub_log)
+            wait_for(f"http://127.0.0.1:{app_port}/api/", app, app_log)
+            results = asyncio.run(run_scenarios(f"http://127.0.0.1:{app_port}", args))
+            upstream_calls = httpx.get(f"http://127.0.0.1:{http_port}/stats").json()
+            print(f"Upstream calls: {upstream_calls}")
+        finally:
+            for process in (app, stubs):
+                process.terminate()
+                process.wait(timeout=30)
+
+    report = {
+        "generated_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "config": {"requests": args.requests, "advisors": args.advisors, **latencies},
+        "results": results,
+        "upstream_calls": upstream_calls,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"Wrote {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("config") != report["config"]:
+            print("Warning: the baseline was recorded with a different configuration")
+        regressions = compare(report, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+        print(f"No regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
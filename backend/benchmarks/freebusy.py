@@ -0,0 +1,127 @@
+"""
+Checks the FreeBusy busy-time source against the stand-in Google API.
+
+Runs the stubs in-process, where every account owns a primary and a team
+calendar and subscribes to a holiday calendar, then checks that:
+
+- busy time covers both owned calendars but not the holidays
+- it matches the busy time a full event sync would store for the primary
+  calendar
+- the response is far smaller than the event list
+- each account costs one freeBusy request, shared by concurrent page views
+  and then cached
+- a change in busy time drops the advisor's cached slots, and an unchanged
+  refetch keeps them
+
+    cd backend && python -m benchmarks.freebusy --accounts 20 --events 500
+"""
+import argparse
+import asyncio
+import os
+import sys
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+from benchmarks._util import check, free_port
+
+
+async def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--accounts", type=int, default=20)
+    parser.add_argument("--events", type=int, default=500, help="events on each primary calendar")
+    parser.add_argument("--days", type=int, default=14, help="scheduling horizon")
+    parser.add_argument("--viewers", type=int, default=50, help="concurrent page views")
+    parser.add_argument("--latency-ms", type=float, default=50)
+    args = parser.parse_args(argv)
+
+    # The API URLs are read from the environment when core.freebusy is imported
+    port = free_port()
+    os.environ["GOOGLE_CALENDAR_API_URL"] = f"http://127.0.0.1:{port}/calendar/v3"
+    import httpx
+    import uvicorn
+
+    from benchmarks.stubs import build_app
+    from core.availability import horizon_bounds, merge_intervals
+    from core.calendar_sync import event_to_change, fetch_event_changes
+    from core.freebusy import forget_account_busy, get_busy_intervals, list_calendar_ids, query_free_busy
+    from core.http_client import close_http_clients
+    from core.slot_cache import cache_days, get_cached_days, slot_generation
+    from db.models import ConnectedGoogleAccount
+
+    calls = Counter()
+    latency = args.latency_ms / 1000
+    server = uvicorn.Server(uvicorn.Config(
+        build_app(latency, 0, 0, args.events, calls), host="127.0.0.1", port=port, log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    expires = datetime.utcnow() + timedelta(hours=1)
+    accounts = [ConnectedGoogleAccount(id=n + 1, user_id=n + 1, access_token=f"token-{n}", token_expires_at=expires)
+                for n in range(args.accounts)]
+    start, end = horizon_bounds(date.today(), args.days)
+    received = Counter()
+
+    async def measure(response):
+        await response.aread()
+        received[response.request.url.path.rsplit("/", 1)[-1]] += len(response.content)
+
+    ok = True
+    async with httpx.AsyncClient(event_hooks={"response": [measure]}) as client:
+        # 1. Owned calendars count, subscribed ones do not
+        calendar_ids = await list_calendar_ids(client, "token")
+        busy = await query_free_busy(client, "token", calendar_ids, start, end)
+        busy_bytes = received["calendarList"] + received["freeBusy"]
+        ok &= check("owned calendars only", calendar_ids == ["primary", "team@group.calendar.google.com"],
+                    calendar_ids)
+
+        # 2. The same busy time a full sync of the primary calendar would store
+        events, _ = await fetch_event_changes(client, "token")
+        stored = merge_intervals(
+            (max(c["start_time"], start), min(c["end_time"], end))
+            for c in map(event_to_change, events) if c["start_time"] < end and c["end_time"] > start)
+        primary_only = await query_free_busy(client, "token", ["primary"], start, end)
+        team = [interval for interval in busy if interval not in primary_only]
+        ok &= check("primary busy time matches the event store", primary_only == stored,
+                    f"{len(primary_only)} intervals from freeBusy, {len(stored)} from {len(events)} events")
+        ok &= check("secondary calendar counted", len(team) > 0, f"{len(team)} intervals only on the team calendar")
+
+        # 3. Bytes on the wire for one account
+        event_bytes = received["events"]
+        ok &= check("smaller than the event list", busy_bytes * 5 < event_bytes,
+                    f"{event_bytes} bytes of events vs {busy_bytes} bytes of calendar list and free/busy")
+
+    # 4. One request per account, shared by concurrent viewers, then cached
+    results = await asyncio.gather(*(get_busy_intervals(accounts, start, end) for _ in range(args.viewers)))
+    first = (calls["google_freebusy"], calls["google_calendar_list"])
+    await get_busy_intervals(accounts, start, end)
+    ok &= check("one freeBusy request per account",
+                first == (args.accounts + 2, args.accounts + 1) and all(not failed for _, failed in results)
+                and calls["google_freebusy"] == first[0],
+                f"{args.viewers} viewers x {args.accounts} accounts: {first[0] - 2} freeBusy, "
+                f"{first[1] - 1} calendarList requests; {calls['google_freebusy'] - first[0]} more when cached")
+
+    # 5. Cached slots survive an unchanged refetch and are dropped by a change
+    advisor = accounts[0]
+    days = [date.today().isoformat()]
+    cache_days(slot_generation(advisor.user_id), advisor.user_id, "link", {days[0]: ["09:00"]})
+    forget_account_busy(advisor.id)
+    await get_busy_intervals([advisor], start, end)
+    unchanged_kept = get_cached_days(advisor.user_id, "link", days) is not None
+    async with httpx.AsyncClient() as client:
+        (await client.post(f"http://127.0.0.1:{port}/stub/calendar/push", params={"notifications": 0})).raise_for_status()
+    forget_account_busy(advisor.id)
+    busy_after, _ = await get_busy_intervals([advisor], start, end)
+    changed_dropped = get_cached_days(advisor.user_id, "link", days) is None
+    ok &= check("slots dropped only when busy time changes", unchanged_kept and changed_dropped,
+                f"kept after unchanged refetch: {unchanged_kept}, dropped after change: {changed_dropped}, "
+                f"{len(busy_after)} busy intervals")
+
+    await close_http_clients()
+    server.should_exit = True
+    await serving
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,151 @@
+"""
+Checks the email outbox against a local aiosmtpd server.
+
+The server accepts mail, answers RCPT for tempfail-* addresses with a 451
+and for reject-* addresses with a 550. On a scratch database it checks that:
+
+- a batch is delivered over one reused SMTP connection
+- a 4xx reply is retried with exponential backoff until the attempts run out
+- a 5xx reply fails the message at once
+- get_outbox_depth counts pending, sending and failed messages
+- only batches claimed before the stale cutoff are requeued
+
+aiosmtpd comes from requirements-dev.txt:
+
+    cd backend && pip install -r requirements-dev.txt
+    python -m benchmarks.outbox --batch 20
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+from benchmarks._util import check, free_port
+
+
+class Handler:
+    """aiosmtpd handler that records the SMTP sessions and delivered recipients."""
+
+    def __init__(self):
+        self.sessions = set()
+        self.delivered = []
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address.startswith("tempfail"):
+            return "451 4.3.0 Mailbox busy, try again later"
+        if address.startswith("reject"):
+            return "550 5.1.1 No such user"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        self.sessions.add(session)
+        self.delivered.extend(envelope.rcpt_tos)
+        return "250 Message accepted"
+
+
+async def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch", type=int, default=20, help="messages in the delivered batch")
+    parser.add_argument("--retry-seconds", type=float, default=0.5, help="first retry delay")
+    parser.add_argument("--max-attempts", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    from aiosmtpd.controller import Controller
+
+    handler = Handler()
+    port = free_port()
+    controller = Controller(handler, hostname="127.0.0.1", port=port)
+    controller.start()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Settings are read from the environment when core is imported
+        os.environ.update(
+            DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'outbox.db')}",
+            SMTP_HOST="127.0.0.1", SMTP_PORT=str(port), SMTP_STARTTLS="false", SMTP_USER="",
+            EMAIL_FROM="scheduler@example.com",
+            OUTBOX_BATCH_SIZE=str(args.batch), OUTBOX_RETRY_SECONDS=str(args.retry_seconds),
+            OUTBOX_MAX_ATTEMPTS=str(args.max_attempts),
+        )
+        from core.config import OUTBOX_STALE_SECONDS
+        from core.database import AsyncSessionLocal, Base, async_engine, engine, read_engine
+        from core.outbox import OutboxSender, enqueue_email
+        from crud.outbox import get_outbox_depth
+        from db.models import OutboxMessage
+
+        Base.metadata.create_all(engine)
+        sender = OutboxSender()
+
+        async def enqueue(*addresses):
+            async with AsyncSessionLocal() as db:
+                messages = [enqueue_email(db, address, "Meeting booked", "See you then.") for address in addresses]
+                await db.commit()
+            return [message.id for message in messages]
+
+        async def load(message_id):
+            async with AsyncSessionLocal() as db:
+                return await db.get(OutboxMessage, message_id)
+
+        async def depth():
+            async with AsyncSessionLocal() as db:
+                return await get_outbox_depth(db)
+
+        ok = True
+        try:
+            # 1. One connection for a whole batch
+            await enqueue(*(f"client-{n}@example.com" for n in range(args.batch)))
+            await sender.send_batch()
+            ok &= check("batch sent over one connection",
+                        len(handler.delivered) == args.batch and len(handler.sessions) == 1,
+                        f"{len(handler.delivered)} messages, {len(handler.sessions)} SMTP connections")
+
+            # 2. A 4xx is retried later, a 5xx fails straight away
+            tempfail, reject = await enqueue("tempfail@example.com", "reject@example.com")
+            await sender.send_batch()
+            first_try, rejected = await load(tempfail), await load(reject)
+            counts = await depth()
+            ok &= check("5xx fails at once", rejected.status == "failed" and rejected.attempts == 1,
+                        f"{rejected.status} after {rejected.attempts} attempt: {rejected.last_error}")
+            ok &= check("outbox depth", counts == {"pending": 1, "sending": 0, "failed": 1}, counts)
+
+            delays = [(first_try.next_attempt_at - first_try.claimed_at).total_seconds()]
+            message = first_try
+            while message.status == "pending":
+                await asyncio.sleep(max((message.next_attempt_at - datetime.utcnow()).total_seconds(), 0) + 0.05)
+                await sender.send_batch()
+                message = await load(tempfail)
+                if message.status == "pending":
+                    delays.append((message.next_attempt_at - message.claimed_at).total_seconds())
+            doubling = all(1.6 < later / earlier < 2.4 for earlier, later in zip(delays, delays[1:]))
+            ok &= check("4xx retried with backoff",
+                        message.status == "failed" and message.attempts == args.max_attempts
+                        and abs(delays[0] - args.retry_seconds) < 0.3 and doubling,
+                        f"delays {', '.join(f'{d:.2f}s' for d in delays)}, then {message.status} "
+                        f"after {message.attempts} attempts")
+            ok &= check("connection survives rejected recipients", len(handler.sessions) == 1,
+                        f"{len(handler.sessions)} SMTP connections")
+
+            # 3. Stale batches are requeued; one claimed by a live sender is not
+            now = datetime.utcnow()
+            live, dead = await enqueue("live@example.com", "dead@example.com")
+            async with AsyncSessionLocal() as db:
+                for message_id, claimed_at in ((live, now), (dead, now - timedelta(seconds=OUTBOX_STALE_SECONDS + 1))):
+                    message = await db.get(OutboxMessage, message_id)
+                    message.status, message.claim_id, message.claimed_at = "sending", "other-sender", claimed_at
+                await db.commit()
+                await OutboxSender()._requeue_stale(db, now)
+            statuses = ((await load(live)).status, (await load(dead)).status)
+            ok &= check("only stale batches requeued", statuses == ("sending", "pending"),
+                        f"claimed just now: {statuses[0]}, claimed {OUTBOX_STALE_SECONDS:g}s ago: {statuses[1]}")
+        finally:
+            await asyncio.to_thread(sender.connection.close)
+            controller.stop()
+            await async_engine.dispose()
+            await read_engine.dispose()
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
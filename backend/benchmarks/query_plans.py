@@ -0,0 +1,132 @@
+"""
+EXPLAIN QUERY PLAN check for the hot crud queries.
+
+Migrates a scratch SQLite database to head, runs each crud function while
+recording the SQL it issues, and fails unless SQLite plans every recorded
+statement through the expected index.
+
+    cd backend && python -m benchmarks.query_plans
+"""
+import asyncio
+import os
+import sys
+import tempfile
+from datetime import datetime, time, timedelta
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+
+from benchmarks._util import check
+from core.database import ALEMBIC_INI
+from crud.calendar import get_connected_accounts_by_user_id
+from crud.hubspot import get_hubspot_connection_by_user_id
+from crud.meeting import book_time_slot, get_meeting_intervals_in_range, get_meetings_page
+from crud.scheduling_link import get_scheduling_links_by_user_id
+from crud.scheduling_window import get_scheduling_windows_by_user_id
+from db.models import ConnectedGoogleAccount, HubspotConnection, Meeting, SchedulingLink, SchedulingWindow, User
+
+START = datetime(2030, 1, 7, 9, 0)
+
+
+def seed(db, users=50, meetings_per_user=200):
+    """A realistic spread of advisors so the planner's statistics favour the indexes."""
+    for n in range(users):
+        user = User(google_id=f"advisor-{n}", email=f"advisor-{n}@example.com", name=f"Advisor {n}")
+        db.add(user)
+        db.flush()
+        db.add_all([
+            SchedulingLink(user_id=user.id, link_id=f"link-{user.id}-{k}", meeting_length=30) for k in range(3)
+        ])
+        db.add_all([
+            ConnectedGoogleAccount(user_id=user.id, google_account_id=f"g-{n}", email=f"advisor-{n}@example.com"),
+            HubspotConnection(user_id=user.id, portal_id=str(n)),
+        ])
+        db.add_all(SchedulingWindow(user_id=user.id, weekday=d, start_time=time(9), end_time=time(17)) for d in range(5))
+        db.add_all(
+            Meeting(advisor_id=user.id, link_id=f"link-{user.id}-{i % 3}", client_email="c@example.com",
+                    start_time=START + timedelta(hours=i), end_time=START + timedelta(hours=i, minutes=30))
+            for i in range(meetings_per_user)
+        )
+    db.commit()
+    return user.id
+
+
+TABLES = ["meetings", "scheduling_links", "scheduling_windows", "hubspot_connections", "connected_google_accounts"]
+
+CHECKS = [
+    # (name, expected index, call)
+    ("get_meeting_intervals_in_range", "ix_meetings_advisor_id_start_time",
+     lambda db, uid: get_meeting_intervals_in_range(db, uid, START, START + timedelta(days=14))),
+    ("get_meetings_page", "ix_meetings_advisor_id_start_time",
+     lambda db, uid: get_meetings_page(db, uid, 50, after=(START + timedelta(days=3), 10**6))),
+    ("book_time_slot overlap check", "ix_meetings_advisor_id_start_time",
+     lambda db, uid: _book(db, uid)),
+    ("meetings by link", "ix_meetings_link_id_start_time_end_time",
+     lambda db, uid: db.scalars(select(Meeting).where(Meeting.link_id == f"link-{uid}-0"))),
+    ("get_scheduling_links_by_user_id", "ix_scheduling_links_user_id",
+     lambda db, uid: get_scheduling_links_by_user_id(db, uid)),
+    ("get_scheduling_windows_by_user_id", "ix_scheduling_windows_user_id_weekday",
+     lambda db, uid: get_scheduling_windows_by_user_id(db, uid)),
+    ("get_hubspot_connection_by_user_id", "ix_hubspot_connections_user_id",
+     lambda db, uid: get_hubspot_connection_by_user_id(db, uid)),
+    ("get_connected_accounts_by_user_id", "ix_connected_google_accounts_user_id",
+     lambda db, uid: get_connected_accounts_by_user_id(db, uid)),
+]
+
+
+async def _book(db, advisor_id):
+    start = START - timedelta(days=1)
+    await book_time_slot(db, advisor_id, f"link-{advisor_id}-0", start, start + timedelta(minutes=30), "c@example.com", None, [])
+    await db.rollback()
+
+
+async def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'plans.db')}"
+        config = Config(ALEMBIC_INI)
+        config.set_main_option("sqlalchemy.url", url)
+        config.attributes["configure_logger"] = False
+        command.upgrade(config, "head")
+
+        engine = create_engine(url)
+        with Session(engine, autoflush=False) as db:
+            advisor_id = seed(db)
+        with engine.connect() as conn:
+            conn.exec_driver_sql("ANALYZE")
+        engine.dispose()
+
+        async_engine = create_async_engine(url.replace("sqlite://", "sqlite+aiosqlite://"))
+        db = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)()
+        statements = []
+
+        @event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if not statement.startswith("EXPLAIN"):
+                statements.append((statement, parameters))
+
+        ok = True
+        for name, index, call in CHECKS:
+            del statements[:]
+            await call(db, advisor_id)
+            table = next(t for t in TABLES if index.startswith(f"ix_{t}_"))
+            relevant = [
+                (sql, params) for sql, params in statements
+                if f"FROM {table}" in sql
+            ]
+            plans = []
+            conn = await db.connection()
+            for sql, params in relevant:
+                rows = (await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", params)).fetchall()
+                plans.append(" | ".join(row[-1] for row in rows))
+            ok &= check(name, bool(plans) and all(index in plan for plan in plans),
+                        ' || '.join(plans) or 'no query recorded')
+        await db.close()
+        await async_engine.dispose()
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,133 @@
+"""
+Public-page read latency while a burst of bookings holds the write lock.
+
+Runs the same workload twice on a scratch database, with the app's pool
+sizes: once with SQLite's defaults (rollback journal, one pool shared by
+readers and writers, bookings contending in SQLite's busy handler) and once
+with the production profile from core.database (WAL, tuned PRAGMAs, a
+separate read-only pool, bookings waiting in the busy handler up to
+busy_timeout). The longest event loop stall is reported too: a stalled loop
+delays every request in the process, not only the bookings.
+
+    cd backend && python -m benchmarks.read_during_writes --bookings 300 --readers 20 --read-interval 0.05
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from core.config import DB_POOL_SIZE, DB_READ_POOL_SIZE
+from core.database import Base, apply_sqlite_pragmas
+from crud.meeting import BookingBusy, BookingConflict, book_time_slot, get_meeting_intervals_in_range
+from crud.scheduling_link import get_public_links_page
+from db.models import SchedulingLink, User
+
+START = datetime(2030, 1, 7, 9, 0)
+
+
+async def seed(Session, advisors=50):
+    async with Session() as db:
+        for n in range(advisors):
+            db.add(User(google_id=f"advisor-{n}", email=f"advisor-{n}@example.com", name=f"Advisor {n}"))
+        await db.commit()
+        db.add_all(SchedulingLink(user_id=n + 1, link_id=f"link-{n + 1}", meeting_length=30) for n in range(advisors))
+        await db.commit()
+
+
+async def run_profile(name, directory, production, args):
+    url = f"sqlite+aiosqlite:///{os.path.join(directory, f'{name}.db')}"
+    write_engine = create_async_engine(url, pool_size=DB_POOL_SIZE)
+    read_engine = write_engine
+    if production:
+        event.listen(write_engine.sync_engine, "connect", lambda conn, record: apply_sqlite_pragmas(conn))
+        read_engine = create_async_engine(url, pool_size=DB_READ_POOL_SIZE)
+        event.listen(read_engine.sync_engine, "connect", lambda conn, record: apply_sqlite_pragmas(conn, read_only=True))
+    async with write_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    WriteSession = async_sessionmaker(write_engine, autoflush=False, expire_on_commit=False)
+    ReadSession = async_sessionmaker(read_engine, autoflush=False, expire_on_commit=False)
+    await seed(WriteSession)
+
+    latencies, read_errors, booked, busy = [], 0, 0, 0
+    stall = 0.0
+    done = asyncio.Event()
+
+    async def book(i):
+        nonlocal booked, busy
+        advisor_id = i % 50 + 1
+        start = START + timedelta(minutes=30 * (i // 50))
+        async with WriteSession() as db:
+            try:
+                await book_time_slot(db, advisor_id, f"link-{advisor_id}", start, start + timedelta(minutes=30),
+                                     "client@example.com", None, [])
+                await db.commit()
+                booked += 1
+            except BookingBusy:
+                busy += 1
+            except BookingConflict:
+                pass
+
+    async def read(i):
+        nonlocal read_errors
+        while not done.is_set():
+            began = time.perf_counter()
+            try:
+                async with ReadSession() as db:
+                    await get_public_links_page(db, datetime.utcnow(), 50, 0)
+                    await get_meeting_intervals_in_range(db, i % 50 + 1, START, START + timedelta(days=14))
+                latencies.append(time.perf_counter() - began)
+            except OperationalError:
+                read_errors += 1
+            await asyncio.sleep(args.read_interval)
+
+    async def watch_loop():
+        nonlocal stall
+        while not done.is_set():
+            began = time.perf_counter()
+            await asyncio.sleep(0.01)
+            stall = max(stall, time.perf_counter() - began - 0.01)
+
+    readers = [asyncio.create_task(read(i)) for i in range(args.readers)]
+    watcher = asyncio.create_task(watch_loop())
+    began = time.perf_counter()
+    await asyncio.gather(*(book(i) for i in range(args.bookings)))
+    elapsed = time.perf_counter() - began
+    done.set()
+    await asyncio.gather(*readers, watcher)
+
+    latencies.sort()
+    pct = lambda p: latencies[min(int(len(latencies) * p), len(latencies) - 1)] * 1000 if latencies else float("nan")
+    print(f"{name}: {booked}/{args.bookings} bookings in {elapsed:.2f}s ({busy} busy); "
+          f"{len(latencies)} page reads ({len(latencies) / elapsed:.0f}/s), {read_errors} failed; "
+          f"read ms p50 {pct(0.5):.1f} p95 {pct(0.95):.1f} max {pct(1.0):.1f}; "
+          f"longest loop stall {stall * 1000:.0f} ms")
+
+    await write_engine.dispose()
+    if read_engine is not write_engine:
+        await read_engine.dispose()
+    # A booking that ran out of busy_timeout gets a 503 asking the client to retry
+    return booked + busy == args.bookings and read_errors == 0
+
+
+async def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bookings", type=int, default=300, help="concurrent bookings in the burst")
+    parser.add_argument("--readers", type=int, default=20, help="concurrent public page readers")
+    parser.add_argument("--read-interval", type=float, default=0.05, help="seconds each reader waits between page loads")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        await run_profile("default", tmp, production=False, args=args)
+        ok = await run_profile("production", tmp, production=True, args=args)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,322 @@
+"""
+Local stand-ins for the services the backend calls, for benchmarking.
+
+One HTTP server answers the Google Calendar events, watch, calendarList and
+freeBusy APIs, the HubSpot batch read endpoints, both OAuth token endpoints, OpenAI chat
+completions and an OTLP trace collector; a
+minimal SMTP server accepts the outbox's email. Every response is delayed by a configurable latency so
+the app sees realistic upstream timings:
+
+    cd backend && python -m benchmarks.stubs --http-port 9100 --smtp-port 9125 \\
+        --google-latency-ms 80 --hubspot-latency-ms 120 --openai-latency-ms 800 --smtp-latency-ms 50
+
+Point the app at them with:
+
+    GOOGLE_CALENDAR_API_URL=http://127.0.0.1:9100/calendar/v3
+    GOOGLE_TOKEN_URL=http://127.0.0.1:9100/google/token
+    GOOGLE_WEBHOOK_URL=http://127.0.0.1:8000/api/google/calendar/notifications
+    HUBSPOT_API_URL=http://127.0.0.1:9100/hubspot
+    OPENAI_BASE_URL=http://127.0.0.1:9100/openai/v1
+    SMTP_HOST=127.0.0.1 SMTP_PORT=9125 SMTP_STARTTLS=false
+
+POST /stub/calendar/push plays Google's part for watch channels: it changes
+the calendars and posts change notifications to every open channel.
+"""
+import argparse
+import asyncio
+import hashlib
+import re
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+
+def build_app(google_latency: float, hubspot_latency: float, openai_latency: float, events_per_calendar: int,
+              calls: Counter, token_lifetime: int = 3600) -> FastAPI:
+    app = FastAPI()
+    # channel id -> the events.watch request, plus its resourceId
+    channels = {}
+    # Events added by /stub/calendar/push, returned by every incremental sync
+    pushed = []
+
+    @app.get("/stats")
+    async def stats():
+        """Calls served per service, so a benchmark can check the app reached them."""
+        return dict(calls)
+
+    def calendar_events(calendar_id: str = "primary"):
+        """The events of a calendar: the primary one has events_per_calendar, the team one a quarter as many."""
+        if calendar_id == "primary":
+            count, hour, prefix = events_per_calendar, 10, "event"
+        else:
+            count, hour, prefix = events_per_calendar // 4, 16, "team"
+        start = datetime.utcnow().replace(hour=hour, minute=0, second=0, microsecond=0)
+        items = []
+        for i in range(count):
+            event_start = start + timedelta(days=i % 14, hours=i % 6)
+            items.append({
+                "id": f"{prefix}-{i}",
+                "status": "confirmed",
+                "summary": f"Busy {i}",
+                "description": "Agenda and notes.",
+                "htmlLink": f"https://www.google.com/calendar/event?eid={prefix}-{i}",
+                "conferenceData": {"entryPoints": [{"uri": "https://meet.google.com/abc-defg-hij"}]},
+                "reminders": {"useDefault": True},
+                "organizer": {"email": "advisor@example.com", "self": True},
+                "attendees": [{"email": f"guest-{n}@example.com", "responseStatus": "accepted"} for n in range(3)],
+                "start": {"dateTime": f"{event_start.isoformat()}Z"},
+                "end": {"dateTime": f"{(event_start + timedelta(minutes=45)).isoformat()}Z"},
+            })
+        return items + (pushed if calendar_id == "primary" else [])
+
+    def mask(items, fields):
+        """Apply the items(...) part of a `fields` parameter, one level deep."""
+        match = re.search(r"items\(([^)]*)\)", fields or "")
+        if not match:
+            return items
+        keep = set(match.group(1).split(","))
+        return [{key: value for key, value in item.items() if key in keep} for item in items]
+
+    @app.get("/calendar/v3/calendars/primary/events")
+    async def google_events(request: Request):
+        calls["google"] += 1
+        await asyncio.sleep(google_latency)
+        fields = request.query_params.get("fields")
+        if request.query_params.get("syncToken"):
+            # Incremental sync: only what was pushed (re-applying it is harmless)
+            return {"items": mask(pushed, fields), "nextSyncToken": f"sync-{time.time_ns()}"}
+        items = calendar_events()[:events_per_calendar]
+        return {"items": mask(items, fields), "nextSyncToken": f"sync-{time.time_ns()}"}
+
+    # Every account owns its primary calendar and a team calendar, and is subscribed to holidays
+    calendar_list = [
+        {"id": "primary", "accessRole": "owner"},
+        {"id": "team@group.calendar.google.com", "accessRole": "writer"},
+        {"id": "en.usa#holiday@group.v.calendar.google.com", "accessRole": "reader"},
+    ]
+    access_roles = ["freeBusyReader", "reader", "writer", "owner"]
+
+    @app.get("/calendar/v3/users/me/calendarList")
+    async def google_calendar_list(minAccessRole: str = "freeBusyReader"):
+        calls["google_calendar_list"] += 1
+        await asyncio.sleep(google_latency)
+        minimum = access_roles.index(minAccessRole)
+        return {"items": [{"id": c["id"]} for c in calendar_list if access_roles.index(c["accessRole"]) >= minimum]}
+
+    @app.post("/calendar/v3/freeBusy")
+    async def google_freebusy(body: dict):
+        calls["google_freebusy"] += 1
+        await asyncio.sleep(google_latency)
+        time_min, time_max = body["timeMin"], body["timeMax"]
+        calendars = {}
+        for item in body.get("items", []):
+            if item["id"] not in {c["id"] for c in calendar_list}:
+                calendars[item["id"]] = {"errors": [{"domain": "global", "reason": "notFound"}], "busy": []}
+                continue
+            # Like Google, overlapping events become one busy block
+            busy = []
+            for start, end in sorted((e["start"]["dateTime"], e["end"]["dateTime"]) for e in calendar_events(item["id"])
+                                     if e["start"]["dateTime"] < time_max and e["end"]["dateTime"] > time_min):
+                if busy and start <= busy[-1]["end"]:
+                    busy[-1]["end"] = max(busy[-1]["end"], end)
+                else:
+                    busy.append({"start": start, "end": end})
+            calendars[item["id"]] = {"busy": busy}
+        return {"kind": "calendar#freeBusy", "timeMin": time_min, "timeMax": time_max, "calendars": calendars}
+
+    async def refresh_token(service: str, latency: float, request: Request):
+        """A refresh_token grant; refresh tokens starting with "revoked" get invalid_grant."""
+        calls[f"{service}_token"] += 1
+        await asyncio.sleep(latency)
+        form = await request.form()
+        if form.get("grant_type") != "refresh_token" or str(form.get("refresh_token", "")).startswith("revoked"):
+            return JSONResponse({"error": "invalid_grant"}, status_code=400)
+        return {"access_token": f"{service}-{time.time_ns()}", "expires_in": token_lifetime, "token_type": "Bearer"}
+
+    @app.post("/google/token")
+    async def google_token(request: Request):
+        return await refresh_token("google", google_latency, request)
+
+    @app.post("/hubspot/oauth/v1/token")
+    async def hubspot_token(request: Request):
+        return await refresh_token("hubspot", hubspot_latency, request)
+
+    async def notify(channel: dict, state: str, number: int) -> int:
+        async with httpx.AsyncClient(timeout=10) as client:
+            response = await client.post(channel["address"], headers={
+                "X-Goog-Channel-ID": channel["id"],
+                "X-Goog-Channel-Token": channel.get("token", ""),
+                "X-Goog-Resource-ID": channel["resourceId"],
+                "X-Goog-Resource-State": state,
+                "X-Goog-Message-Number": str(number),
+            })
+        calls[f"push_{response.status_code}"] += 1
+        return response.status_code
+
+    @app.post("/calendar/v3/calendars/primary/events/watch")
+    async def google_watch(body: dict):
+        calls["google_watch"] += 1
+        await asyncio.sleep(google_latency)
+        ttl = int(body.get("params", {}).get("ttl", 604800))
+        channel = {**body, "resourceId": f"resource-{uuid.uuid4().hex[:12]}"}
+        channels[body["id"]] = channel
+        # Google confirms a new channel with a "sync" message
+        asyncio.get_running_loop().call_later(0.1, lambda: asyncio.ensure_future(notify(channel, "sync", 1)))
+        return {
+            "kind": "api#channel", "id": body["id"], "resourceId": channel["resourceId"],
+            "expiration": str(int((time.time() + ttl) * 1000)),
+        }
+
+    @app.post("/calendar/v3/channels/stop")
+    async def google_stop_channel(body: dict):
+        calls["google_watch_stop"] += 1
+        if channels.pop(body.get("id"), None) is None:
+            return JSONResponse({"error": {"code": 404}}, status_code=404)
+        return Response(status_code=204)
+
+    @app.post("/stub/calendar/push")
+    async def push(notifications: int = 1):
+        """Add an event, then send `notifications` change notifications to each open channel."""
+        start = datetime.utcnow().replace(minute=0, second=0, microsecond=0) + timedelta(days=1)
+        pushed.append({
+            "id": f"pushed-{len(pushed)}", "status": "confirmed", "summary": "Pushed",
+            "start": {"dateTime": f"{start.isoformat()}Z"},
+            "end": {"dateTime": f"{(start + timedelta(hours=1)).isoformat()}Z"},
+        })
+        statuses = await asyncio.gather(*(
+            notify(channel, "exists", n + 2) for channel in list(channels.values()) for n in range(notifications)))
+        return {"channels": len(channels), "statuses": dict(Counter(statuses))}
+
+    def contact_id(email: str) -> str:
+        return str(int(hashlib.sha1(email.encode()).hexdigest()[:8], 16))
+
+    @app.post("/hubspot/crm/v3/objects/contacts/batch/read")
+    async def hubspot_contacts(body: dict):
+        calls["hubspot"] += 1
+        await asyncio.sleep(hubspot_latency)
+        return {"status": "COMPLETE", "results": [
+            {"id": contact_id(item["id"]), "properties": {
+                "email": item["id"], "firstname": "Client", "lastname": "Example", "company": "Example Ltd"}}
+            for item in body.get("inputs", [])
+        ]}
+
+    @app.post("/hubspot/crm/v4/associations/contacts/notes/batch/read")
+    async def hubspot_associations(body: dict):
+        calls["hubspot"] += 1
+        await asyncio.sleep(hubspot_latency)
+        return {"status": "COMPLETE", "results": [
+            {"from": {"id": item["id"]}, "to": [{"toObjectId": f"{item['id']}{n}"} for n in range(3)]}
+            for item in body.get("inputs", [])
+        ]}
+
+    @app.post("/hubspot/crm/v3/objects/notes/batch/read")
+    async def hubspot_notes(body: dict):
+        calls["hubspot"] += 1
+        await asyncio.sleep(hubspot_latency)
+        return {"status": "COMPLETE", "results": [
+            {"id": item["id"], "properties": {"hs_note_body": f"<p>Call notes {item['id']}</p>"},
+             "createdAt": "2025-01-01T00:00:00Z"}
+            for item in body.get("inputs", [])
+        ]}
+
+    @app.post("/openai/v1/chat/completions")
+    async def openai_chat(body: dict):
+        calls["openai"] += 1
+        await asyncio.sleep(openai_latency)
+        return {
+            "id": f"chatcmpl-{time.time_ns()}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "gpt-4"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "Summary of the client's context."},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 100, "completion_tokens": 10, "total_tokens": 110},
+        }
+
+    @app.post("/otlp/v1/traces")
+    async def otlp_traces(body: dict):
+        calls["otlp_spans"] += sum(
+            len(scope["spans"]) for resource in body["resourceSpans"] for scope in resource["scopeSpans"])
+        return {}
+
+    return app
+
+
+class SMTPStub:
+    """Just enough SMTP for smtplib: EHLO, MAIL, RCPT, DATA, NOOP, RSET, QUIT."""
+
+    def __init__(self, latency: float, calls: Counter):
+        self.latency = latency
+        self.calls = calls
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        def reply(line: str):
+            writer.write(f"{line}\r\n".encode())
+
+        reply("220 stub ESMTP")
+        await writer.drain()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command = line.decode(errors="replace").strip().upper()
+                if command.startswith(("EHLO", "HELO")):
+                    reply("250-stub")
+                    reply("250 SIZE 10485760")
+                elif command.startswith(("MAIL", "RCPT", "RSET", "NOOP")):
+                    reply("250 OK")
+                elif command == "DATA":
+                    reply("354 End data with <CR><LF>.<CR><LF>")
+                    await writer.drain()
+                    while (await reader.readline()) not in (b".\r\n", b".\n", b""):
+                        pass
+                    await asyncio.sleep(self.latency)
+                    self.calls["smtp"] += 1
+                    reply("250 OK queued")
+                elif command == "QUIT":
+                    reply("221 Bye")
+                    await writer.drain()
+                    break
+                else:
+                    reply("502 Command not implemented")
+                await writer.drain()
+        finally:
+            writer.close()
+
+
+async def serve(args):
+    calls = Counter()
+    app = build_app(
+        args.google_latency_ms / 1000, args.hubspot_latency_ms / 1000,
+        args.openai_latency_ms / 1000, args.events_per_calendar, calls)
+    smtp = SMTPStub(args.smtp_latency_ms / 1000, calls)
+    smtp_server = await asyncio.start_server(smtp.handle, "127.0.0.1", args.smtp_port)
+    http_server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=args.http_port, log_level="warning"))
+    async with smtp_server:
+        await http_server.serve()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--http-port", type=int, default=9100)
+    parser.add_argument("--smtp-port", type=int, default=9125)
+    parser.add_argument("--google-latency-ms", type=float, default=80)
+    parser.add_argument("--hubspot-latency-ms", type=float, default=120)
+    parser.add_argument("--openai-latency-ms", type=float, default=800)
+    parser.add_argument("--smtp-latency-ms", type=float, default=50)
+    parser.add_argument("--events-per-calendar", type=int, default=40)
+    asyncio.run(serve(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from typing import Any, Dict, List, Optional
+
+from openai import AsyncOpenAI
+
+from core.config import (
+    AI_CACHE_DIR,
+    AI_CACHE_ENABLED,
+    OPENAI_API_KEY,
+    OPENAI_BASE_URL,
+    OPENAI_MAX_CONCURRENCY,
+    OPENAI_TIMEOUT_SECONDS,
+)
+from core.metrics import OPENAI, record_cache_lookup, timed_call
+from core.tracing import set_attribute, traced
+
+logger = logging.getLogger(__name__)
+
+_client: Optional[AsyncOpenAI] = None
+_semaphore: Optional[asyncio.Semaphore] = None
+
+
+def get_openai_client() -> AsyncOpenAI:
+    global _client
+    if _client is None:
+        _client = AsyncOpenAI(
+            api_key=OPENAI_API_KEY,
+            base_url=OPENAI_BASE_URL or None,
+            timeout=OPENAI_TIMEOUT_SECONDS,
+        )
+    return _client
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    # Created lazily so it binds to the running event loop
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(OPENAI_MAX_CONCURRENCY)
+    return _semaphore
+
+
+def cache_key(model: str, messages: List[Dict[str, str]], params: Dict[str, Any]) -> str:
+    """Content address of a completion request: sha256 of model, prompt and parameters."""
+    material = json.dumps(
+        {"model": model, "messages": messages, "params": params},
+        sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def _cache_path(key: str) -> str:
+    return os.path.join(AI_CACHE_DIR, key[:2], f"{key}.json")
+
+
+def _read_cache(key: str) -> Optional[str]:
+    try:
+        with open(_cache_path(key), encoding="utf-8") as f:
+            return json.load(f)["content"]
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning(f"Ignoring unreadable AI cache entry {key}: {e}")
+        return None
+
+
+def _write_cache(key: str, content: str):
+    path = _cache_path(key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write to a temp file and rename so readers never see a partial entry
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"content": content}, f)
+        os.replace(tmp_path, path)
+    except OSError:
+        os.unlink(tmp_path)
+        raise
+
+
+@traced("openai.chat_completion")
+async def chat_completion(
+    messages: List[Dict[str, str]],
+    model: str = "gpt-4",
+    max_tokens: Optional[int] = None,
+    temperature: Optional[float] = None,
+    timeout: float = OPENAI_TIMEOUT_SECONDS,
+) -> str:
+    """
+    Return the stripped content of a chat completion.
+
+    Identical requests are answered from the on-disk cache. Calls to OpenAI
+    are limited to OPENAI_MAX_CONCURRENCY at a time and bounded by `timeout`
+    seconds; errors and timeouts propagate to the caller.
+    """
+    params = {"max_tokens": max_tokens, "temperature": temperature}
+    key = cache_key(model, messages, params)
+    if AI_CACHE_ENABLED:
+        cached = await asyncio.to_thread(_read_cache, key)
+        record_cache_lookup("ai", cached is not None)
+        if cached is not None:
+            set_attribute("cache_hit", True)
+            return cached
+
+    async with _get_semaphore():
+        with timed_call(OPENAI):
+            response = await asyncio.wait_for(
+                get_openai_client().chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    **{k: v for k, v in params.items() if v is not None},
+                ),
+                timeout=timeout,
+            )
+    content = response.choices[0].message.content.strip()
+
+    if AI_CACHE_ENABLED:
+        try:
+            await asyncio.to_thread(_write_cache, key, content)
+        except OSError as e:
+            logger.warning(f"Could not write AI cache entry {key}: {e}")
+    return content
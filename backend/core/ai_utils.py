@@ -1,18 +1,15 @@
-from openai import OpenAI
 import logging
 from typing import Optional, Dict, Any
-from core.config import OPENAI_API_KEY
+from core.ai_gateway import chat_completion
+from core.tracing import traced
 from bs4 import BeautifulSoup
 
 logger = logging.getLogger(__name__)
 
-client = OpenAI(
-    api_key=OPENAI_API_KEY,
-)
-
 def strip_html(text: str) -> str:
     return BeautifulSoup(text, "html.parser").get_text(separator=" ", strip=True)
 
+@traced("ai.generate_linkedin_summary")
 async def generate_linkedin_summary(profile_data: Dict[str, Any]) -> Optional[str]:
     """
     Use OpenAI to generate a summary of LinkedIn profile data.
@@ -78,7 +75,7 @@ async def generate_linkedin_summary(profile_data: Dict[str, Any]) -> Optional[st
             background relevant. Keep the summary concise but informative (max 200 words).
             """
 
-        response = client.chat.completions.create(
+        summary = await chat_completion(
             model="gpt-4",
             messages=[
                 {"role": "system", "content": "You are a professional assistant that summarizes LinkedIn profiles concisely and accurately."},
@@ -87,13 +84,13 @@ async def generate_linkedin_summary(profile_data: Dict[str, Any]) -> Optional[st
             max_tokens=500,
             temperature=0.7
         )
-        summary = response.choices[0].message.content.strip()
         return summary
         
     except Exception as e:
         logger.error(f"Error generating LinkedIn summary: {e}")
         return None 
 
+@traced("ai.augment_answers_with_notes")
 async def augment_answers_with_notes(answers, notes) -> Optional[str]:
     """
     Use OpenAI to augment client answers with relevant context from previous notes.
@@ -107,7 +104,7 @@ async def augment_answers_with_notes(answers, notes) -> Optional[str]:
         return None
     # Clean HTML from notes
     cleaned_notes = [strip_html(note) for note in notes]
-    print(f"Cleaned notes: {cleaned_notes}")
+    logger.debug(f"Augmenting {len(answers)} answers with {len(cleaned_notes)} notes")
     try:
         prompt = (
             "Given the following client answers and previous notes, augment the answers with relevant context from the notes. "
@@ -116,7 +113,7 @@ async def augment_answers_with_notes(answers, notes) -> Optional[str]:
             f"Previous Notes:\n" + "\n".join(cleaned_notes) + "\n\n" +
             "Augmented Notes:"
         )
-        response = client.chat.completions.create(
+        return await chat_completion(
             model="gpt-4",
             messages=[
                 {"role": "system", "content": "You are a helpful assistant that augments client answers with relevant context from previous notes."},
@@ -125,7 +122,6 @@ async def augment_answers_with_notes(answers, notes) -> Optional[str]:
             max_tokens=300,
             temperature=0.5
         )
-        return response.choices[0].message.content.strip()
     except Exception as e:
         logger.error(f"Error generating augmented notes: {e}")
         return None 
\ No newline at end of file
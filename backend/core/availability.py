@@ -0,0 +1,139 @@
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# A half-open [start, end) interval of naive UTC datetimes.
+Interval = Tuple[datetime, datetime]
+
+
+def to_naive_utc(value: datetime) -> datetime:
+    """Normalize a datetime to naive UTC, which is how the database stores it."""
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def merge_intervals(intervals: Iterable[Interval]) -> List[Interval]:
+    """
+    Sort intervals and merge the ones that overlap or touch.
+    Empty and inverted intervals are dropped.
+    """
+    merged: List[Interval] = []
+    for start, end in sorted(i for i in intervals if i[0] < i[1]):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def subtract_intervals(
+    base: Sequence[Interval], remove: Sequence[Interval]
+) -> List[Interval]:
+    """
+    Remove every interval in `remove` from `base`.
+    Both inputs must already be sorted and merged; the sweep is linear.
+    """
+    result: List[Interval] = []
+    j = 0
+    for start, end in base:
+        # Skip removals that end before this interval starts
+        while j < len(remove) and remove[j][1] <= start:
+            j += 1
+        cursor = start
+        k = j
+        while k < len(remove) and remove[k][0] < end:
+            r_start, r_end = remove[k]
+            if r_start > cursor:
+                result.append((cursor, r_start))
+            if r_end > cursor:
+                cursor = r_end
+            if cursor >= end:
+                break
+            k += 1
+        if cursor < end:
+            result.append((cursor, end))
+    return result
+
+
+def expand_weekly_windows(
+    windows: Iterable[Tuple[int, time, time]], first_day: date, last_day: date
+) -> List[Interval]:
+    """
+    Turn (weekday, start_time, end_time) rules into concrete intervals
+    for every day between first_day and last_day inclusive.
+    """
+    by_weekday: Dict[int, List[Tuple[time, time]]] = {}
+    for weekday, start_time, end_time in windows:
+        if start_time < end_time:
+            by_weekday.setdefault(weekday, []).append((start_time, end_time))
+
+    intervals: List[Interval] = []
+    day = first_day
+    while day <= last_day:
+        for start_time, end_time in by_weekday.get(day.weekday(), ()):
+            intervals.append(
+                (datetime.combine(day, start_time), datetime.combine(day, end_time)))
+        day += timedelta(days=1)
+    return merge_intervals(intervals)
+
+
+def slots_in_free_intervals(
+    windows: Sequence[Interval],
+    free: Sequence[Interval],
+    meeting_length: int,
+    not_before: Optional[datetime] = None,
+) -> Dict[str, List[str]]:
+    """
+    Lay a grid of meeting_length slots over each window (anchored at the
+    window start) and keep the slots that fit entirely inside a free interval.
+    Returns {"YYYY-MM-DD": ["HH:MM", ...]} in chronological order.
+    """
+    step = timedelta(minutes=meeting_length)
+    slots: Dict[str, List[str]] = {}
+    j = 0
+    for w_start, w_end in windows:
+        t = w_start
+        while t + step <= w_end:
+            slot_end = t + step
+            while j < len(free) and free[j][1] < slot_end:
+                j += 1
+            if j == len(free):
+                return slots
+            if free[j][0] <= t and (not_before is None or t >= not_before):
+                slots.setdefault(t.date().isoformat(), []).append(t.strftime('%H:%M'))
+            t = slot_end
+    return slots
+
+
+def compute_available_slots(
+    windows: Iterable[Tuple[int, time, time]],
+    busy: Iterable[Interval],
+    meeting_length: int,
+    first_day: date,
+    days: int,
+    now: Optional[datetime] = None,
+) -> Dict[str, List[str]]:
+    """
+    Compute bookable slots over a horizon of `days` days after first_day.
+
+    windows: the advisor's weekly (weekday, start_time, end_time) rules.
+    busy: booked meetings and external busy blocks, in any order.
+    """
+    if meeting_length <= 0 or days < 0:
+        return {}
+    window_intervals = expand_weekly_windows(
+        windows, first_day, first_day + timedelta(days=days))
+    free = subtract_intervals(
+        window_intervals, merge_intervals(to_naive_utc_interval(i) for i in busy))
+    return slots_in_free_intervals(window_intervals, free, meeting_length, now)
+
+
+def to_naive_utc_interval(interval: Interval) -> Interval:
+    return to_naive_utc(interval[0]), to_naive_utc(interval[1])
+
+
+def horizon_bounds(first_day: date, days: int) -> Interval:
+    """The [start, end) datetime range covered by a scheduling horizon."""
+    start = datetime.combine(first_day, time.min)
+    return start, start + timedelta(days=days + 1)
@@ -0,0 +1,93 @@
+from typing import Any, Dict
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.ai_utils import generate_linkedin_summary, augment_answers_with_notes
+from core.config import LINKEDIN_SCRAPING_ENABLED
+from core.hubspot_utils import get_connection_contact_with_notes
+from core.jobs import job_handler
+from core.linkedin_utils import is_valid_linkedin_url, scrape_linkedin_profile
+from core.outbox import enqueue_email
+from crud.hubspot import get_hubspot_connection_by_user_id
+from crud.meeting import get_meeting_by_id
+from crud.scheduling_link import get_scheduling_link_by_link_id
+from crud.user import get_user_by_id
+
+ENRICH_MEETING = "enrich_meeting"
+
+
+@job_handler(ENRICH_MEETING)
+async def enrich_meeting(db: AsyncSession, payload: Dict[str, Any]):
+    """
+    Look the client up in HubSpot and LinkedIn, fill in the meeting's
+    linkedin_summary and augmented_notes, then queue the advisor's email.
+    """
+    meeting = await get_meeting_by_id(db, payload["meeting_id"])
+    if not meeting:
+        return
+    link = await get_scheduling_link_by_link_id(db, meeting.link_id)
+
+    # Initialize variables for contact information
+    linkedin_summary = None
+    linkedin_info_str = ""
+    contact_info_str = ""
+
+    # Try to enrich with HubSpot contact details and notes
+    hubspot_conn = await get_hubspot_connection_by_user_id(db, meeting.advisor_id)
+    contact_details = None
+    contact_notes = []
+    if hubspot_conn and (hubspot_conn.access_token or hubspot_conn.refresh_token):
+        contact_details = await get_connection_contact_with_notes(hubspot_conn, meeting.client_email)
+        if contact_details:
+            contact_info_str = "\n".join(f"{k}: {v}" for k, v in contact_details.items() if v and k != "notes")
+            contact_notes = [n["content"] for n in contact_details.get("notes", []) if n.get("content")]
+
+    # Process LinkedIn data if available and no detailed contact
+    if meeting.client_linkedin and LINKEDIN_SCRAPING_ENABLED:
+        if not contact_details or len(contact_details) < 3:
+            if is_valid_linkedin_url(meeting.client_linkedin):
+                profile_data = await scrape_linkedin_profile(meeting.client_linkedin)
+                if profile_data:
+                    linkedin_summary = await generate_linkedin_summary(profile_data)
+                    if linkedin_summary:
+                        linkedin_info_str = f"\n\nLinkedIn Profile Summary:\n{linkedin_summary}"
+
+    # Choose context for augmentation: HubSpot notes if available, else LinkedIn summary
+    context_for_augmentation = None
+    if contact_notes:
+        context_for_augmentation = contact_notes
+    elif linkedin_summary:
+        context_for_augmentation = [linkedin_summary]
+
+    augmented_notes = None
+    if meeting.answers and context_for_augmentation:
+        augmented_notes = await augment_answers_with_notes(meeting.answers, context_for_augmentation)
+
+    meeting.linkedin_summary = linkedin_summary
+    meeting.augmented_notes = augmented_notes
+
+    # Send email to advisor
+    advisor = await get_user_by_id(db, meeting.advisor_id)
+    if advisor:
+        subject = f"New Meeting Booking from: {meeting.client_email}"
+        answers_str = "\n".join(
+            f"{q}: {a}" for q, a in zip((link.questions if link else None) or [], meeting.answers or [])
+        )
+        body = (
+            f"You have a new meeting booking!\n"
+            f"Client Email: {meeting.client_email}\n"
+            f"Scheduled Time: {meeting.start_time.strftime('%Y-%m-%d %H:%M')}\n"
+            f"Answers to Questions:\n{answers_str}"
+        )
+
+        if contact_info_str:
+            body += f"\n\nHubSpot Contact Details:\n{contact_info_str}"
+
+        if augmented_notes:
+            body += f"\n\nAugmented Notes:\n{augmented_notes}"
+
+        if linkedin_info_str:
+            body += linkedin_info_str
+        # Committed together with this job's completion, so a retry of the
+        # enrichment never queues a second email.
+        enqueue_email(db, advisor.email, subject, body)
@@ -0,0 +1,172 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import (
+    GOOGLE_SYNC_CONCURRENCY,
+    GOOGLE_SYNC_LOOKBACK_DAYS,
+    GOOGLE_SYNC_TIMEOUT_SECONDS,
+)
+from core.database import AsyncSessionLocal
+from core.google_calendar import PRIMARY_EVENTS_URL, parse_event_time
+from crud.calendar_event import (
+    apply_calendar_event_changes,
+    clear_calendar_events,
+    get_sync_tokens,
+    save_sync_state,
+)
+
+logger = logging.getLogger(__name__)
+
+# Only what the store and the /events page use; Google's page size maximum
+EVENT_FIELDS = "nextPageToken,nextSyncToken,items(id,status,transparency,summary,description,start,end)"
+EVENTS_PAGE_SIZE = 2500
+
+
+class FullResyncRequired(Exception):
+    """Google answered 410 Gone: the sync token is no longer valid."""
+
+
+def event_to_change(event: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "event_id": event["id"],
+        "status": event.get("status"),
+        "transparency": event.get("transparency"),
+        "start_time": parse_event_time(event.get("start")),
+        "end_time": parse_event_time(event.get("end")),
+        "data": event,
+    }
+
+
+async def fetch_event_changes(
+    client: httpx.AsyncClient,
+    access_token: str,
+    sync_token: Optional[str] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Fetch every page of events from the primary calendar, recurring events
+    expanded into their instances and trimmed to EVENT_FIELDS.
+
+    Without a sync_token this is a full sync starting GOOGLE_SYNC_LOOKBACK_DAYS
+    in the past; with one, only events changed since that token are returned
+    (including cancelled ones). Returns (events, next_sync_token).
+    """
+    headers = {"Authorization": f"Bearer {access_token}"}
+    params: Dict[str, Any] = {"singleEvents": "true", "maxResults": EVENTS_PAGE_SIZE, "fields": EVENT_FIELDS}
+    if sync_token:
+        params["syncToken"] = sync_token
+    else:
+        time_min = datetime.utcnow() - timedelta(days=GOOGLE_SYNC_LOOKBACK_DAYS)
+        params["timeMin"] = f"{time_min.isoformat()}Z"
+
+    events: List[Dict[str, Any]] = []
+    while True:
+        response = await client.get(PRIMARY_EVENTS_URL, headers=headers, params=params)
+        if response.status_code == 410:
+            raise FullResyncRequired()
+        response.raise_for_status()
+        data = response.json()
+        events.extend(data.get("items", []))
+        page_token = data.get("nextPageToken")
+        if not page_token:
+            return events, data.get("nextSyncToken")
+        params["pageToken"] = page_token
+
+
+async def store_event_changes(
+    db: AsyncSession,
+    account_id: int,
+    events: List[Dict[str, Any]],
+    next_sync_token: Optional[str],
+    full_sync: bool,
+):
+    """Write fetched events and the new sync token in one transaction."""
+    if full_sync:
+        await clear_calendar_events(db, account_id)
+    await apply_calendar_event_changes(db, account_id, [event_to_change(e) for e in events])
+    await save_sync_state(db, account_id, next_sync_token, full_sync=full_sync)
+    await db.commit()
+
+
+async def fetch_account_changes(
+    client: httpx.AsyncClient,
+    access_token: str,
+    sync_token: Optional[str],
+) -> Tuple[List[Dict[str, Any]], Optional[str], bool]:
+    """
+    Fetch the changes for one account: a full sync when there is no token
+    (or Google invalidated it), deltas otherwise.
+    Returns (events, next_sync_token, full_sync).
+    """
+    if sync_token:
+        try:
+            events, next_sync_token = await fetch_event_changes(client, access_token, sync_token)
+            return events, next_sync_token, False
+        except FullResyncRequired:
+            logger.info("Sync token expired, running full sync")
+    events, next_sync_token = await fetch_event_changes(client, access_token)
+    return events, next_sync_token, True
+
+
+async def sync_accounts_events(
+    client: httpx.AsyncClient,
+    tokens: Dict[int, str],
+    concurrency: int = GOOGLE_SYNC_CONCURRENCY,
+    timeout: float = GOOGLE_SYNC_TIMEOUT_SECONDS,
+) -> Dict[int, str]:
+    """
+    Sync several accounts, given as {account_id: access_token}.
+
+    The Google requests run concurrently, at most `concurrency` at a time and
+    each bounded by `timeout` seconds, so the total wait is roughly the
+    slowest account. Results are written to the store one account at a time,
+    in a session of its own so a failed write never rolls back (and expires)
+    the caller's objects. Returns {account_id: error message} for the
+    accounts that failed.
+    """
+    async with AsyncSessionLocal() as db:
+        return await _sync_accounts_events(db, client, tokens, concurrency, timeout)
+
+
+async def _sync_accounts_events(
+    db: AsyncSession,
+    client: httpx.AsyncClient,
+    tokens: Dict[int, str],
+    concurrency: int,
+    timeout: float,
+) -> Dict[int, str]:
+    sync_tokens = await get_sync_tokens(db, list(tokens))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(account_id: int):
+        async with semaphore:
+            return await asyncio.wait_for(
+                fetch_account_changes(client, tokens[account_id], sync_tokens.get(account_id)),
+                timeout=timeout,
+            )
+
+    account_ids = list(tokens)
+    results = await asyncio.gather(
+        *(fetch(account_id) for account_id in account_ids), return_exceptions=True)
+
+    errors: Dict[int, str] = {}
+    for account_id, result in zip(account_ids, results):
+        if isinstance(result, asyncio.TimeoutError):
+            errors[account_id] = f"Timed out after {timeout:g}s"
+        elif isinstance(result, httpx.HTTPStatusError):
+            errors[account_id] = f"Google returned {result.response.status_code}"
+        elif isinstance(result, Exception):
+            errors[account_id] = str(result) or type(result).__name__
+        else:
+            try:
+                await store_event_changes(db, account_id, *result)
+            except Exception as e:
+                await db.rollback()
+                errors[account_id] = str(e)
+    for account_id, error in errors.items():
+        logger.warning(f"Error syncing calendar events for account {account_id}: {error}")
+    return errors
@@ -0,0 +1,234 @@
+"""
+Google Calendar push notifications.
+
+With GOOGLE_WEBHOOK_URL set, the primary calendar of every connected account
+is watched (events.watch) and Google posts to that URL whenever it changes.
+A notification queues a delta sync of that one account, which drops the
+advisor's cached slots if busy time changed, and drops the account's cached
+free/busy (core.freebusy); notifications arriving within
+GOOGLE_WATCH_DEBOUNCE_SECONDS of each other share one sync. Public pages
+then poll watched accounts only every GOOGLE_WATCHED_SYNC_INTERVAL_SECONDS,
+in case a notification is lost.
+
+Channels expire; WatchRenewer opens a new one GOOGLE_WATCH_RENEW_BEFORE_SECONDS
+before that happens and stops the old one.
+"""
+import asyncio
+import logging
+import secrets
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.calendar_sync import sync_accounts_events
+from core.config import (
+    GOOGLE_CALENDAR_API_URL,
+    GOOGLE_SYNC_CONCURRENCY,
+    GOOGLE_WATCH_CHECK_INTERVAL_SECONDS,
+    GOOGLE_WATCH_DEBOUNCE_SECONDS,
+    GOOGLE_WATCH_RENEW_BEFORE_SECONDS,
+    GOOGLE_WATCH_TTL_SECONDS,
+    GOOGLE_WEBHOOK_URL,
+)
+from core.credentials import credentials
+from core.database import AsyncSessionLocal
+from core.freebusy import forget_account_busy
+from core.google_calendar import PRIMARY_EVENTS_URL
+from core.http_client import GOOGLE, get_http_client
+from core.jobs import enqueue_job_unless_pending, job_handler
+from core.metrics import Counter
+from crud.calendar_watch import (
+    create_watch_channel,
+    delete_watch_channel,
+    get_account_watch_channels,
+    get_accounts_needing_watch,
+    get_watch_channel,
+)
+from db.models import CalendarWatchChannel, ConnectedGoogleAccount
+
+logger = logging.getLogger(__name__)
+
+SYNC_CALENDAR = "sync_calendar"
+WATCH_URL = f"{PRIMARY_EVENTS_URL}/watch"
+STOP_URL = f"{GOOGLE_CALENDAR_API_URL}/channels/stop"
+
+push_notifications = Counter(
+    "google_push_notifications_total", "Calendar push notifications received, by outcome.", ("outcome",))
+
+# One sync per account at a time: a second one waits and then fetches just
+# the changes since the first, instead of racing it to insert the same events
+_account_locks: Dict[int, asyncio.Lock] = {}
+
+
+@job_handler(SYNC_CALENDAR)
+async def sync_calendar(db: AsyncSession, payload: Dict[str, Any]):
+    """Delta-sync one account's events after a push notification."""
+    account = await db.get(ConnectedGoogleAccount, payload["account_id"])
+    if not account:
+        return
+    # Page views ask FreeBusy again rather than wait out the cached busy time
+    forget_account_busy(account.id)
+    access_token = await credentials.google_token(account)
+    async with _account_locks.setdefault(account.id, asyncio.Lock()):
+        errors = await sync_accounts_events(get_http_client(GOOGLE), {account.id: access_token})
+    if errors:
+        raise RuntimeError(errors[account.id])
+
+
+async def queue_account_sync(db: AsyncSession, account_id: int) -> bool:
+    """
+    Queue a sync of the account shortly from now, unless one is already
+    waiting (it will see these changes too). The caller commits.
+    """
+    return await enqueue_job_unless_pending(
+        db, SYNC_CALENDAR, {"account_id": account_id}, "account_id",
+        run_at=datetime.utcnow() + timedelta(seconds=GOOGLE_WATCH_DEBOUNCE_SECONDS))
+
+
+async def handle_notification(db: AsyncSession, channel_id: str, token: Optional[str],
+                              resource_id: Optional[str], state: Optional[str]) -> str:
+    """
+    Act on one notification, given its X-Goog-* headers. Returns the outcome:
+    "unknown_channel", "rejected" (token or resource mismatch), "sync" (the
+    handshake sent when a channel opens), "queued" or "coalesced".
+    """
+    channel = await get_watch_channel(db, channel_id)
+    if channel is None:
+        outcome = "unknown_channel"
+    elif not secrets.compare_digest(channel.token or "", token or "") or channel.resource_id != resource_id:
+        outcome = "rejected"
+    elif state == "sync":
+        outcome = "sync"
+    else:
+        # Notifications come in bursts; all but the first find its sync waiting
+        queued = await queue_account_sync(db, channel.account_id)
+        await db.commit()
+        outcome = "queued" if queued else "coalesced"
+    push_notifications.inc(outcome)
+    return outcome
+
+
+async def start_watch(client: httpx.AsyncClient, access_token: str) -> Tuple[str, str, str, datetime]:
+    """Open a channel on the primary calendar. Returns (channel id, resource id, token, expiration)."""
+    channel_id, token = uuid.uuid4().hex, secrets.token_urlsafe(24)
+    response = await client.post(WATCH_URL, headers={"Authorization": f"Bearer {access_token}"}, json={
+        "id": channel_id,
+        "type": "web_hook",
+        "address": GOOGLE_WEBHOOK_URL,
+        "token": token,
+        "params": {"ttl": str(GOOGLE_WATCH_TTL_SECONDS)},
+    })
+    response.raise_for_status()
+    data = response.json()
+    if data.get("expiration"):
+        # Milliseconds since the epoch
+        expiration = datetime.utcfromtimestamp(int(data["expiration"]) / 1000)
+    else:
+        expiration = datetime.utcnow() + timedelta(seconds=GOOGLE_WATCH_TTL_SECONDS)
+    return channel_id, data["resourceId"], token, expiration
+
+
+async def stop_watch(client: httpx.AsyncClient, channel: CalendarWatchChannel, access_token: str):
+    """Stop a channel; one Google no longer knows (expired) counts as stopped."""
+    response = await client.post(STOP_URL, headers={"Authorization": f"Bearer {access_token}"}, json={
+        "id": channel.channel_id,
+        "resourceId": channel.resource_id,
+    })
+    if response.status_code != 404:
+        response.raise_for_status()
+
+
+class WatchRenewer:
+    """
+    Keeps one live channel per connected account: opens channels for new
+    accounts and replaces those close to expiry. Checks every `interval`
+    seconds, or straight away when notified of a new account.
+    """
+
+    def __init__(self, interval: float = GOOGLE_WATCH_CHECK_INTERVAL_SECONDS):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def notify(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def start(self):
+        if GOOGLE_WEBHOOK_URL and self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        self._wakeup = None
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            try:
+                renewed = await self.renew_due()
+                if renewed:
+                    logger.info(f"Opened {renewed} calendar watch channels")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Calendar watch renewal error: {e}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def renew_due(self) -> int:
+        """Open channels for the accounts that need one. Returns how many were opened."""
+        now = datetime.utcnow()
+        async with AsyncSessionLocal() as db:
+            accounts = await get_accounts_needing_watch(
+                db, now + timedelta(seconds=GOOGLE_WATCH_RENEW_BEFORE_SECONDS))
+        if not accounts:
+            return 0
+        tokens, _ = await credentials.google_tokens(accounts)
+        semaphore = asyncio.Semaphore(GOOGLE_SYNC_CONCURRENCY)
+
+        async def renew(account_id: int, access_token: str) -> bool:
+            async with semaphore:
+                return await self._renew(account_id, access_token)
+
+        results = await asyncio.gather(*(renew(account_id, token) for account_id, token in tokens.items()))
+        return sum(results)
+
+    async def _renew(self, account_id: int, access_token: str) -> bool:
+        client = get_http_client(GOOGLE)
+        async with AsyncSessionLocal() as db:
+            old_channels = await get_account_watch_channels(db, account_id)
+        try:
+            channel_id, resource_id, token, expiration = await start_watch(client, access_token)
+        except (httpx.HTTPError, KeyError, ValueError) as e:
+            logger.warning(f"Could not watch the calendar of account {account_id}: {e}")
+            return False
+        for channel in old_channels:
+            try:
+                await stop_watch(client, channel, access_token)
+            except httpx.HTTPError as e:
+                # It expires on its own; until then its notifications are harmless
+                logger.warning(f"Could not stop watch channel {channel.channel_id}: {e}")
+
+        now = datetime.utcnow()
+        async with AsyncSessionLocal() as db:
+            create_watch_channel(db, account_id, channel_id, resource_id, token, expiration)
+            for channel in old_channels:
+                await delete_watch_channel(db, channel.channel_id)
+            # Changes made while nothing was watching were never pushed
+            if not any(channel.expiration and channel.expiration > now for channel in old_channels):
+                await queue_account_sync(db, account_id)
+            await db.commit()
+        return True
+
+
+watch_renewer = WatchRenewer()
@@ -18,4 +18,88 @@ SMTP_PASS = os.getenv("SMTP_PASS")
 EMAIL_FROM = os.getenv("EMAIL_FROM")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 LINKEDIN_SCRAPING_ENABLED = os.getenv("LINKEDIN_SCRAPING_ENABLED", "false").lower() == "true"
-ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", "http://localhost:3000,https://calendar-scheduling-tool.fly.dev").split(",")
\ No newline at end of file
+ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", "http://localhost:3000,https://calendar-scheduling-tool.fly.dev").split(",")
+GOOGLE_CALENDAR_API_URL = os.getenv("GOOGLE_CALENDAR_API_URL", "https://www.googleapis.com/calendar/v3")
+GOOGLE_SYNC_LOOKBACK_DAYS = int(os.getenv("GOOGLE_SYNC_LOOKBACK_DAYS", "30"))
+GOOGLE_SYNC_CONCURRENCY = int(os.getenv("GOOGLE_SYNC_CONCURRENCY", "4"))
+GOOGLE_SYNC_TIMEOUT_SECONDS = float(os.getenv("GOOGLE_SYNC_TIMEOUT_SECONDS", "10"))
+HTTP_MAX_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", "20"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "10"))
+HTTP_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("HTTP_KEEPALIVE_EXPIRY_SECONDS", "30"))
+HTTP_TIMEOUT_SECONDS = float(os.getenv("HTTP_TIMEOUT_SECONDS", "10"))
+HTTP_CONNECT_TIMEOUT_SECONDS = float(os.getenv("HTTP_CONNECT_TIMEOUT_SECONDS", "5"))
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "false").lower() == "true"
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_BACKOFF_SECONDS = float(os.getenv("JOB_BACKOFF_SECONDS", "10"))
+JOB_BACKOFF_MAX_SECONDS = float(os.getenv("JOB_BACKOFF_MAX_SECONDS", "600"))
+JOB_POLL_INTERVAL_SECONDS = float(os.getenv("JOB_POLL_INTERVAL_SECONDS", "2"))
+JOB_TIMEOUT_SECONDS = float(os.getenv("JOB_TIMEOUT_SECONDS", "120"))
+JOB_STALE_MARGIN_SECONDS = float(os.getenv("JOB_STALE_MARGIN_SECONDS", "60"))
+HUBSPOT_API_URL = os.getenv("HUBSPOT_API_URL", "https://api.hubapi.com")
+HUBSPOT_CACHE_SIZE = int(os.getenv("HUBSPOT_CACHE_SIZE", "5000"))
+HUBSPOT_CACHE_TTL_SECONDS = float(os.getenv("HUBSPOT_CACHE_TTL_SECONDS", "900"))
+HUBSPOT_NEGATIVE_CACHE_TTL_SECONDS = float(os.getenv("HUBSPOT_NEGATIVE_CACHE_TTL_SECONDS", "120"))
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL")
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "4"))
+OPENAI_TIMEOUT_SECONDS = float(os.getenv("OPENAI_TIMEOUT_SECONDS", "60"))
+AI_CACHE_ENABLED = os.getenv("AI_CACHE_ENABLED", "true").lower() == "true"
+AI_CACHE_DIR = os.getenv("AI_CACHE_DIR", "./ai_cache")
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "true").lower() == "true"
+SMTP_TIMEOUT_SECONDS = float(os.getenv("SMTP_TIMEOUT_SECONDS", "30"))
+SMTP_IDLE_TIMEOUT_SECONDS = float(os.getenv("SMTP_IDLE_TIMEOUT_SECONDS", "60"))
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "20"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+OUTBOX_RETRY_SECONDS = float(os.getenv("OUTBOX_RETRY_SECONDS", "30"))
+OUTBOX_RETRY_MAX_SECONDS = float(os.getenv("OUTBOX_RETRY_MAX_SECONDS", "3600"))
+OUTBOX_POLL_INTERVAL_SECONDS = float(os.getenv("OUTBOX_POLL_INTERVAL_SECONDS", "2"))
+# A batch sends at most OUTBOX_BATCH_SIZE messages, each bounded by SMTP_TIMEOUT_SECONDS
+OUTBOX_STALE_SECONDS = float(os.getenv("OUTBOX_STALE_SECONDS", str(SMTP_TIMEOUT_SECONDS * (OUTBOX_BATCH_SIZE + 1))))
+SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", "10000"))
+SESSION_CACHE_TTL_SECONDS = float(os.getenv("SESSION_CACHE_TTL_SECONDS", "300"))
+MEETINGS_PAGE_SIZE = int(os.getenv("MEETINGS_PAGE_SIZE", "50"))
+MEETINGS_PAGE_SIZE_MAX = int(os.getenv("MEETINGS_PAGE_SIZE_MAX", "200"))
+PUBLIC_LINKS_PAGE_SIZE = int(os.getenv("PUBLIC_LINKS_PAGE_SIZE", "50"))
+PUBLIC_LINKS_PAGE_SIZE_MAX = int(os.getenv("PUBLIC_LINKS_PAGE_SIZE_MAX", "200"))
+PUBLIC_LINKS_CACHE_SIZE = int(os.getenv("PUBLIC_LINKS_CACHE_SIZE", "256"))
+PUBLIC_LINKS_CACHE_TTL_SECONDS = float(os.getenv("PUBLIC_LINKS_CACHE_TTL_SECONDS", "60"))
+SLOT_CACHE_SIZE = int(os.getenv("SLOT_CACHE_SIZE", "20000"))
+SLOT_CACHE_TTL_SECONDS = float(os.getenv("SLOT_CACHE_TTL_SECONDS", "600"))
+GOOGLE_SYNC_MIN_INTERVAL_SECONDS = float(os.getenv("GOOGLE_SYNC_MIN_INTERVAL_SECONDS", "30"))
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./app.db")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", "10"))
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+EVENT_LOOP_LAG_INTERVAL_SECONDS = float(os.getenv("EVENT_LOOP_LAG_INTERVAL_SECONDS", "0.5"))
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() == "true"
+TRACE_BUFFER_SIZE = int(os.getenv("TRACE_BUFFER_SIZE", "500"))
+TRACE_MAX_SPANS = int(os.getenv("TRACE_MAX_SPANS", "256"))
+TRACE_EXPORT_URL = os.getenv("TRACE_EXPORT_URL")
+TRACE_EXPORT_INTERVAL_SECONDS = float(os.getenv("TRACE_EXPORT_INTERVAL_SECONDS", "5"))
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_LEVELS = os.getenv("LOG_LEVELS", "httpx=WARNING")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_SAMPLING = os.getenv("LOG_SAMPLING", "")
+LOG_RATE_LIMITS = os.getenv("LOG_RATE_LIMITS", "")
+GOOGLE_TOKEN_URL = os.getenv("GOOGLE_TOKEN_URL", "https://oauth2.googleapis.com/token")
+HUBSPOT_TOKEN_URL = os.getenv("HUBSPOT_TOKEN_URL", f"{HUBSPOT_API_URL}/oauth/v1/token")
+TOKEN_REFRESH_MARGIN_SECONDS = float(os.getenv("TOKEN_REFRESH_MARGIN_SECONDS", "300"))
+GOOGLE_WEBHOOK_URL = os.getenv("GOOGLE_WEBHOOK_URL")
+GOOGLE_WATCH_TTL_SECONDS = int(os.getenv("GOOGLE_WATCH_TTL_SECONDS", "604800"))
+GOOGLE_WATCH_RENEW_BEFORE_SECONDS = float(os.getenv("GOOGLE_WATCH_RENEW_BEFORE_SECONDS", "86400"))
+GOOGLE_WATCH_CHECK_INTERVAL_SECONDS = float(os.getenv("GOOGLE_WATCH_CHECK_INTERVAL_SECONDS", "3600"))
+GOOGLE_WATCH_DEBOUNCE_SECONDS = float(os.getenv("GOOGLE_WATCH_DEBOUNCE_SECONDS", "2"))
+GOOGLE_WATCHED_SYNC_INTERVAL_SECONDS = float(os.getenv("GOOGLE_WATCHED_SYNC_INTERVAL_SECONDS", "3600"))
+GOOGLE_BUSY_SOURCE = os.getenv("GOOGLE_BUSY_SOURCE", "freebusy").lower()
+GOOGLE_FREEBUSY_TTL_SECONDS = float(os.getenv("GOOGLE_FREEBUSY_TTL_SECONDS", "60"))
+GOOGLE_CALENDAR_LIST_TTL_SECONDS = float(os.getenv("GOOGLE_CALENDAR_LIST_TTL_SECONDS", "3600"))
+GOOGLE_FREEBUSY_CACHE_SIZE = int(os.getenv("GOOGLE_FREEBUSY_CACHE_SIZE", "5000"))
+EVENTS_DEFAULT_PAST_DAYS = int(os.getenv("EVENTS_DEFAULT_PAST_DAYS", "7"))
+EVENTS_DEFAULT_FUTURE_DAYS = int(os.getenv("EVENTS_DEFAULT_FUTURE_DAYS", "30"))
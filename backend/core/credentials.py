@@ -0,0 +1,180 @@
+"""
+OAuth access tokens for the Google and HubSpot connections.
+
+Access tokens are short lived (an hour for Google, a few for HubSpot).
+credentials.google_token() and hubspot_token() return one that is still valid
+for at least TOKEN_REFRESH_MARGIN_SECONDS, refreshing it with the stored
+refresh token before it expires rather than after a call has failed. Valid
+tokens are kept in memory, and callers that need the same connection
+refreshed at the same time share one request to the token endpoint.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Iterable, NamedTuple, Optional, Tuple
+
+import httpx
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import (
+    GOOGLE_CLIENT_ID,
+    GOOGLE_CLIENT_SECRET,
+    GOOGLE_TOKEN_URL,
+    HUBSPOT_CLIENT_ID,
+    HUBSPOT_CLIENT_SECRET,
+    HUBSPOT_TOKEN_URL,
+    TOKEN_REFRESH_MARGIN_SECONDS,
+)
+from core.database import AsyncSessionLocal
+from core.http_client import GOOGLE, HUBSPOT, get_http_client
+from core.metrics import Counter
+from core.tracing import span
+from crud.calendar import update_connected_account_tokens
+from crud.hubspot import update_hubspot_tokens
+
+logger = logging.getLogger(__name__)
+
+token_refreshes = Counter(
+    "oauth_token_refreshes_total", "Access token refreshes, by provider and result.", ("provider", "result"))
+
+
+class CredentialError(Exception):
+    """A connection has no usable access token and it could not be refreshed."""
+
+
+class _Provider(NamedTuple):
+    token_url: str
+    client_id: Optional[str]
+    client_secret: Optional[str]
+    # (db, connection id, access token, expires at, new refresh token or None)
+    save: Callable[..., Awaitable[None]]
+
+
+PROVIDERS: Dict[str, _Provider] = {
+    GOOGLE: _Provider(GOOGLE_TOKEN_URL, GOOGLE_CLIENT_ID, GOOGLE_CLIENT_SECRET, update_connected_account_tokens),
+    HUBSPOT: _Provider(HUBSPOT_TOKEN_URL, HUBSPOT_CLIENT_ID, HUBSPOT_CLIENT_SECRET, update_hubspot_tokens),
+}
+
+
+def expires_at_from(expires_in) -> datetime:
+    return datetime.utcnow() + timedelta(seconds=int(expires_in))
+
+
+class CredentialManager:
+    """Hands out access tokens per (provider, connection id)."""
+
+    def __init__(self, session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+                 margin: float = TOKEN_REFRESH_MARGIN_SECONDS, providers: Dict[str, _Provider] = PROVIDERS):
+        self.session_factory = session_factory
+        self.providers = providers
+        self.margin = timedelta(seconds=margin)
+        self._tokens: Dict[Tuple[str, int], Tuple[str, datetime]] = {}
+        self._refreshing: Dict[Tuple[str, int], asyncio.Task] = {}
+
+    async def google_token(self, account) -> str:
+        """Access token for a ConnectedGoogleAccount."""
+        return await self._token(
+            GOOGLE, account.id, account.access_token, account.refresh_token, account.token_expires_at)
+
+    async def hubspot_token(self, connection) -> str:
+        """Access token for a HubspotConnection."""
+        return await self._token(
+            HUBSPOT, connection.id, connection.access_token, connection.refresh_token, connection.expires_at)
+
+    async def google_tokens(self, accounts: Iterable) -> Tuple[Dict[int, str], Dict[int, str]]:
+        """
+        Tokens for several Google accounts, refreshed concurrently. Returns
+        ({account_id: access_token}, {account_id: error}) for the rest.
+        """
+        accounts = list(accounts)
+        results = await asyncio.gather(
+            *(self.google_token(account) for account in accounts), return_exceptions=True)
+        tokens, errors = {}, {}
+        for account, result in zip(accounts, results):
+            if isinstance(result, Exception):
+                logger.warning(f"No usable Google token for account {account.id}: {result}")
+                errors[account.id] = str(result)
+            elif isinstance(result, BaseException):
+                raise result
+            else:
+                tokens[account.id] = result
+        return tokens, errors
+
+    def forget(self, provider: str, connection_id: int):
+        """Drop the cached token, e.g. when the connection is removed."""
+        self._tokens.pop((provider, connection_id), None)
+
+    def _fresh(self, expires_at: Optional[datetime]) -> bool:
+        return expires_at is not None and expires_at - datetime.utcnow() > self.margin
+
+    async def _token(self, provider: str, connection_id: int, access_token: Optional[str],
+                     refresh_token: Optional[str], expires_at: Optional[datetime]) -> str:
+        key = (provider, connection_id)
+        cached = self._tokens.get(key)
+        if cached is not None and self._fresh(cached[1]):
+            return cached[0]
+        if access_token and self._fresh(expires_at):
+            self._tokens[key] = (access_token, expires_at)
+            return access_token
+        if not refresh_token:
+            # Nothing to refresh with; the stored token is all there is
+            if access_token:
+                return access_token
+            raise CredentialError(f"{provider} connection {connection_id} has no tokens")
+
+        task = self._refreshing.get(key)
+        if task is None:
+            task = asyncio.create_task(self._refresh(provider, connection_id, refresh_token))
+            self._refreshing[key] = task
+            task.add_done_callback(lambda done: self._done(key, done))
+        try:
+            # Shielded: one caller giving up must not cancel the others' refresh
+            return await asyncio.shield(task)
+        except CredentialError:
+            # A token inside the margin still works; use it until it expires
+            if access_token and expires_at is not None and expires_at > datetime.utcnow():
+                return access_token
+            raise
+
+    def _done(self, key: Tuple[str, int], task: asyncio.Task):
+        self._refreshing.pop(key, None)
+        if not task.cancelled():
+            # Mark the error as retrieved even if every waiter was cancelled
+            task.exception()
+
+    async def _refresh(self, provider: str, connection_id: int, refresh_token: str) -> str:
+        settings = self.providers[provider]
+        with span("oauth.refresh", provider=provider, connection_id=connection_id):
+            try:
+                response = await get_http_client(provider).post(settings.token_url, data={
+                    "grant_type": "refresh_token",
+                    "client_id": settings.client_id,
+                    "client_secret": settings.client_secret,
+                    "refresh_token": refresh_token,
+                })
+            except httpx.HTTPError as e:
+                token_refreshes.inc(provider, "error")
+                raise CredentialError(f"token refresh failed: {type(e).__name__}") from e
+            if response.status_code != 200:
+                # 400 invalid_grant: the refresh token was revoked or expired
+                token_refreshes.inc(provider, "rejected" if response.status_code < 500 else "error")
+                raise CredentialError(f"token endpoint returned {response.status_code}")
+            body = response.json()
+            access_token = body.get("access_token")
+            if not access_token:
+                token_refreshes.inc(provider, "error")
+                raise CredentialError("token endpoint returned no access token")
+        expires_at = expires_at_from(body.get("expires_in", 3600))
+        self._tokens[(provider, connection_id)] = (access_token, expires_at)
+        token_refreshes.inc(provider, "ok")
+        try:
+            async with self.session_factory() as db:
+                await settings.save(db, connection_id, access_token, expires_at, body.get("refresh_token"))
+                await db.commit()
+        except Exception as e:
+            # The token is still good from memory; the next refresh will store one
+            logger.warning(f"Could not store refreshed {provider} token for connection {connection_id}: {e}")
+        return access_token
+
+
+credentials = CredentialManager()
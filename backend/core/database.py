@@ -1,25 +1,139 @@
-from sqlalchemy import create_engine
+import os
+
+import aiosqlite
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
 
-# Use SQLite as the database URL
-SQLALCHEMY_DATABASE_URL = "sqlite:///./app.db"
+from core.config import (
+    DATABASE_URL,
+    DB_POOL_SIZE,
+    DB_READ_POOL_SIZE,
+    SQLITE_BUSY_TIMEOUT_MS,
+    SQLITE_CACHE_SIZE_KB,
+    SQLITE_JOURNAL_MODE,
+    SQLITE_MMAP_SIZE,
+    SQLITE_SYNCHRONOUS,
+)
+from core.metrics import instrument_engine
+
+# DATABASE_URL names the SQLite file; migrations use the stdlib driver and
+# everything else goes through aiosqlite
+_url = make_url(DATABASE_URL)
+SQLALCHEMY_DATABASE_URL = _url.set(drivername="sqlite").render_as_string(hide_password=False)
+ASYNC_DATABASE_URL = _url.set(drivername="sqlite+aiosqlite").render_as_string(hide_password=False)
+
+
+def apply_sqlite_pragmas(dbapi_connection, read_only: bool = False):
+    """
+    Production profile, set on every new connection. WAL lets readers carry on
+    while a booking holds the write lock, and synchronous=NORMAL is durable
+    across application crashes in WAL mode (only a power loss can drop the
+    last commits). busy_timeout makes writers queue for the lock instead of
+    failing straight away with "database is locked".
+    """
+    cursor = dbapi_connection.cursor()
+    if not read_only:
+        # The journal mode is stored in the database file; readers inherit it
+        cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    # A negative cache_size is in KiB rather than pages
+    cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+    if read_only:
+        cursor.execute("PRAGMA query_only=ON")
+    cursor.close()
 
+
+def _on_connect(read_only: bool = False):
+    def connect(dbapi_connection, connection_record):
+        apply_sqlite_pragmas(dbapi_connection, read_only)
+    return connect
+
+
+# Synchronous engine, only used to run migrations at startup
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
 )
+event.listen(engine, "connect", _on_connect())
+
+# Request handlers and background workers use the async engine, so queries
+# run on aiosqlite's connection threads instead of blocking the event loop
+async_engine = create_async_engine(ASYNC_DATABASE_URL, pool_size=DB_POOL_SIZE)
+event.listen(async_engine.sync_engine, "connect", _on_connect())
+instrument_engine(async_engine.sync_engine, "write")
+
+# Public pages read through their own pool of read-only connections, so a
+# burst of bookings queueing for the write lock cannot starve them of
+# connections; in WAL mode their reads never wait on the writer either
+read_engine = create_async_engine(ASYNC_DATABASE_URL, pool_size=DB_READ_POOL_SIZE)
+event.listen(read_engine.sync_engine, "connect", _on_connect(read_only=True))
+instrument_engine(read_engine.sync_engine, "read")
+
+# expire_on_commit=False: attributes stay readable after commit without an
+# implicit (and, under asyncio, impossible) lazy refresh
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+ReadSessionLocal = async_sessionmaker(
+    read_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+async def close_failed_cursors(error: BaseException):
+    """
+    Close the driver cursors a failed statement left open. SQLAlchemy's
+    aiosqlite adapter only closes its cursor when execute succeeds; after an
+    error (e.g. busy_timeout running out) the cursor is kept alive by the
+    traceback, and when the garbage collector finally resets its statement it
+    does so on the event loop thread, blocking the whole loop on the
+    connection's mutex while another transaction sits in the busy handler.
+    Closing it here runs the reset on the connection's own thread instead.
+    Call before rolling back.
+    """
+    cursors, seen = {}, set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        tb = error.__traceback__
+        while tb is not None:
+            for value in tb.tb_frame.f_locals.values():
+                if isinstance(value, aiosqlite.Cursor):
+                    cursors[id(value)] = value
+            tb = tb.tb_next
+        error = error.__cause__ or error.__context__
+    for cursor in cursors.values():
+        await cursor.close()
 
 Base = declarative_base()
 
 
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")
+
+
 def init_db():
-    Base.metadata.create_all(engine)
+    """Bring the schema up to date by running the Alembic migrations."""
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(ALEMBIC_INI)
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        config.attributes["configure_logger"] = False
+        command.upgrade(config, "head")
+    engine.dispose()
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
\ No newline at end of file
+
+async def get_read_db():
+    """Session on the read-only pool, for endpoints that never write."""
+    async with ReadSessionLocal() as db:
+        yield db
+
+async def close_db():
+    """Close pooled connections; aiosqlite's connection threads keep the process alive otherwise."""
+    await async_engine.dispose()
+    await read_engine.dispose()
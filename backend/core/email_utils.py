@@ -1,19 +1,99 @@
 import smtplib
+import time
 from email.mime.text import MIMEText
-from core.config import SMTP_HOST, SMTP_PORT, SMTP_USER, SMTP_PASS, EMAIL_FROM
+from core.config import (
+    SMTP_HOST,
+    SMTP_PORT,
+    SMTP_USER,
+    SMTP_PASS,
+    EMAIL_FROM,
+    SMTP_STARTTLS,
+    SMTP_TIMEOUT_SECONDS,
+    SMTP_IDLE_TIMEOUT_SECONDS,
+)
 
-def send_email(to_email, subject, body, from_email=EMAIL_FROM):
+def build_message(to_email, subject, body, from_email=EMAIL_FROM):
     msg = MIMEText(body, "plain")
     msg["Subject"] = subject
     msg["From"] = from_email
     msg["To"] = to_email
+    return msg
 
-    try:
-        with smtplib.SMTP(SMTP_HOST, SMTP_PORT) as server:
-            print(f"Sending email to {to_email} from {from_email}")
-            server.starttls()
-            server.login(SMTP_USER, SMTP_PASS)
-            server.sendmail(from_email, [to_email], msg.as_string())
-    except Exception as e:
-        print(f"Error sending email: {e}")
-        # Optionally, re-raise or handle as needed 
\ No newline at end of file
+def is_transient_smtp_error(error):
+    """
+    Connection problems and 4xx replies are worth retrying; other
+    SMTP replies (5xx) mean the message will never be accepted.
+    """
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    return isinstance(error, (smtplib.SMTPException, OSError))
+
+class SMTPConnection:
+    """
+    A reusable, authenticated SMTP connection. It is opened on first use,
+    checked with NOOP before reuse and dropped after SMTP_IDLE_TIMEOUT_SECONDS.
+    Not thread-safe: one sender owns it.
+    """
+
+    def __init__(self, host=SMTP_HOST, port=SMTP_PORT, user=SMTP_USER, password=SMTP_PASS, starttls=SMTP_STARTTLS):
+        self.host = host
+        self.port = int(port) if port else 0
+        self.user = user
+        self.password = password
+        self.starttls = starttls
+        self._server = None
+        self._last_used = 0.0
+
+    def _open(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=SMTP_TIMEOUT_SECONDS)
+        try:
+            server.ehlo()
+            if self.starttls:
+                server.starttls()
+                server.ehlo()
+            if self.user:
+                server.login(self.user, self.password)
+        except Exception:
+            server.close()
+            raise
+        return server
+
+    def _ensure_open(self):
+        if self._server is not None:
+            idle = time.monotonic() - self._last_used
+            if idle > SMTP_IDLE_TIMEOUT_SECONDS:
+                self.close()
+            else:
+                try:
+                    if self._server.noop()[0] == 250:
+                        return self._server
+                except smtplib.SMTPException:
+                    pass
+                self.close()
+        self._server = self._open()
+        return self._server
+
+    def send(self, msg):
+        server = self._ensure_open()
+        try:
+            server.sendmail(msg["From"], [msg["To"]], msg.as_string())
+        except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused):
+            # The server rejected this message; the connection is still usable
+            raise
+        except OSError:
+            # Includes SMTPServerDisconnected and socket errors
+            self.close()
+            raise
+        finally:
+            self._last_used = time.monotonic()
+
+    def close(self):
+        server, self._server = self._server, None
+        if server is None:
+            return
+        try:
+            server.quit()
+        except Exception:
+            server.close()
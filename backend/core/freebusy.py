@@ -0,0 +1,228 @@
+"""
+Busy time from Google's FreeBusy API.
+
+Availability only needs to know when an advisor is busy, not what the events
+are. For each connected account this lists the calendars the account owns or
+can write to (calendarList, cached for GOOGLE_CALENDAR_LIST_TTL_SECONDS) and
+asks freeBusy about all of them in one request covering the link's horizon.
+Events on secondary calendars count, and the response is a list of intervals
+instead of full event bodies. Subscribed calendars (holidays, colleagues)
+are left out.
+
+Each account's busy time is kept for GOOGLE_FREEBUSY_TTL_SECONDS, and
+concurrent page views share one request per account. When it changes, the
+advisor's cached slots are dropped.
+"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+
+import httpx
+
+from core.availability import Interval, merge_intervals, to_naive_utc
+from core.cache import MISSING, TTLCache
+from core.config import (
+    GOOGLE_CALENDAR_API_URL,
+    GOOGLE_CALENDAR_LIST_TTL_SECONDS,
+    GOOGLE_FREEBUSY_CACHE_SIZE,
+    GOOGLE_FREEBUSY_TTL_SECONDS,
+    GOOGLE_SYNC_TIMEOUT_SECONDS,
+)
+from core.credentials import credentials
+from core.google_calendar import parse_event_time
+from core.http_client import GOOGLE, get_http_client
+from core.metrics import Counter
+from core.slot_cache import invalidate_advisor_slots
+from core.tracing import span
+
+logger = logging.getLogger(__name__)
+
+CALENDAR_LIST_URL = f"{GOOGLE_CALENDAR_API_URL}/users/me/calendarList"
+FREEBUSY_URL = f"{GOOGLE_CALENDAR_API_URL}/freeBusy"
+# Google answers tooManyCalendarsRequested above this
+MAX_FREEBUSY_CALENDARS = 50
+
+freebusy_requests = Counter(
+    "google_freebusy_requests_total", "calendarList and freeBusy requests, by call and result.", ("call", "result"))
+
+
+class AccountBusy(NamedTuple):
+    """An account's merged busy intervals between start and end."""
+    start: datetime
+    end: datetime
+    intervals: List[Interval]
+
+    def covers(self, start: datetime, end: datetime) -> bool:
+        return self.start <= start and self.end >= end
+
+    def between(self, start: datetime, end: datetime) -> List[Interval]:
+        return [(max(s, start), min(e, end)) for s, e in self.intervals if s < end and e > start]
+
+
+calendar_lists = TTLCache("google_calendar_lists", GOOGLE_FREEBUSY_CACHE_SIZE, GOOGLE_CALENDAR_LIST_TTL_SECONDS)
+account_busy = TTLCache("google_busy", GOOGLE_FREEBUSY_CACHE_SIZE, GOOGLE_FREEBUSY_TTL_SECONDS)
+
+# The last busy time fetched per account, kept past its TTL: new results are
+# compared against it, and it stands in while Google cannot be reached
+_last_busy: Dict[int, AccountBusy] = {}
+# account id -> (start, end, task) of the request in flight
+_fetching: Dict[int, Tuple[datetime, datetime, asyncio.Task]] = {}
+
+
+def _rfc3339(value: datetime) -> str:
+    return f"{to_naive_utc(value).isoformat()}Z"
+
+
+async def list_calendar_ids(client: httpx.AsyncClient, access_token: str) -> List[str]:
+    """Ids of the calendars the account owns or can write to, primary included."""
+    headers = {"Authorization": f"Bearer {access_token}"}
+    params = {"minAccessRole": "writer", "fields": "items(id),nextPageToken", "maxResults": 250}
+    calendar_ids: List[str] = []
+    while True:
+        response = await client.get(CALENDAR_LIST_URL, headers=headers, params=params)
+        response.raise_for_status()
+        data = response.json()
+        calendar_ids.extend(item["id"] for item in data.get("items", []))
+        page_token = data.get("nextPageToken")
+        if not page_token:
+            return calendar_ids or ["primary"]
+        params["pageToken"] = page_token
+
+
+async def query_free_busy(client: httpx.AsyncClient, access_token: str, calendar_ids: List[str],
+                          time_min: datetime, time_max: datetime) -> List[Interval]:
+    """
+    Merged busy intervals (naive UTC) of the calendars between time_min and
+    time_max: one request per MAX_FREEBUSY_CALENDARS calendars.
+    """
+    headers = {"Authorization": f"Bearer {access_token}"}
+    busy: List[Interval] = []
+    for i in range(0, len(calendar_ids), MAX_FREEBUSY_CALENDARS):
+        response = await client.post(FREEBUSY_URL, headers=headers, json={
+            "timeMin": _rfc3339(time_min),
+            "timeMax": _rfc3339(time_max),
+            "items": [{"id": calendar_id} for calendar_id in calendar_ids[i:i + MAX_FREEBUSY_CALENDARS]],
+        })
+        response.raise_for_status()
+        for calendar_id, calendar in response.json().get("calendars", {}).items():
+            if calendar.get("errors"):
+                reasons = ", ".join(error.get("reason", "unknown") for error in calendar["errors"])
+                logger.warning(f"No free/busy for calendar {calendar_id}: {reasons}")
+            for block in calendar.get("busy", []):
+                busy.append((parse_event_time({"dateTime": block["start"]}),
+                             parse_event_time({"dateTime": block["end"]})))
+    return merge_intervals(busy)
+
+
+async def fetch_account_busy(account_id: int, access_token: str, start: datetime, end: datetime) -> AccountBusy:
+    client = get_http_client(GOOGLE)
+    calendar_ids = calendar_lists.get(account_id)
+    if calendar_ids is MISSING:
+        try:
+            calendar_ids = await list_calendar_ids(client, access_token)
+        except Exception:
+            freebusy_requests.inc("calendar_list", "error")
+            raise
+        freebusy_requests.inc("calendar_list", "ok")
+        calendar_lists.set(account_id, calendar_ids)
+    try:
+        intervals = await query_free_busy(client, access_token, calendar_ids, start, end)
+    except Exception:
+        freebusy_requests.inc("freebusy", "error")
+        raise
+    freebusy_requests.inc("freebusy", "ok")
+    return AccountBusy(start, end, intervals)
+
+
+async def _refresh_account(advisor_id: int, account_id: int, access_token: str,
+                           start: datetime, end: datetime) -> AccountBusy:
+    with span("google.freebusy", account_id=account_id):
+        busy = await asyncio.wait_for(
+            fetch_account_busy(account_id, access_token, start, end), timeout=GOOGLE_SYNC_TIMEOUT_SECONDS)
+    account_busy.set(account_id, busy)
+    previous = _last_busy.get(account_id)
+    _last_busy[account_id] = busy
+    # Slots cached before this process first asked Google came from the event store
+    if previous is None or _changed(previous, busy):
+        invalidate_advisor_slots(advisor_id)
+    return busy
+
+
+def _changed(previous: AccountBusy, current: AccountBusy) -> bool:
+    """Whether busy time differs where the two ranges overlap."""
+    start, end = max(previous.start, current.start), min(previous.end, current.end)
+    return previous.between(start, end) != current.between(start, end)
+
+
+def _done(account_id: int, task: asyncio.Task):
+    if account_id in _fetching and _fetching[account_id][2] is task:
+        del _fetching[account_id]
+    if not task.cancelled():
+        # Mark the error as retrieved even if every waiter was cancelled
+        task.exception()
+
+
+async def _account_busy(account, access_token: str, start: datetime, end: datetime) -> AccountBusy:
+    in_flight = _fetching.get(account.id)
+    if in_flight is not None and in_flight[0] <= start and in_flight[1] >= end:
+        task = in_flight[2]
+    else:
+        task = asyncio.create_task(_refresh_account(account.user_id, account.id, access_token, start, end))
+        _fetching[account.id] = (start, end, task)
+        task.add_done_callback(lambda done: _done(account.id, done))
+    # Shielded: one page view giving up must not cancel the others' request
+    return await asyncio.shield(task)
+
+
+async def get_busy_intervals(accounts: Iterable, start: datetime, end: datetime) -> Tuple[List[Interval], List[int]]:
+    """
+    Merged busy intervals of the accounts' calendars between start and end,
+    refreshing the accounts whose cached busy time is stale. Returns
+    (intervals, failed account ids); an account Google fails for is served
+    from the last busy time fetched for it, and is only listed as failed
+    when there is none covering the range.
+    """
+    busy: List[Interval] = []
+    stale = []
+    for account in accounts:
+        cached = account_busy.get(account.id)
+        if cached is not MISSING and cached.covers(start, end):
+            busy.extend(cached.between(start, end))
+        else:
+            stale.append(account)
+    if not stale:
+        return merge_intervals(busy), []
+
+    tokens, _ = await credentials.google_tokens(
+        account for account in stale if account.access_token or account.refresh_token)
+    fetching = [account for account in stale if account.id in tokens]
+    results = await asyncio.gather(
+        *(_account_busy(account, tokens[account.id], start, end) for account in fetching), return_exceptions=True)
+    fetched = dict(zip((account.id for account in fetching), results))
+
+    failed: List[int] = []
+    for account in stale:
+        result = fetched.get(account.id)
+        if isinstance(result, AccountBusy):
+            busy.extend(result.between(start, end))
+            continue
+        if isinstance(result, BaseException) and not isinstance(result, Exception):
+            raise result
+        if isinstance(result, asyncio.TimeoutError):
+            logger.warning(f"Free/busy for account {account.id} timed out after {GOOGLE_SYNC_TIMEOUT_SECONDS:g}s")
+        elif isinstance(result, httpx.HTTPStatusError):
+            logger.warning(f"Free/busy for account {account.id}: Google returned {result.response.status_code}")
+        elif result is not None:
+            logger.warning(f"Error fetching free/busy for account {account.id}: {str(result) or type(result).__name__}")
+        last = _last_busy.get(account.id)
+        if last is not None and last.covers(start, end):
+            busy.extend(last.between(start, end))
+        else:
+            failed.append(account.id)
+    return merge_intervals(busy), failed
+
+
+def forget_account_busy(account_id: int):
+    """Make the next page view ask Google again, e.g. after a push notification."""
+    account_busy.invalidate(account_id)
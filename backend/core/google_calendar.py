@@ -0,0 +1,22 @@
+from datetime import datetime, date, time
+from typing import Any, Dict, Optional
+
+from core.availability import to_naive_utc
+from core.config import GOOGLE_CALENDAR_API_URL
+
+PRIMARY_EVENTS_URL = f"{GOOGLE_CALENDAR_API_URL}/calendars/primary/events"
+
+
+def parse_event_time(value: Optional[Dict[str, Any]]) -> Optional[datetime]:
+    """
+    Parse a Google event start/end object ({"dateTime": ...} or {"date": ...})
+    into a naive UTC datetime.
+    """
+    if not value:
+        return None
+    if value.get("dateTime"):
+        return to_naive_utc(
+            datetime.fromisoformat(value["dateTime"].replace("Z", "+00:00")))
+    if value.get("date"):
+        return datetime.combine(date.fromisoformat(value["date"]), time.min)
+    return None
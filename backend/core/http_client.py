@@ -0,0 +1,107 @@
+import logging
+import time
+from typing import Dict
+
+import httpx
+
+from core.config import (
+    HTTP2_ENABLED,
+    HTTP_CONNECT_TIMEOUT_SECONDS,
+    HTTP_KEEPALIVE_EXPIRY_SECONDS,
+    HTTP_MAX_CONNECTIONS_PER_HOST,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_TIMEOUT_SECONDS,
+)
+from core.metrics import record_outbound
+
+logger = logging.getLogger(__name__)
+
+# One pooled client per integration, so each upstream host gets its own
+# connection limit and keep-alive pool.
+GOOGLE = "google"
+HUBSPOT = "hubspot"
+LINKEDIN = "linkedin"
+INTEGRATIONS = (GOOGLE, HUBSPOT, LINKEDIN)
+
+_clients: Dict[str, httpx.AsyncClient] = {}
+
+
+def _http2_available() -> bool:
+    if not HTTP2_ENABLED:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        logger.warning("HTTP2_ENABLED is set but the 'h2' package is not installed; using HTTP/1.1")
+        return False
+    return True
+
+
+class InstrumentedTransport(httpx.AsyncBaseTransport):
+    """
+    Records each call's latency (up to the response headers) and failures
+    (transport errors, 5xx and 429 replies) against the integration.
+    """
+
+    def __init__(self, integration: str, transport: httpx.AsyncBaseTransport):
+        self.integration = integration
+        self.transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        began = time.perf_counter()
+        try:
+            response = await self.transport.handle_async_request(request)
+        except Exception as e:
+            record_outbound(self.integration, time.perf_counter() - began, type(e).__name__)
+            raise
+        error = None
+        if response.status_code >= 500 or response.status_code == 429:
+            error = str(response.status_code)
+        record_outbound(self.integration, time.perf_counter() - began, error)
+        return response
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+def _build_client(name: str) -> httpx.AsyncClient:
+    transport = httpx.AsyncHTTPTransport(
+        http2=_http2_available(),
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS_PER_HOST,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+    )
+    return httpx.AsyncClient(
+        transport=InstrumentedTransport(name, transport),
+        timeout=httpx.Timeout(HTTP_TIMEOUT_SECONDS, connect=HTTP_CONNECT_TIMEOUT_SECONDS),
+    )
+
+
+async def init_http_clients():
+    """Create the shared clients. Called from the app lifespan."""
+    for name in INTEGRATIONS:
+        if name not in _clients:
+            _clients[name] = _build_client(name)
+
+
+async def close_http_clients():
+    """Close the shared clients and their pooled connections."""
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        await client.aclose()
+
+
+def get_http_client(name: str) -> httpx.AsyncClient:
+    """
+    Return the shared client for an integration. Callers must not close it.
+    Outside the app lifespan (scripts, one-off jobs) it is created on first use.
+    """
+    if name not in INTEGRATIONS:
+        raise ValueError(f"Unknown integration: {name}")
+    client = _clients.get(name)
+    if client is None or client.is_closed:
+        client = _clients[name] = _build_client(name)
+    return client
@@ -0,0 +1,127 @@
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+
+from core.config import HUBSPOT_API_URL
+from core.http_client import HUBSPOT, get_http_client
+from core.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+CONTACT_PROPERTIES = ["firstname", "lastname", "email", "phone", "company", "linkedinbio"]
+NOTE_PROPERTIES = ["hs_note_body"]
+
+# HubSpot caps batch endpoints at 100 inputs per request
+BATCH_SIZE = 100
+
+
+def _chunks(items: List[Any], size: int = BATCH_SIZE) -> Iterable[List[Any]]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+async def _post(access_token: str, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """POST to the HubSpot API and return the JSON body. Raises httpx.HTTPStatusError."""
+    headers = {
+        "Authorization": f"Bearer {access_token}",
+        "Content-Type": "application/json",
+    }
+    resp = await get_http_client(HUBSPOT).post(f"{HUBSPOT_API_URL}{path}", json=payload, headers=headers)
+    # Batch endpoints answer 207 when some inputs were not found
+    if resp.status_code not in (200, 207):
+        resp.raise_for_status()
+    return resp.json()
+
+
+@traced("hubspot.search_contacts")
+async def get_contacts_by_emails(access_token: str, emails: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Batch-read contacts by email. Returns {lowercased email: contact}, where a
+    contact is HubSpot's object ({"id": ..., "properties": {...}}).
+    Emails with no contact are absent from the result.
+    """
+    unique_emails = list(dict.fromkeys(e.strip().lower() for e in emails if e))
+    contacts: Dict[str, Dict[str, Any]] = {}
+    for chunk in _chunks(unique_emails):
+        data = await _post(access_token, "/crm/v3/objects/contacts/batch/read", {
+            "idProperty": "email",
+            "properties": CONTACT_PROPERTIES,
+            "inputs": [{"id": email} for email in chunk],
+        })
+        for contact in data.get("results", []):
+            email = (contact.get("properties", {}).get("email") or "").lower()
+            if email:
+                contacts[email] = contact
+    return contacts
+
+
+@traced("hubspot.note_associations")
+async def get_note_ids_by_contact_ids(access_token: str, contact_ids: List[str]) -> Dict[str, List[str]]:
+    """
+    Batch-read contact -> note associations, following each contact's
+    paging cursor until all associated notes are listed.
+    """
+    note_ids: Dict[str, List[str]] = {contact_id: [] for contact_id in contact_ids}
+    pending = [{"id": contact_id} for contact_id in contact_ids]
+    while pending:
+        next_pending = []
+        for chunk in _chunks(pending):
+            data = await _post(access_token, "/crm/v4/associations/contacts/notes/batch/read", {
+                "inputs": chunk,
+            })
+            for result in data.get("results", []):
+                contact_id = str(result["from"]["id"])
+                note_ids.setdefault(contact_id, []).extend(
+                    str(to["toObjectId"]) for to in result.get("to", []))
+                after = result.get("paging", {}).get("next", {}).get("after")
+                if after:
+                    next_pending.append({"id": contact_id, "after": after})
+        pending = next_pending
+    return note_ids
+
+
+@traced("hubspot.search_notes")
+async def get_notes_by_ids(access_token: str, note_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Batch-read notes. Returns {note id: note dict}."""
+    notes: Dict[str, Dict[str, Any]] = {}
+    for chunk in _chunks(list(dict.fromkeys(note_ids))):
+        data = await _post(access_token, "/crm/v3/objects/notes/batch/read", {
+            "properties": NOTE_PROPERTIES,
+            "inputs": [{"id": note_id} for note_id in chunk],
+        })
+        for note in data.get("results", []):
+            notes[str(note["id"])] = {
+                "id": note["id"],
+                "content": note.get("properties", {}).get("hs_note_body", ""),
+                "createdAt": note.get("createdAt"),
+                "updatedAt": note.get("updatedAt"),
+            }
+    return notes
+
+
+async def get_contacts_with_notes(access_token: str, emails: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Look up many emails at once (e.g. for backfills) with a fixed number of
+    batched round trips: contacts, then associations, then notes.
+    Returns {lowercased email: contact properties with a "notes" list}.
+    """
+    contacts = await get_contacts_by_emails(access_token, emails)
+    if not contacts:
+        return {}
+    contact_ids = [str(contact["id"]) for contact in contacts.values()]
+    note_ids = await get_note_ids_by_contact_ids(access_token, contact_ids)
+    notes = await get_notes_by_ids(
+        access_token, [note_id for ids in note_ids.values() for note_id in ids])
+
+    result = {}
+    for email, contact in contacts.items():
+        properties = dict(contact.get("properties", {}))
+        contact_notes = [notes[n] for n in note_ids.get(str(contact["id"]), []) if n in notes]
+        properties["notes"] = sorted(contact_notes, key=lambda n: n.get("createdAt") or "")
+        result[email] = properties
+    return result
+
+
+async def get_contact_with_notes(access_token: str, email: str) -> Optional[Dict[str, Any]]:
+    """Contact properties plus all of its notes for one email, or None."""
+    contacts = await get_contacts_with_notes(access_token, [email])
+    return contacts.get(email.strip().lower())
@@ -1,89 +1,70 @@
-import httpx
+import logging
+from core.cache import MISSING, TTLCache
+from core.config import (
+    HUBSPOT_CACHE_SIZE,
+    HUBSPOT_CACHE_TTL_SECONDS,
+    HUBSPOT_NEGATIVE_CACHE_TTL_SECONDS,
+)
+from core.credentials import CredentialError, credentials
+from core.hubspot_client import get_contacts_by_emails, get_contact_with_notes
+from core.tracing import set_attribute, traced
 
-def get_hubspot_contact_by_email(email, access_token):
-    url = "https://api.hubapi.com/crm/v3/objects/contacts/search"
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Content-Type": "application/json"
-    }
-    data = {
-        "filterGroups": [{
-            "filters": [{
-                "propertyName": "email",
-                "operator": "EQ",
-                "value": email
-            }]
-        }],
-        "properties": [
-            "firstname", "lastname", "email", "phone", "company", "linkedinbio"
-        ]
-    }
-    resp = httpx.post(url, json=data, headers=headers)
-    if resp.status_code == 200:
-        results = resp.json().get("results", [])
-        if results:
-            return results[0]["properties"]
-    return None 
+logger = logging.getLogger(__name__)
 
-def get_hubspot_contact_by_email_with_notes(email, access_token):
-    url = "https://api.hubapi.com/crm/v3/objects/contacts/search"
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Content-Type": "application/json"
-    }
-    data = {
-        "filterGroups": [{
-            "filters": [{
-                "propertyName": "email",
-                "operator": "EQ",
-                "value": email
-            }]
-        }],
-        "properties": [
-            "firstname",
-            "lastname",
-            "email",
-            "phone",
-            "company",
-            "linkedinbio"
-        ]
-    }
-    resp = httpx.post(url, json=data, headers=headers)
-    if resp.status_code != 200:
-        return None
+# (portal_id, normalized email) -> contact properties with notes, or None
+# when HubSpot has no such contact
+contact_cache = TTLCache(
+    "hubspot_contacts",
+    maxsize=HUBSPOT_CACHE_SIZE,
+    ttl=HUBSPOT_CACHE_TTL_SECONDS,
+    negative_ttl=HUBSPOT_NEGATIVE_CACHE_TTL_SECONDS,
+)
+
+def normalize_email(email):
+    return email.strip().lower()
+
+def invalidate_hubspot_contact_cache(portal_id, email=None):
+    """Forget one cached contact, or every contact of a portal when email is None."""
+    if email is not None:
+        contact_cache.invalidate((portal_id, normalize_email(email)))
+    else:
+        contact_cache.invalidate_where(lambda key: key[0] == portal_id)
 
-    results = resp.json().get("results", [])
-    if not results:
+async def get_hubspot_contact_by_email(email, access_token):
+    try:
+        contacts = await get_contacts_by_emails(access_token, [email])
+    except Exception as e:
+        logger.warning(f"HubSpot contact lookup failed: {e}")
         return None
+    contact = contacts.get(normalize_email(email))
+    return contact["properties"] if contact else None
 
-    contact = results[0]
-    contact_id = contact["id"]
-    contact_properties = contact["properties"]
+@traced("hubspot.contact_with_notes")
+async def get_hubspot_contact_by_email_with_notes(email, access_token, portal_id=None):
+    """
+    Contact properties plus notes for an email. Results, including "no such
+    contact", are cached per portal; lookups that fail are not.
+    """
+    key = (portal_id, normalize_email(email))
+    if portal_id is not None:
+        cached = contact_cache.get(key)
+        if cached is not MISSING:
+            set_attribute("cache_hit", True)
+            return cached
+    try:
+        contact = await get_contact_with_notes(access_token, email)
+    except Exception as e:
+        logger.warning(f"HubSpot contact and notes lookup failed: {e}")
+        return None
+    if portal_id is not None:
+        contact_cache.set(key, contact)
+    return contact
 
-    notes_url = "https://api.hubapi.com/crm/v3/objects/notes/search"
-    search_payload = {
-        "filterGroups": [
-            {
-                "filters": [
-                    {
-                        "propertyName": "associations.contact",
-                        "operator": "EQ",
-                        "value": contact_id
-                    }
-                ]
-            }
-        ],
-        "properties": ["hs_note_body"]
-    }
-    notes_resp = httpx.post(notes_url, json=search_payload, headers=headers)
-    notes = []
-    if notes_resp.status_code == 200:
-        for note in notes_resp.json().get("results", []):
-            notes.append({
-                "id": note["id"],
-                "content": note["properties"].get("hs_note_body", ""),
-                "createdAt": note.get("createdAt"),
-                "updatedAt": note.get("updatedAt"),
-            })
-    contact_properties["notes"] = notes
-    return contact_properties 
\ No newline at end of file
+async def get_connection_contact_with_notes(connection, email):
+    """get_hubspot_contact_by_email_with_notes through a HubspotConnection, with a current token."""
+    try:
+        access_token = await credentials.hubspot_token(connection)
+    except CredentialError as e:
+        logger.warning(f"No usable HubSpot token for connection {connection.id}: {e}")
+        return None
+    return await get_hubspot_contact_by_email_with_notes(email, access_token, portal_id=connection.portal_id)
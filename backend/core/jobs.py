@@ -0,0 +1,173 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import (
+    JOB_BACKOFF_MAX_SECONDS,
+    JOB_BACKOFF_SECONDS,
+    JOB_MAX_ATTEMPTS,
+    JOB_POLL_INTERVAL_SECONDS,
+    JOB_STALE_MARGIN_SECONDS,
+    JOB_TIMEOUT_SECONDS,
+    JOB_WORKERS,
+)
+from core.database import AsyncSessionLocal
+from core.tracing import current_traceparent, span
+from crud.job import (
+    claim_next_job,
+    complete_job,
+    create_job,
+    create_job_unless_pending,
+    fail_job,
+    requeue_stale_jobs,
+)
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[AsyncSession, Dict[str, Any]], Awaitable[None]]
+
+JOB_HANDLERS: Dict[str, JobHandler] = {}
+
+
+def job_handler(kind: str):
+    """
+    Register an async handler for a job kind. Handlers receive the worker's
+    session and the job payload; anything they add to the session is committed
+    together with the job's completion. Raising an exception schedules a retry.
+    """
+    def decorator(func: JobHandler) -> JobHandler:
+        JOB_HANDLERS[kind] = func
+        return func
+    return decorator
+
+
+def enqueue_job(db: AsyncSession, kind: str, payload: Dict[str, Any], max_attempts: int = JOB_MAX_ATTEMPTS,
+                run_at: Optional[datetime] = None):
+    """
+    Add a job to the caller's transaction (the caller commits) and nudge the
+    workers. The job is traced as a continuation of the current span.
+    """
+    traceparent = current_traceparent()
+    if traceparent:
+        payload = {**payload, "traceparent": traceparent}
+    job = create_job(db, kind, payload, max_attempts, run_at)
+    job_workers.notify()
+    return job
+
+
+async def enqueue_job_unless_pending(db: AsyncSession, kind: str, payload: Dict[str, Any], key: str,
+                                     max_attempts: int = JOB_MAX_ATTEMPTS, run_at: Optional[datetime] = None) -> bool:
+    """
+    Like enqueue_job, unless a job of this kind with the same payload[key] is
+    still waiting to run. Returns whether a job was queued.
+    """
+    traceparent = current_traceparent()
+    if traceparent:
+        payload = {**payload, "traceparent": traceparent}
+    queued = await create_job_unless_pending(db, kind, payload, key, max_attempts, run_at)
+    if queued:
+        job_workers.notify()
+    return queued
+
+
+def backoff_delay(attempts: int) -> float:
+    return min(JOB_BACKOFF_SECONDS * (2 ** max(attempts - 1, 0)), JOB_BACKOFF_MAX_SECONDS)
+
+
+class JobWorkerPool:
+    """In-process workers that drain the background_jobs table."""
+
+    def __init__(self, size: int = JOB_WORKERS):
+        self.size = size
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._last_requeue: Optional[datetime] = None
+
+    def notify(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def start(self):
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.size)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._wakeup = None
+
+    async def _run(self):
+        while True:
+            try:
+                ran = await self.run_next()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Background job worker error: {e}")
+                ran = False
+            if not ran:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=JOB_POLL_INTERVAL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _requeue_stale(self, db: AsyncSession, now: datetime):
+        """
+        Jobs still marked running JOB_STALE_MARGIN_SECONDS past
+        JOB_TIMEOUT_SECONDS belong to a worker that died (e.g. a restart
+        mid-job); put them back in the queue. The margin leaves a worker
+        whose handler just timed out time to record the failure itself.
+        Checked at startup and then once per timeout period.
+        """
+        timeout = timedelta(seconds=JOB_TIMEOUT_SECONDS)
+        if self._last_requeue and now - self._last_requeue < timeout:
+            return
+        self._last_requeue = now
+        requeued = await requeue_stale_jobs(db, now - timeout - timedelta(seconds=JOB_STALE_MARGIN_SECONDS))
+        if requeued:
+            logger.info(f"Requeued {requeued} interrupted background jobs")
+
+    async def run_next(self) -> bool:
+        """Claim and run one due job. Returns False when the queue is empty."""
+        async with AsyncSessionLocal() as db:
+            now = datetime.utcnow()
+            await self._requeue_stale(db, now)
+            job = await claim_next_job(db, now)
+            if not job:
+                return False
+            payload = job.payload or {}
+            with span(f"job {job.kind}", root=True, traceparent=payload.get("traceparent"),
+                      job_id=job.id, attempt=job.attempts) as job_span:
+                handler = JOB_HANDLERS.get(job.kind)
+                try:
+                    if handler is None:
+                        raise LookupError(f"No handler registered for job kind '{job.kind}'")
+                    await asyncio.wait_for(handler(db, payload), timeout=JOB_TIMEOUT_SECONDS)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    await db.rollback()
+                    # Rollback expires the job; reload it rather than lazy-load under asyncio
+                    await db.refresh(job)
+                    error = str(e) or type(e).__name__
+                    if job_span is not None:
+                        job_span.error = error
+                    retry_at = None
+                    if job.attempts < job.max_attempts:
+                        retry_at = datetime.utcnow() + timedelta(seconds=backoff_delay(job.attempts))
+                    logger.warning(
+                        f"Job {job.id} ({job.kind}) attempt {job.attempts} failed: {error}"
+                        + (f"; retrying at {retry_at}" if retry_at else "; giving up"))
+                    await fail_job(db, job, error, retry_at)
+                else:
+                    await complete_job(db, job)
+            return True
+
+
+job_workers = JobWorkerPool()
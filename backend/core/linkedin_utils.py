@@ -1,4 +1,5 @@
-import httpx
+from core.http_client import LINKEDIN, get_http_client
+from core.tracing import traced
 import re
 from bs4 import BeautifulSoup
 from urllib.parse import urlparse
@@ -35,6 +36,7 @@ def extract_linkedin_username(url: str) -> Optional[str]:
         return match.group(1)
     return None
 
+@traced("linkedin.fetch_profile")
 async def scrape_linkedin_profile(url: str) -> Optional[Dict[str, Any]]:
     """
     Scrape basic information from a LinkedIn profile.
@@ -57,31 +59,31 @@ async def scrape_linkedin_profile(url: str) -> Optional[Dict[str, Any]]:
             'Accept-Language': 'en-US,en;q=0.9',
         }
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=headers, follow_redirects=True, timeout=10.0)
-            if response.status_code != 200:
-                logger.warning(f"Failed to fetch LinkedIn profile: {response.status_code}")
-                return None
-                
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Extract basic information
-            data = {
-                'name': None,
-                'headline': None,
-                'location': None,
-                'about': None,
-                'experience': [],
-                'education': [],
-                'skills': [],
-                'raw_html': response.text  # Keep the raw HTML for AI processing
-            }
-            
-            # This is simplified and likely won't work due to LinkedIn's dynamic loading
-            # and anti-scraping measures. A more reliable approach would be to use
-            # LinkedIn's official API or third-party services.
-            return data
+        client = get_http_client(LINKEDIN)
+        response = await client.get(url, headers=headers, follow_redirects=True, timeout=10.0)
+        if response.status_code != 200:
+            logger.warning(f"Failed to fetch LinkedIn profile: {response.status_code}")
+            return None
             
+        soup = BeautifulSoup(response.text, 'html.parser')
+        
+        # Extract basic information
+        data = {
+            'name': None,
+            'headline': None,
+            'location': None,
+            'about': None,
+            'experience': [],
+            'education': [],
+            'skills': [],
+            'raw_html': response.text  # Keep the raw HTML for AI processing
+        }
+        
+        # This is simplified and likely won't work due to LinkedIn's dynamic loading
+        # and anti-scraping measures. A more reliable approach would be to use
+        # LinkedIn's official API or third-party services.
+        return data
+        
     except Exception as e:
         logger.error(f"Error scraping LinkedIn profile: {e}")
         return None 
\ No newline at end of file
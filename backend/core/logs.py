@@ -0,0 +1,252 @@
+"""
+Structured, non-blocking logging.
+
+setup_logging() routes every record, uvicorn's included, through a bounded
+queue: the caller only formats the message and enqueues it, and a
+QueueListener thread does the I/O. When the queue is full the record is
+dropped and counted instead of blocking the event loop.
+
+Records carry the request id (set by RequestIdMiddleware) and the trace id,
+and are written as one JSON object per line. LOG_LEVELS sets per-logger
+levels ("httpx=WARNING" by default, which logs every request at INFO).
+Noisy loggers can be sampled
+(LOG_SAMPLING="core.calendar_sync=0.1") and rate limited
+(LOG_RATE_LIMITS="core.outbox=20", records per second); the longest
+matching logger name applies, and warnings and errors are never sampled.
+"""
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import re
+import sys
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+from core.config import LOG_FORMAT, LOG_LEVEL, LOG_LEVELS, LOG_QUEUE_SIZE, LOG_RATE_LIMITS, LOG_SAMPLING
+from core.metrics import Counter
+from core.tracing import current_span
+
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+log_records_dropped = Counter(
+    "log_records_dropped_total", "Log records not written, by logger and reason.", ("logger", "reason"))
+
+# Attributes every LogRecord has; anything else was passed in `extra`
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {
+    "message", "asctime", "request_id", "trace_id", "color_message"}
+_REQUEST_ID = re.compile(r"^[A-Za-z0-9._-]{1,128}$")
+
+_traceback_formatter = logging.Formatter()
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def parse_logger_settings(value: str) -> Dict[str, float]:
+    """'a.b=0.1,c=5' -> {'a.b': 0.1, 'c': 5.0}; malformed entries are ignored."""
+    settings = {}
+    for item in value.split(","):
+        name, _, number = item.partition("=")
+        try:
+            settings[name.strip()] = float(number)
+        except ValueError:
+            continue
+    return settings
+
+
+def parse_logger_levels(value: str) -> Dict[str, str]:
+    """'httpx=WARNING,core.jobs=DEBUG' -> {'httpx': 'WARNING', 'core.jobs': 'DEBUG'}."""
+    levels = {}
+    for item in value.split(","):
+        name, _, level = item.partition("=")
+        if name.strip() and isinstance(logging.getLevelName(level.strip().upper()), int):
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+class _PerLoggerSetting:
+    """The setting for the longest configured prefix of a logger name, memoized per name."""
+
+    def __init__(self, settings: Dict[str, float]):
+        self.settings = settings
+        self._resolved: Dict[str, Optional[float]] = {}
+
+    def get(self, name: str) -> Optional[float]:
+        if name in self._resolved:
+            return self._resolved[name]
+        value, candidate = None, name
+        while True:
+            if candidate in self.settings:
+                value = self.settings[candidate]
+                break
+            if "." not in candidate:
+                value = self.settings.get("root", self.settings.get(""))
+                break
+            candidate = candidate.rsplit(".", 1)[0]
+        self._resolved[name] = value
+        return value
+
+
+class ContextFilter(logging.Filter):
+    """Stamps the request and trace ids while the record is still in the caller's context."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        span = current_span()
+        record.trace_id = span.trace_id if span is not None else None
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps a fraction of a logger's records below WARNING."""
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = _PerLoggerSetting(rates)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rates.get(record.name)
+        if rate is None or rate >= 1 or random.random() < rate:
+            return True
+        log_records_dropped.inc(record.name, "sampled")
+        return False
+
+
+class RateLimitFilter(logging.Filter):
+    """A token bucket per logger: at most `limit` records a second, bursting to one second's worth."""
+
+    def __init__(self, limits: Dict[str, float]):
+        super().__init__()
+        self.limits = _PerLoggerSetting(limits)
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        limit = self.limits.get(record.name)
+        if limit is None:
+            return True
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(record.name, (limit, now))
+        tokens = min(limit, tokens + (now - updated) * limit)
+        if tokens < 1:
+            self._buckets[record.name] = (tokens, now)
+            log_records_dropped.inc(record.name, "rate_limited")
+            return False
+        self._buckets[record.name] = (tokens - 1, now)
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Drops (and counts) records when the queue is full rather than waiting."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge the arguments and render the traceback here, where they are
+        # still valid, but keep the traceback apart from the message
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = _traceback_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            log_records_dropped.inc(record.name, "queue_full")
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key in ("request_id", "trace_id"):
+            value = getattr(record, key, None)
+            if value:
+                entry[key] = value
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+def setup_logging():
+    """
+    Send the root logger, and uvicorn's loggers, through the queue. Safe to
+    call more than once; only the first call installs the handlers.
+    """
+    global _listener
+    if _listener is not None:
+        return
+    if LOG_FORMAT == "json":
+        formatter: logging.Formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter("%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s")
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(formatter)
+
+    log_queue: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    handler = NonBlockingQueueHandler(log_queue)
+    handler.addFilter(SamplingFilter(parse_logger_settings(LOG_SAMPLING)))
+    handler.addFilter(RateLimitFilter(parse_logger_settings(LOG_RATE_LIMITS)))
+    handler.addFilter(ContextFilter())
+
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(LOG_LEVEL)
+    for name, level in parse_logger_levels(LOG_LEVELS).items():
+        logging.getLogger(name).setLevel(level)
+    # uvicorn installs its own stream handlers before importing the app
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers.clear()
+        uvicorn_logger.propagate = True
+
+    _listener = logging.handlers.QueueListener(log_queue, output)
+    _listener.start()
+    # Flush what is still queued when the process exits
+    atexit.register(_listener.stop)
+
+
+class RequestIdMiddleware:
+    """
+    Gives every request an id, taken from a well-formed X-Request-ID header
+    or generated, for the logs and the X-Request-ID response header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        incoming = dict(scope.get("headers") or []).get(b"x-request-id", b"").decode("latin-1")
+        request_id = incoming if _REQUEST_ID.match(incoming) else uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), (b"x-request-id", request_id.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id_var.reset(token)
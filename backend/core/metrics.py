@@ -0,0 +1,295 @@
+"""
+In-process metrics, rendered in the Prometheus text format at /metrics
+(api.endpoints.metrics, which takes METRICS_TOKEN).
+
+Every series is a plain counter or a histogram with preallocated buckets,
+updated without locks: the event loop is single threaded, and the few
+updates made from worker threads (SMTP) touch series of their own.
+Recording a value is a dict lookup, a bisect and two additions.
+"""
+import asyncio
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+
+from core.cache import CACHES
+from core.config import EVENT_LOOP_LAG_INTERVAL_SECONDS
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUERY_COUNT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+OPENAI = "openai"
+SMTP = "smtp"
+
+_METRICS: List["_Metric"] = []
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        _METRICS.append(self)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}", *self.samples()]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def set_total(self, *labels: str, value: float):
+        """For counts kept elsewhere (cache stats) and copied in when rendering."""
+        self._values[labels] = value
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+                for labels, value in list(self._values.items())]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, *labels: str, value: float):
+        self._values[labels] = value
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+                for labels, value in list(self._values.items())]
+
+
+class _HistogramSeries:
+    __slots__ = ("counts", "sum")
+
+    def __init__(self, size: int):
+        self.counts = [0] * size
+        self.sum = 0.0
+
+
+class Histogram(_Metric):
+    """Bucket counts are stored per bucket and made cumulative when rendered."""
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], _HistogramSeries] = {}
+
+    def observe(self, *labels: str, value: float):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series.setdefault(labels, _HistogramSeries(len(self.buckets) + 1))
+        # Index len(buckets) is the +Inf bucket
+        series.counts[bisect_left(self.buckets, value)] += 1
+        series.sum += value
+
+    def samples(self) -> List[str]:
+        lines = []
+        for labels, series in list(self._series.items()):
+            total = 0
+            for bound, count in zip((*self.buckets, "+Inf"), series.counts):
+                total += count
+                le = 'le="+Inf"' if bound == "+Inf" else f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {total}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(series.sum)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {total}")
+        return lines
+
+
+http_requests = Counter("http_requests_total", "HTTP requests handled, by route and status.", ("method", "route", "status"))
+http_request_seconds = Histogram("http_request_duration_seconds", "HTTP request latency.", ("method", "route"))
+http_request_db_queries = Histogram(
+    "http_request_db_queries", "Database queries issued while handling one request.", ("method", "route"),
+    buckets=QUERY_COUNT_BUCKETS)
+http_request_db_seconds = Histogram(
+    "http_request_db_seconds", "Time spent in database queries while handling one request.", ("method", "route"))
+db_query_seconds = Histogram("db_query_duration_seconds", "Database query latency, by connection pool.", ("pool",))
+db_pool_in_use = Gauge("db_pool_connections_in_use", "Connections checked out of each pool.", ("pool",))
+outbound_seconds = Histogram(
+    "outbound_request_duration_seconds", "Latency of calls to external services.", ("integration",))
+outbound_errors = Counter(
+    "outbound_request_errors_total", "Failed calls to external services, by HTTP status or exception.",
+    ("integration", "error"))
+cache_lookups = Counter("cache_lookups_total", "Cache lookups, by cache and result.", ("cache", "result"))
+cache_hit_ratio = Gauge("cache_hit_ratio", "Share of cache lookups answered from the cache.", ("cache",))
+cache_entries = Gauge("cache_entries", "Entries currently held by each in-memory cache.", ("cache",))
+event_loop_lag = Histogram("event_loop_lag_seconds", "How late the event loop runs a timer that is due.")
+
+# [query count, query seconds] for the request being handled, if any
+_request_db: ContextVar[Optional[List[float]]] = ContextVar("request_db", default=None)
+_engines: Dict[str, object] = {}
+# Lookups for caches that are not TTLCaches (the on-disk AI cache)
+_cache_counts: Dict[str, List[int]] = {}
+
+
+def record_cache_lookup(cache: str, hit: bool):
+    counts = _cache_counts.setdefault(cache, [0, 0])
+    counts[0 if hit else 1] += 1
+
+
+def record_outbound(integration: str, seconds: float, error: Optional[str] = None):
+    outbound_seconds.observe(integration, value=seconds)
+    if error is not None:
+        outbound_errors.inc(integration, error)
+
+
+@contextmanager
+def timed_call(integration: str):
+    """Time a call to an external service; an exception counts as an error and propagates."""
+    began = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        record_outbound(integration, time.perf_counter() - began, type(e).__name__)
+        raise
+    record_outbound(integration, time.perf_counter() - began)
+
+
+def instrument_engine(engine, pool: str):
+    """Time every query on a (sync) engine and add it to the current request's totals."""
+    _engines[pool] = engine
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before(conn, cursor, statement, parameters, context, executemany):
+        # A connection runs one statement at a time
+        conn.info["query_started"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop("query_started", None)
+        if started is None:
+            return
+        seconds = time.perf_counter() - started
+        db_query_seconds.observe(pool, value=seconds)
+        totals = _request_db.get()
+        if totals is not None:
+            totals[0] += 1
+            totals[1] += seconds
+
+
+class MetricsMiddleware:
+    """
+    Records latency, status and database work per route. Routes are labelled
+    by their path template (/api/schedule/{link_id}), so the number of series
+    stays bounded; requests that match no route share "unmatched".
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        status = 500
+        totals = [0, 0.0]
+        token = _request_db.set(totals)
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        began = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - began
+            _request_db.reset(token)
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            method = scope["method"]
+            http_requests.inc(method, path, str(status))
+            http_request_seconds.observe(method, path, value=elapsed)
+            http_request_db_queries.observe(method, path, value=totals[0])
+            http_request_db_seconds.observe(method, path, value=totals[1])
+
+
+class LoopLagMonitor:
+    """Measures how late a periodic timer fires: time the loop spent busy with something else."""
+
+    def __init__(self, interval: float = EVENT_LOOP_LAG_INTERVAL_SECONDS):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self):
+        while True:
+            began = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            event_loop_lag.observe(value=max(time.perf_counter() - began - self.interval, 0.0))
+
+
+loop_monitor = LoopLagMonitor()
+
+
+def _collect():
+    """Refresh the gauges that are read from elsewhere rather than recorded as they happen."""
+    for pool, engine in _engines.items():
+        checkedout = getattr(engine.pool, "checkedout", None)
+        if checkedout is not None:
+            db_pool_in_use.set(pool, value=checkedout())
+    counts = {name: [cache.hits, cache.misses] for name, cache in list(CACHES.items())}
+    counts.update(_cache_counts)
+    for name, (hits, misses) in counts.items():
+        cache_lookups.set_total(name, "hit", value=hits)
+        cache_lookups.set_total(name, "miss", value=misses)
+        if hits + misses:
+            cache_hit_ratio.set(name, value=hits / (hits + misses))
+    for name, cache in list(CACHES.items()):
+        cache_entries.set(name, value=len(cache))
+
+
+def render() -> str:
+    _collect()
+    lines = []
+    for metric in _METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
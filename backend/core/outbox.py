@@ -0,0 +1,160 @@
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import (
+    EMAIL_FROM,
+    OUTBOX_BATCH_SIZE,
+    OUTBOX_MAX_ATTEMPTS,
+    OUTBOX_POLL_INTERVAL_SECONDS,
+    OUTBOX_RETRY_MAX_SECONDS,
+    OUTBOX_RETRY_SECONDS,
+    OUTBOX_STALE_SECONDS,
+)
+from core.database import AsyncSessionLocal
+from core.email_utils import SMTPConnection, build_message, is_transient_smtp_error
+from core.metrics import SMTP, timed_call
+from core.tracing import current_traceparent, record_span
+from crud.outbox import (
+    claim_outbox_batch,
+    create_outbox_message,
+    mark_outbox_failed,
+    mark_outbox_sent,
+    requeue_stale_outbox_messages,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_email(db: AsyncSession, to_email: str, subject: str, body: str, from_email: str = EMAIL_FROM):
+    """Queue an email in the caller's transaction (the caller commits)."""
+    message = create_outbox_message(
+        db, to_email, subject, body, from_email, OUTBOX_MAX_ATTEMPTS, trace_parent=current_traceparent())
+    outbox_sender.notify()
+    return message
+
+
+def retry_delay(attempts: int) -> float:
+    return min(OUTBOX_RETRY_SECONDS * (2 ** max(attempts - 1, 0)), OUTBOX_RETRY_MAX_SECONDS)
+
+
+class OutboxSender:
+    """
+    Background task that drains outbox_messages in batches over one reused
+    SMTP connection. SMTP itself is blocking, so each batch runs in a thread.
+    """
+
+    def __init__(self, connection: Optional[SMTPConnection] = None, batch_size: int = OUTBOX_BATCH_SIZE):
+        self.connection = connection or SMTPConnection()
+        self.batch_size = batch_size
+        self.claim_prefix = uuid.uuid4().hex
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._last_requeue: Optional[datetime] = None
+
+    def notify(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def start(self):
+        self._wakeup = asyncio.Event()
+        self._last_requeue = None
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self._wakeup = None
+        await asyncio.to_thread(self.connection.close)
+
+    async def _run(self):
+        while True:
+            try:
+                sent_any = await self.send_batch()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Outbox sender error: {e}")
+                sent_any = False
+            if not sent_any:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=OUTBOX_POLL_INTERVAL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+
+    def _deliver(
+        self, messages: List[Tuple[int, str, str, str, str]]
+    ) -> List[Tuple[int, Tuple[Optional[Exception], int, int]]]:
+        """
+        Send each message over the shared connection. Runs in a worker thread.
+        Returns (message id, (error, start ns, end ns)) per message.
+        """
+        results = []
+        for message_id, to_email, from_email, subject, body in messages:
+            started = time.time_ns()
+            try:
+                with timed_call(SMTP):
+                    self.connection.send(build_message(to_email, subject, body, from_email))
+                error = None
+            except Exception as e:
+                error = e
+            results.append((message_id, (error, started, time.time_ns())))
+        return results
+
+    async def _requeue_stale(self, db: AsyncSession, now: datetime):
+        """
+        Messages still 'sending' after OUTBOX_STALE_SECONDS belong to a sender
+        that died (e.g. a restart mid-batch); put them back in the queue. A
+        batch another live sender claimed more recently is left alone, or it
+        would be sent twice. Checked at startup and then once per period.
+        """
+        stale = timedelta(seconds=OUTBOX_STALE_SECONDS)
+        if self._last_requeue and now - self._last_requeue < stale:
+            return
+        self._last_requeue = now
+        requeued = await requeue_stale_outbox_messages(db, now - stale)
+        if requeued:
+            logger.info(f"Requeued {requeued} interrupted outbox messages")
+
+    async def send_batch(self) -> bool:
+        """Claim and deliver one batch. Returns False when nothing was due."""
+        async with AsyncSessionLocal() as db:
+            now = datetime.utcnow()
+            await self._requeue_stale(db, now)
+            claim_id = f"{self.claim_prefix}:{now.timestamp()}"
+            messages = await claim_outbox_batch(db, claim_id, now, self.batch_size)
+            if not messages:
+                return False
+            # Every SMTP call is bounded by SMTP_TIMEOUT_SECONDS at the socket level
+            results = dict(await asyncio.to_thread(self._deliver, [
+                (m.id, m.to_email, m.from_email, m.subject, m.body) for m in messages
+            ]))
+            finished_at = datetime.utcnow()
+            for message in messages:
+                error, started, ended = results[message.id]
+                record_span("smtp.send", message.trace_parent, started, ended,
+                            error=str(error) or type(error).__name__ if error else None,
+                            message_id=message.id, attempt=message.attempts)
+                if error is None:
+                    mark_outbox_sent(db, message, finished_at)
+                    continue
+                retry_at = None
+                if is_transient_smtp_error(error) and message.attempts < message.max_attempts:
+                    retry_at = finished_at + timedelta(seconds=retry_delay(message.attempts))
+                logger.warning(
+                    f"Outbox message {message.id} attempt {message.attempts} failed: {error}"
+                    + (f"; retrying at {retry_at}" if retry_at else "; giving up"))
+                mark_outbox_failed(db, message, str(error) or type(error).__name__, retry_at)
+            await db.commit()
+            return True
+
+
+outbox_sender = OutboxSender()
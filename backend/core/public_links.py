@@ -0,0 +1,50 @@
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+from core.cache import MISSING, TTLCache, make_etag
+from core.config import PUBLIC_LINKS_CACHE_SIZE, PUBLIC_LINKS_CACHE_TTL_SECONDS
+
+
+class CachedPage(NamedTuple):
+    body: bytes
+    etag: str
+    has_more: bool
+
+
+# (generation, offset, limit) -> CachedPage of the rendered /public/scheduling-links response
+public_links_cache = TTLCache("public_links", maxsize=PUBLIC_LINKS_CACHE_SIZE, ttl=PUBLIC_LINKS_CACHE_TTL_SECONDS)
+
+# Bumped on every invalidation, so a page rendered from data read before a
+# change can never be cached after it
+_generation = 0
+
+
+def current_generation() -> int:
+    return _generation
+
+
+def get_cached_page(offset: int, limit: int) -> Optional[CachedPage]:
+    cached = public_links_cache.get((_generation, offset, limit))
+    return None if cached is MISSING else cached
+
+
+def cache_page(generation: int, offset: int, limit: int, body: bytes, has_more: bool,
+               expires_at: Optional[datetime] = None) -> CachedPage:
+    """
+    Cache a page rendered from data read at `generation`, keeping it no
+    longer than the first link on it expires.
+    """
+    page = CachedPage(body, make_etag(body), has_more)
+    ttl = PUBLIC_LINKS_CACHE_TTL_SECONDS
+    if expires_at is not None:
+        ttl = min(ttl, (expires_at - datetime.utcnow()).total_seconds())
+    if generation == _generation:
+        public_links_cache.set((generation, offset, limit), page, ttl=ttl)
+    return page
+
+
+def invalidate_public_links():
+    """Call after any committed change to scheduling links."""
+    global _generation
+    _generation += 1
+    public_links_cache.clear()
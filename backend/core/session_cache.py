@@ -0,0 +1,36 @@
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+from core.cache import MISSING, TTLCache
+from core.config import SESSION_CACHE_SIZE, SESSION_CACHE_TTL_SECONDS
+from schemas.user import User
+
+
+class CachedSession(NamedTuple):
+    user: User
+    access_token: Optional[str]
+    expires_at: datetime
+
+
+# session_token -> CachedSession
+session_cache = TTLCache("sessions", maxsize=SESSION_CACHE_SIZE, ttl=SESSION_CACHE_TTL_SECONDS)
+
+
+def get_cached_session(session_token: str) -> Optional[CachedSession]:
+    cached = session_cache.get(session_token)
+    if cached is MISSING:
+        return None
+    if cached.expires_at < datetime.utcnow():
+        session_cache.invalidate(session_token)
+        return None
+    return cached
+
+
+def cache_session(session_token: str, user: User, access_token: Optional[str], expires_at: datetime):
+    """Cache a resolved session, never past the session's own expiry."""
+    ttl = min(SESSION_CACHE_TTL_SECONDS, (expires_at - datetime.utcnow()).total_seconds())
+    session_cache.set(session_token, CachedSession(user, access_token, expires_at), ttl=ttl)
+
+
+def invalidate_session(session_token: str):
+    session_cache.invalidate(session_token)
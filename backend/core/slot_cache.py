@@ -0,0 +1,82 @@
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.cache import MISSING, TTLCache
+from core.config import SLOT_CACHE_SIZE, SLOT_CACHE_TTL_SECONDS
+
+# (advisor_id, link_id, "YYYY-MM-DD") -> ["HH:MM", ...] computed for the whole day.
+# Slots already in the past are filtered out when serving, not when caching.
+slot_cache = TTLCache("slots", maxsize=SLOT_CACHE_SIZE, ttl=SLOT_CACHE_TTL_SECONDS)
+
+# Bumped per advisor on every invalidation, so slots computed from data read
+# before a change can never be cached after it
+_generations: Dict[int, int] = {}
+
+
+def slot_generation(advisor_id: int) -> int:
+    return _generations.get(advisor_id, 0)
+
+
+def get_cached_days(advisor_id: int, link_id: str, days: Iterable[str]) -> Optional[Dict[str, List[str]]]:
+    """All of the requested days' slots, or None if any day is missing."""
+    cached = {}
+    for day in days:
+        slots = slot_cache.get((advisor_id, link_id, day))
+        if slots is MISSING:
+            return None
+        cached[day] = slots
+    return cached
+
+
+def cache_days(generation: int, advisor_id: int, link_id: str, slots_by_day: Dict[str, List[str]]):
+    if generation != slot_generation(advisor_id):
+        return
+    for day, slots in slots_by_day.items():
+        slot_cache.set((advisor_id, link_id, day), slots)
+
+
+def invalidate_advisor_slots(advisor_id: int, start: Optional[datetime] = None, end: Optional[datetime] = None):
+    """
+    Drop an advisor's cached slots for every link, limited to the days
+    touched by [start, end] when given.
+    """
+    _generations[advisor_id] = slot_generation(advisor_id) + 1
+    days = None
+    if start is not None and end is not None:
+        days = set()
+        day = start.date()
+        while day <= end.date():
+            days.add(day.isoformat())
+            day += timedelta(days=1)
+    slot_cache.invalidate_where(
+        lambda key: key[0] == advisor_id and (days is None or key[2] in days))
+
+
+def invalidate_advisor_slots_on_commit(db: AsyncSession, advisor_id: int, start: Optional[datetime] = None,
+                                       end: Optional[datetime] = None):
+    """
+    For write paths that leave the commit to the caller. Whichever of commit
+    and rollback ends the transaction first decides: a rolled-back change
+    drops nothing, then or at the session's next commit.
+    """
+    settled = False
+
+    def on_commit(session):
+        nonlocal settled
+        if not settled:
+            settled = True
+            invalidate_advisor_slots(advisor_id, start, end)
+
+    def on_rollback(session):
+        nonlocal settled
+        settled = True
+
+    event.listen(db.sync_session, "after_commit", on_commit, once=True)
+    event.listen(db.sync_session, "after_rollback", on_rollback, once=True)
+
+
+def horizon_days(first_day: date, days: int) -> List[str]:
+    return [(first_day + timedelta(days=i)).isoformat() for i in range(days + 1)]
@@ -0,0 +1,371 @@
+"""
+Lightweight span tracing.
+
+The current span lives in a context variable, so spans nest across awaits
+without being passed around. A trace is started explicitly (per request by
+TracingMiddleware, per background job); span() and @traced are no-ops
+outside one, so scripts and benchmarks pay nothing.
+Finished traces go to an in-memory ring buffer, served slowest first by the
+admin endpoint, and optionally to an OTLP/HTTP collector as JSON.
+
+Work that continues in the background carries the W3C traceparent of the
+span that queued it (in the job payload, on the outbox row), so the
+booking's request, enrichment job and email share one trace id.
+"""
+import asyncio
+import functools
+import logging
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import httpx
+
+from core.config import (
+    TRACE_BUFFER_SIZE,
+    TRACE_EXPORT_INTERVAL_SECONDS,
+    TRACE_EXPORT_URL,
+    TRACE_MAX_SPANS,
+    TRACING_ENABLED,
+)
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "calendar-scheduling-backend"
+
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, trace: "_Trace", name: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.trace = trace
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    @property
+    def trace_id(self) -> str:
+        return self.trace.trace_id
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+
+class _Trace:
+    """The spans recorded under one local root span (one segment of a trace)."""
+    __slots__ = ("trace_id", "spans", "dropped")
+
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.spans: List[Span] = []
+        self.dropped = 0
+
+
+_current: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+_finished: Deque[List[Span]] = deque(maxlen=TRACE_BUFFER_SIZE)
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def set_attribute(key: str, value: Any):
+    """Annotate the current span, if any."""
+    span = _current.get()
+    if span is not None:
+        span.set_attribute(key, value)
+
+
+def current_traceparent() -> Optional[str]:
+    """The W3C traceparent of the current span, to hand to work that runs later."""
+    span = _current.get()
+    return span.traceparent() if span is not None else None
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[Tuple[str, str]]:
+    """(trace_id, parent span id) from a traceparent header, or None if malformed."""
+    parts = (value or "").split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        int(parts[1], 16), int(parts[2], 16)
+    except ValueError:
+        return None
+    return parts[1], parts[2]
+
+
+@contextmanager
+def span(name: str, root: bool = False, traceparent: Optional[str] = None, **attributes: Any):
+    """
+    Time the enclosed block as a child of the current span. With root=True a
+    new trace starts (continuing `traceparent` when given) if none is active.
+    Yields the span, or None when nothing is being traced.
+    """
+    parent = _current.get()
+    if parent is not None:
+        trace, parent_id = parent.trace, parent.span_id
+    elif root and TRACING_ENABLED:
+        remote = parse_traceparent(traceparent)
+        trace = _Trace(remote[0] if remote else os.urandom(16).hex())
+        parent_id = remote[1] if remote else None
+    else:
+        yield None
+        return
+    if len(trace.spans) >= TRACE_MAX_SPANS:
+        trace.dropped += 1
+        yield None
+        return
+
+    current = Span(trace, name, parent_id, attributes)
+    trace.spans.append(current)
+    token = _current.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = str(e) or type(e).__name__
+        raise
+    finally:
+        current.end_ns = time.time_ns()
+        _current.reset(token)
+        if parent is None:
+            _finish(trace)
+
+
+def record_span(name: str, traceparent: Optional[str], start_ns: int, end_ns: int,
+                error: Optional[str] = None, **attributes: Any):
+    """
+    Record an already finished span as its own segment of the trace named by
+    traceparent, for work timed where no trace was active (worker threads).
+    """
+    remote = parse_traceparent(traceparent)
+    if remote is None or not TRACING_ENABLED:
+        return
+    trace = _Trace(remote[0])
+    finished = Span(trace, name, remote[1], attributes)
+    finished.start_ns, finished.end_ns, finished.error = start_ns, end_ns, error
+    trace.spans.append(finished)
+    _finish(trace)
+
+
+def traced(name: Optional[str] = None):
+    """Decorator: run an async function inside span(name), named after the function by default."""
+    def decorator(func):
+        span_name = name or f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            if _current.get() is None:
+                return await func(*args, **kwargs)
+            with span(span_name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _finish(trace: _Trace):
+    if trace.dropped:
+        trace.spans[0].attributes["spans.dropped"] = trace.dropped
+    _finished.append(trace.spans)
+    if trace_exporter.enabled:
+        trace_exporter.add(trace.spans)
+
+
+def _group_by_trace() -> Dict[str, List[Span]]:
+    traces: Dict[str, List[Span]] = {}
+    for spans in list(_finished):
+        traces.setdefault(spans[0].trace_id, []).extend(spans)
+    return traces
+
+
+def _trace_bounds(spans: List[Span]) -> Tuple[int, int]:
+    return min(s.start_ns for s in spans), max(s.end_ns or s.start_ns for s in spans)
+
+
+def _trace_duration(spans: List[Span]) -> int:
+    start, end = _trace_bounds(spans)
+    return end - start
+
+
+def slowest_traces(limit: int = 10, name: Optional[str] = None) -> List[List[Span]]:
+    """
+    The slowest recent traces, each with all of its segments (request, job,
+    email). `name` keeps only traces whose first span has that name, e.g.
+    "POST /api/schedule/{link_id}/book".
+    """
+    traces = list(_group_by_trace().values())
+    if name:
+        traces = [spans for spans in traces if spans[0].name == name]
+    traces.sort(key=_trace_duration, reverse=True)
+    return traces[:limit]
+
+
+def get_trace(trace_id: str) -> List[Span]:
+    return _group_by_trace().get(trace_id, [])
+
+
+def waterfall(spans: List[Span], width: int = 40) -> Dict[str, Any]:
+    """A trace as rows ordered parent before child, with offsets from the trace start."""
+    start, end = _trace_bounds(spans)
+    total = max(end - start, 1)
+    children: Dict[Optional[str], List[Span]] = {}
+    ids = {s.span_id for s in spans}
+    for s in sorted(spans, key=lambda s: s.start_ns):
+        # Segments continued from elsewhere hang off a span we may not hold
+        children.setdefault(s.parent_id if s.parent_id in ids else None, []).append(s)
+
+    rows = []
+
+    def walk(parent_id: Optional[str], depth: int):
+        for s in children.get(parent_id, []):
+            offset = s.start_ns - start
+            duration = (s.end_ns or s.start_ns) - s.start_ns
+            first = int(offset / total * width)
+            bar = " " * first + "#" * max(int(duration / total * width), 1)
+            rows.append({
+                "name": s.name,
+                "span_id": s.span_id,
+                "depth": depth,
+                "offset_ms": round(offset / 1e6, 2),
+                "duration_ms": round(duration / 1e6, 2),
+                "bar": bar[:width].ljust(width),
+                "error": s.error,
+                "attributes": s.attributes,
+            })
+            walk(s.span_id, depth + 1)
+
+    walk(None, 0)
+    return {
+        "trace_id": spans[0].trace_id,
+        "name": spans[0].name,
+        "duration_ms": round(total / 1e6, 2),
+        "spans": rows,
+    }
+
+
+def format_waterfall(trace: Dict[str, Any]) -> str:
+    lines = [f"trace {trace['trace_id']}  {trace['name']}  {trace['duration_ms']:.1f} ms"]
+    for row in trace["spans"]:
+        error = f"  ERROR {row['error']}" if row["error"] else ""
+        lines.append(f"{row['offset_ms']:10.1f} ms |{row['bar']}| {row['duration_ms']:9.1f} ms  "
+                     f"{'  ' * row['depth']}{row['name']}{error}")
+    return "\n".join(lines)
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp(spans: List[Span]) -> Dict[str, Any]:
+    """Spans as an OTLP/JSON ExportTraceServiceRequest body."""
+    return {"resourceSpans": [{
+        "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+        "scopeSpans": [{
+            "scope": {"name": __name__},
+            "spans": [{
+                "traceId": s.trace_id,
+                "spanId": s.span_id,
+                **({"parentSpanId": s.parent_id} if s.parent_id else {}),
+                "name": s.name,
+                # SPAN_KIND_SERVER for the roots, SPAN_KIND_INTERNAL otherwise
+                "kind": 2 if s.parent_id is None else 1,
+                "startTimeUnixNano": str(s.start_ns),
+                "endTimeUnixNano": str(s.end_ns or s.start_ns),
+                "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in s.attributes.items()],
+                "status": {"code": 2, "message": s.error} if s.error else {"code": 1},
+            } for s in spans],
+        }],
+    }]}
+
+
+class TraceExporter:
+    """Posts finished traces to TRACE_EXPORT_URL (an OTLP/HTTP JSON endpoint) in batches."""
+
+    def __init__(self, url: Optional[str] = TRACE_EXPORT_URL, interval: float = TRACE_EXPORT_INTERVAL_SECONDS):
+        self.url = url
+        self.interval = interval
+        self.enabled = False
+        self._pending: Deque[Span] = deque(maxlen=TRACE_BUFFER_SIZE * 20)
+        self._task: Optional[asyncio.Task] = None
+
+    def add(self, spans: List[Span]):
+        self._pending.extend(spans)
+
+    async def start(self):
+        if self.url and TRACING_ENABLED and self._task is None:
+            self.enabled = True
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        task, self._task = self._task, None
+        self.enabled = False
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def _run(self):
+        async with httpx.AsyncClient(timeout=10) as client:
+            try:
+                while True:
+                    await asyncio.sleep(self.interval)
+                    await self.flush(client)
+            finally:
+                await asyncio.shield(self.flush(client))
+
+    async def flush(self, client: httpx.AsyncClient):
+        spans = list(self._pending)
+        self._pending.clear()
+        if not spans:
+            return
+        try:
+            response = await client.post(self.url, json=to_otlp(spans))
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            logger.warning(f"Could not export {len(spans)} spans: {e}")
+
+
+trace_exporter = TraceExporter()
+
+
+class TracingMiddleware:
+    """Starts a trace per HTTP request, named after the matched route once routing is done."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        headers = dict(scope.get("headers") or [])
+        traceparent = headers.get(b"traceparent", b"").decode("latin-1") or None
+        with span(f"{scope['method']} {scope['path']}", root=True, traceparent=traceparent) as root:
+            async def send_wrapper(message):
+                if root is not None and message["type"] == "http.response.start":
+                    root.set_attribute("http.status_code", message["status"])
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = scope.get("route")
+                if root is not None and route is not None:
+                    root.name = f"{scope['method']} {route.path}"
@@ -1,32 +1,36 @@
-from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from db.models import ConnectedGoogleAccount
 from schemas.calendar import ConnectedGoogleAccountCreate
+from core.tracing import traced
 
-def get_connected_accounts_by_user_id(
-        db: Session,
+@traced()
+async def get_connected_accounts_by_user_id(
+        db: AsyncSession,
         user_id: int
 ):
-    return db.query(ConnectedGoogleAccount).filter(
+    return (await db.scalars(select(ConnectedGoogleAccount).where(
         ConnectedGoogleAccount.user_id == user_id
-    ).all()
+    ))).all()
 
-def get_connected_account_by_google_account_id(
-        db: Session,
+@traced()
+async def get_connected_account_by_google_account_id(
+        db: AsyncSession,
         google_account_id: str,
         user_id = None
 ):
+    query = select(ConnectedGoogleAccount).where(
+        ConnectedGoogleAccount.google_account_id == google_account_id
+    )
     if user_id:
-        return db.query(ConnectedGoogleAccount).filter(
-            ConnectedGoogleAccount.google_account_id == google_account_id,
-            ConnectedGoogleAccount.user_id == user_id
-        ).first()
-    else:
-        return db.query(ConnectedGoogleAccount).filter(
-            ConnectedGoogleAccount.google_account_id == google_account_id
-        ).first()
+        query = query.where(ConnectedGoogleAccount.user_id == user_id)
+    return await db.scalar(query.limit(1))
 
-def create_connected_account(
-        db: Session,
+@traced()
+async def create_connected_account(
+        db: AsyncSession,
         connected_account: ConnectedGoogleAccountCreate,
         user_id: int
 ):
@@ -35,6 +39,7 @@ def create_connected_account(
         google_account_id=connected_account.google_account_id,
         access_token=connected_account.access_token,
         refresh_token=connected_account.refresh_token,
+        token_expires_at=connected_account.token_expires_at,
         email=connected_account.email,
         name=connected_account.name,
         picture=connected_account.picture,
@@ -43,6 +48,22 @@ def create_connected_account(
         hd=connected_account.hd
     )
     db.add(db_connected_account)
-    db.commit()
-    db.refresh(db_connected_account)
-    return db_connected_account
\ No newline at end of file
+    await db.commit()
+    await db.refresh(db_connected_account)
+    return db_connected_account
+
+@traced()
+async def update_connected_account_tokens(
+        db: AsyncSession,
+        account_id: int,
+        access_token: str,
+        expires_at: Optional[datetime],
+        refresh_token: Optional[str] = None
+):
+    """Store a new access token (and refresh token, if one was issued); the caller commits."""
+    values = {"access_token": access_token, "token_expires_at": expires_at}
+    if refresh_token:
+        values["refresh_token"] = refresh_token
+    await db.execute(update(ConnectedGoogleAccount).where(
+        ConnectedGoogleAccount.id == account_id
+    ).values(**values))
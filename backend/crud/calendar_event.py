@@ -0,0 +1,113 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from db.models import CalendarEvent, CalendarSyncState, ConnectedGoogleAccount
+from core.slot_cache import invalidate_advisor_slots_on_commit
+from core.tracing import traced
+
+@traced()
+async def get_sync_state(db: AsyncSession, account_id: int):
+    return await db.scalar(select(CalendarSyncState).where(CalendarSyncState.account_id == account_id).limit(1))
+
+@traced()
+async def get_sync_tokens(db: AsyncSession, account_ids: List[int]) -> Dict[int, str]:
+    if not account_ids:
+        return {}
+    rows = (await db.execute(select(CalendarSyncState.account_id, CalendarSyncState.sync_token).where(
+        CalendarSyncState.account_id.in_(account_ids)
+    ))).all()
+    return {account_id: sync_token for account_id, sync_token in rows if sync_token}
+
+@traced()
+async def save_sync_state(db: AsyncSession, account_id: int, sync_token: Optional[str], full_sync: bool = False):
+    state = await get_sync_state(db, account_id)
+    if not state:
+        state = CalendarSyncState(account_id=account_id)
+        db.add(state)
+    now = datetime.utcnow()
+    state.sync_token = sync_token
+    state.last_synced_at = now
+    if full_sync:
+        state.full_synced_at = now
+    return state
+
+@traced()
+async def get_recently_synced_account_ids(db: AsyncSession, account_ids: List[int], since: datetime) -> Set[int]:
+    if not account_ids:
+        return set()
+    rows = await db.scalars(select(CalendarSyncState.account_id).where(
+        CalendarSyncState.account_id.in_(account_ids),
+        CalendarSyncState.last_synced_at >= since
+    ))
+    return set(rows)
+
+@traced()
+async def invalidate_account_slots_on_commit(db: AsyncSession, account_id: int):
+    """Busy time changed for this account; drop its advisor's cached slots once committed."""
+    advisor_id = await db.scalar(select(ConnectedGoogleAccount.user_id).where(ConnectedGoogleAccount.id == account_id))
+    if advisor_id is not None:
+        invalidate_advisor_slots_on_commit(db, advisor_id)
+
+@traced()
+async def clear_calendar_events(db: AsyncSession, account_id: int):
+    await db.execute(delete(CalendarEvent).where(
+        CalendarEvent.account_id == account_id
+    ).execution_options(synchronize_session=False))
+    await invalidate_account_slots_on_commit(db, account_id)
+
+@traced()
+async def apply_calendar_event_changes(db: AsyncSession, account_id: int, changes: List[Dict[str, Any]]):
+    """
+    Upsert or delete stored events from a list of change dicts with keys
+    event_id, status, transparency, start_time, end_time and data.
+    Cancelled events are removed. Does not commit.
+    """
+    if not changes:
+        return
+    await invalidate_account_slots_on_commit(db, account_id)
+    event_ids = [c["event_id"] for c in changes]
+    existing = {
+        e.event_id: e for e in await db.scalars(select(CalendarEvent).where(
+            CalendarEvent.account_id == account_id,
+            CalendarEvent.event_id.in_(event_ids)
+        ))
+    }
+    for change in changes:
+        event = existing.get(change["event_id"])
+        if change["status"] == "cancelled":
+            if event:
+                await db.delete(event)
+                existing.pop(change["event_id"])
+            continue
+        if not event:
+            event = CalendarEvent(account_id=account_id, event_id=change["event_id"])
+            db.add(event)
+            existing[change["event_id"]] = event
+        event.status = change["status"]
+        event.transparency = change["transparency"]
+        event.start_time = change["start_time"]
+        event.end_time = change["end_time"]
+        event.data = change["data"]
+
+@traced()
+async def get_calendar_events_by_account_id(db: AsyncSession, account_id: int, range_start: Optional[datetime] = None,
+                                            range_end: Optional[datetime] = None):
+    """The account's stored events, by start time; a range keeps the ones overlapping it."""
+    query = select(CalendarEvent).where(CalendarEvent.account_id == account_id)
+    if range_start is not None:
+        query = query.where(CalendarEvent.end_time > range_start)
+    if range_end is not None:
+        query = query.where(CalendarEvent.start_time < range_end)
+    return (await db.scalars(query.order_by(CalendarEvent.start_time))).all()
+
+@traced()
+async def get_busy_intervals_in_range(db: AsyncSession, account_ids: List[int], range_start, range_end):
+    if not account_ids:
+        return []
+    return (await db.execute(select(CalendarEvent.start_time, CalendarEvent.end_time).where(
+        CalendarEvent.account_id.in_(account_ids),
+        CalendarEvent.start_time < range_end,
+        CalendarEvent.end_time > range_start,
+        CalendarEvent.transparency.is_distinct_from("transparent")
+    ))).all()
@@ -0,0 +1,52 @@
+from datetime import datetime
+from typing import List, Set
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from db.models import CalendarWatchChannel, ConnectedGoogleAccount
+from core.tracing import traced
+
+def create_watch_channel(db: AsyncSession, account_id: int, channel_id: str, resource_id: str, token: str, expiration: datetime):
+    """Add a channel to the session. The caller commits."""
+    channel = CalendarWatchChannel(
+        account_id=account_id,
+        channel_id=channel_id,
+        resource_id=resource_id,
+        token=token,
+        expiration=expiration,
+    )
+    db.add(channel)
+    return channel
+
+@traced()
+async def get_watch_channel(db: AsyncSession, channel_id: str):
+    return await db.scalar(select(CalendarWatchChannel).where(CalendarWatchChannel.channel_id == channel_id).limit(1))
+
+@traced()
+async def get_accounts_needing_watch(db: AsyncSession, expiring_before: datetime) -> List[ConnectedGoogleAccount]:
+    """Accounts with no channel that lasts past expiring_before: never watched, or due for renewal."""
+    covered = select(CalendarWatchChannel.account_id).where(CalendarWatchChannel.expiration > expiring_before)
+    return (await db.scalars(select(ConnectedGoogleAccount).where(
+        ConnectedGoogleAccount.id.not_in(covered)
+    ))).all()
+
+@traced()
+async def get_account_watch_channels(db: AsyncSession, account_id: int) -> List[CalendarWatchChannel]:
+    return (await db.scalars(select(CalendarWatchChannel).where(
+        CalendarWatchChannel.account_id == account_id
+    ))).all()
+
+@traced()
+async def delete_watch_channel(db: AsyncSession, channel_id: str):
+    """Remove a channel row. The caller commits."""
+    await db.execute(delete(CalendarWatchChannel).where(CalendarWatchChannel.channel_id == channel_id))
+
+@traced()
+async def get_watched_account_ids(db: AsyncSession, account_ids: List[int], now: datetime) -> Set[int]:
+    """The accounts among account_ids with a channel that has not expired."""
+    if not account_ids:
+        return set()
+    rows = await db.scalars(select(CalendarWatchChannel.account_id).where(
+        CalendarWatchChannel.account_id.in_(account_ids),
+        CalendarWatchChannel.expiration > now
+    ))
+    return set(rows)
@@ -1,8 +1,12 @@
-from sqlalchemy.orm import Session
+from typing import Optional
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from db.models import HubspotConnection
 from datetime import datetime
+from core.tracing import traced
 
-def create_hubspot_connection(db: Session, user_id: int, access_token: str, refresh_token: str, expires_at: datetime, portal_id: str):
+@traced()
+async def create_hubspot_connection(db: AsyncSession, user_id: int, access_token: str, refresh_token: str, expires_at: datetime, portal_id: str):
     connection = HubspotConnection(
         user_id=user_id,
         access_token=access_token,
@@ -11,17 +15,27 @@ def create_hubspot_connection(db: Session, user_id: int, access_token: str, refr
         portal_id=portal_id,
     )
     db.add(connection)
-    db.commit()
-    db.refresh(connection)
+    await db.commit()
+    await db.refresh(connection)
     return connection
 
-def get_hubspot_connection_by_user_id(db: Session, user_id: int):
-    return db.query(HubspotConnection).filter(HubspotConnection.user_id == user_id).first()
+@traced()
+async def get_hubspot_connection_by_user_id(db: AsyncSession, user_id: int):
+    return await db.scalar(select(HubspotConnection).where(HubspotConnection.user_id == user_id).limit(1))
 
-def delete_hubspot_connection_by_user_id(db: Session, user_id: int):
-    connection = db.query(HubspotConnection).filter(HubspotConnection.user_id == user_id).first()
+@traced()
+async def delete_hubspot_connection_by_user_id(db: AsyncSession, user_id: int):
+    connection = await get_hubspot_connection_by_user_id(db, user_id)
     if connection:
-        db.delete(connection)
-        db.commit()
+        await db.delete(connection)
+        await db.commit()
         return True
-    return False 
\ No newline at end of file
+    return False
+
+@traced()
+async def update_hubspot_tokens(db: AsyncSession, connection_id: int, access_token: str, expires_at: datetime, refresh_token: Optional[str] = None):
+    """Store a refreshed access token (and refresh token, if one was issued); the caller commits."""
+    values = {"access_token": access_token, "expires_at": expires_at}
+    if refresh_token:
+        values["refresh_token"] = refresh_token
+    await db.execute(update(HubspotConnection).where(HubspotConnection.id == connection_id).values(**values))
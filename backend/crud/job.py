@@ -0,0 +1,115 @@
+from datetime import datetime
+from typing import Any, Dict, Optional
+from sqlalchemy import case, insert, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from db.models import BackgroundJob
+from core.tracing import traced
+
+def create_job(db: AsyncSession, kind: str, payload: Dict[str, Any], max_attempts: int, run_at: Optional[datetime] = None):
+    """Add a pending job to the session. The caller commits."""
+    job = BackgroundJob(
+        kind=kind,
+        payload=payload,
+        status="pending",
+        attempts=0,
+        max_attempts=max_attempts,
+        run_at=run_at or datetime.utcnow(),
+    )
+    db.add(job)
+    return job
+
+@traced()
+async def create_job_unless_pending(db: AsyncSession, kind: str, payload: Dict[str, Any], key: str, max_attempts: int,
+                                    run_at: Optional[datetime] = None) -> bool:
+    """
+    Insert a pending job unless a job of this kind with the same payload[key]
+    is still waiting to run, and return whether it was inserted. The check
+    and the insert are one INSERT ... SELECT guarded by NOT EXISTS, so
+    concurrent callers cannot both queue one, in this process or another.
+    The caller commits.
+    """
+    now = datetime.utcnow()
+    values = {
+        "kind": kind,
+        "payload": payload,
+        "status": "pending",
+        "attempts": 0,
+        "max_attempts": max_attempts,
+        "run_at": run_at or now,
+        "created_at": now,
+        "updated_at": now,
+    }
+    pending = select(BackgroundJob.id).where(
+        BackgroundJob.kind == kind,
+        BackgroundJob.status == "pending",
+        BackgroundJob.payload[key].as_integer() == payload[key]
+    ).exists()
+    columns = BackgroundJob.__table__.c
+    result = await db.execute(
+        insert(BackgroundJob).from_select(
+            list(values),
+            select(*(literal(v, columns[k].type) for k, v in values.items())).where(~pending)
+        )
+    )
+    return bool(result.rowcount)
+
+@traced()
+async def claim_next_job(db: AsyncSession, now: datetime):
+    """
+    Atomically move the oldest due pending job to running and return it.
+    The conditional UPDATE makes sure two workers never claim the same job.
+    """
+    while True:
+        job_id = await db.scalar(select(BackgroundJob.id).where(
+            BackgroundJob.status == "pending",
+            BackgroundJob.run_at <= now
+        ).order_by(BackgroundJob.run_at, BackgroundJob.id).limit(1))
+        if job_id is None:
+            return None
+        claimed = (await db.execute(update(BackgroundJob).where(
+            BackgroundJob.id == job_id,
+            BackgroundJob.status == "pending"
+        ).values(
+            status="running",
+            locked_at=now,
+            attempts=BackgroundJob.attempts + 1,
+        ).execution_options(synchronize_session=False))).rowcount
+        await db.commit()
+        if claimed:
+            return await db.get(BackgroundJob, job_id, populate_existing=True)
+
+@traced()
+async def complete_job(db: AsyncSession, job: BackgroundJob):
+    job.status = "done"
+    job.locked_at = None
+    job.last_error = None
+    await db.commit()
+
+@traced()
+async def fail_job(db: AsyncSession, job: BackgroundJob, error: str, retry_at: Optional[datetime]):
+    """Schedule a retry at retry_at, or mark the job failed for good if it is None."""
+    job.status = "pending" if retry_at else "failed"
+    job.run_at = retry_at or job.run_at
+    job.locked_at = None
+    job.last_error = error
+    await db.commit()
+
+@traced()
+async def requeue_stale_jobs(db: AsyncSession, locked_before: datetime):
+    """
+    Put jobs that were running when a worker died back in the queue. Jobs
+    out of attempts are marked failed instead, so one that keeps killing its
+    worker is not retried forever.
+    """
+    count = (await db.execute(update(BackgroundJob).where(
+        BackgroundJob.status == "running",
+        BackgroundJob.locked_at < locked_before
+    ).values(
+        status=case((BackgroundJob.attempts >= BackgroundJob.max_attempts, "failed"), else_="pending"),
+        locked_at=None,
+        last_error=case(
+            (BackgroundJob.attempts >= BackgroundJob.max_attempts, "Worker stopped while running the job"),
+            else_=BackgroundJob.last_error),
+    ).execution_options(synchronize_session=False))).rowcount
+    await db.commit()
+    return count
@@ -1,7 +1,15 @@
-from db.models import Meeting
-from sqlalchemy.orm import Session
+from datetime import datetime
+from db.models import Meeting, SchedulingLink
+from core.availability import to_naive_utc
+from core.database import close_failed_cursors
+from core.slot_cache import invalidate_advisor_slots, invalidate_advisor_slots_on_commit
+from sqlalchemy import insert, literal, or_, select, tuple_, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.tracing import traced
 
-def create_meeting(db: Session, advisor_id: int, link_id: str, start_time, end_time, client_email, client_linkedin, answers, linkedin_summary=None, augmented_notes=None):
+@traced()
+async def create_meeting(db: AsyncSession, advisor_id: int, link_id: str, start_time, end_time, client_email, client_linkedin, answers, linkedin_summary=None, augmented_notes=None):
     meeting = Meeting(
         advisor_id=advisor_id,
         link_id=link_id,
@@ -14,21 +22,122 @@ def create_meeting(db: Session, advisor_id: int, link_id: str, start_time, end_t
         augmented_notes=augmented_notes
     )
     db.add(meeting)
-    db.commit()
-    db.refresh(meeting)
+    await db.commit()
+    invalidate_advisor_slots(advisor_id, start_time, end_time)
+    await db.refresh(meeting)
     return meeting
 
-def is_time_slot_available(db: Session, link_id: str, start_time, end_time):
-    print(f"Checking if time slot is available for link_id: {link_id}, start_time: {start_time}, end_time: {end_time}")
-    # Check for overlapping meetings
-    return not db.query(Meeting).filter(
-        Meeting.link_id == link_id,
-        Meeting.start_time < end_time,
-        Meeting.end_time > start_time
-    ).first()
+class BookingConflict(Exception):
+    """The booking could not be made; `detail` is safe to show to the client."""
+    detail = "This booking could not be completed."
 
-def get_meetings_by_advisor_id(db: Session, advisor_id: int):
-    return db.query(Meeting).filter(Meeting.advisor_id == advisor_id).order_by(Meeting.start_time.desc()).all()
+class UsageLimitReached(BookingConflict):
+    detail = "This scheduling link has reached its usage limit."
 
-def get_meeting_by_id(db: Session, meeting_id: int):
-    return db.query(Meeting).filter(Meeting.id == meeting_id).first()
\ No newline at end of file
+class SlotUnavailable(BookingConflict):
+    detail = "Time slot is no longer available."
+
+class BookingBusy(BookingConflict):
+    detail = "Too many bookings in progress, please try again."
+
+@traced()
+async def book_time_slot(db: AsyncSession, advisor_id: int, link_id: str, start_time, end_time, client_email, client_linkedin, answers):
+    """
+    Book a meeting atomically and return its id, or raise a BookingConflict.
+
+    Within one transaction the link's usage_limit is decremented with a
+    conditional UPDATE (NULL means unlimited and stays NULL), then the meeting
+    is inserted only if none of the advisor's meetings overlap it, across all
+    of their links. On SQLite the first UPDATE takes the database write lock,
+    so the overlap check and insert cannot interleave with another booking.
+    The caller may add more work (e.g. jobs) to the transaction and commits.
+    """
+    start_time = to_naive_utc(start_time)
+    end_time = to_naive_utc(end_time)
+    try:
+        decremented = (await db.execute(
+            update(SchedulingLink).where(
+                SchedulingLink.link_id == link_id,
+                or_(SchedulingLink.usage_limit.is_(None), SchedulingLink.usage_limit > 0)
+            ).values(usage_limit=SchedulingLink.usage_limit - 1)
+        )).rowcount
+        if not decremented:
+            raise UsageLimitReached()
+
+        values = {
+            "advisor_id": advisor_id,
+            "link_id": link_id,
+            "start_time": start_time,
+            "end_time": end_time,
+            "client_email": client_email,
+            "client_linkedin": client_linkedin,
+            "answers": answers,
+            "created_at": datetime.utcnow(),
+        }
+        overlapping = select(Meeting.id).where(
+            Meeting.advisor_id == advisor_id,
+            Meeting.start_time < end_time,
+            Meeting.end_time > start_time
+        ).exists()
+        columns = Meeting.__table__.c
+        result = await db.execute(
+            insert(Meeting).from_select(
+                list(values),
+                select(*(literal(v, columns[k].type) for k, v in values.items())).where(~overlapping)
+            )
+        )
+        if not result.rowcount:
+            raise SlotUnavailable()
+        invalidate_advisor_slots_on_commit(db, advisor_id, start_time, end_time)
+        return result.lastrowid
+    except BookingConflict:
+        await db.rollback()
+        raise
+    except OperationalError as e:
+        # SQLite gave up waiting for the write lock (busy timeout)
+        await close_failed_cursors(e)
+        await db.rollback()
+        if "locked" in str(e):
+            raise BookingBusy() from e
+        raise
+
+@traced()
+async def get_meeting_intervals_in_range(db: AsyncSession, advisor_id: int, range_start, range_end):
+    # One bounded range query; only the columns the availability engine needs
+    return (await db.execute(select(Meeting.start_time, Meeting.end_time).where(
+        Meeting.advisor_id == advisor_id,
+        Meeting.start_time < range_end,
+        Meeting.end_time > range_start
+    ))).all()
+
+MEETING_SUMMARY_COLUMNS = (
+    Meeting.id,
+    Meeting.link_id,
+    Meeting.start_time,
+    Meeting.end_time,
+    Meeting.client_email,
+    Meeting.client_linkedin,
+)
+
+@traced()
+async def get_meetings_page(db: AsyncSession, advisor_id: int, limit: int, after=None, range_start=None, range_end=None):
+    """
+    One page of an advisor's meetings, newest first, without the answers
+    and AI text. `after` is the (start_time, id) of the last row of the
+    previous page; the range keeps meetings with range_start <= start_time
+    < range_end. Returns (rows, has_more).
+    """
+    query = select(*MEETING_SUMMARY_COLUMNS).where(Meeting.advisor_id == advisor_id)
+    if range_start is not None:
+        query = query.where(Meeting.start_time >= range_start)
+    if range_end is not None:
+        query = query.where(Meeting.start_time < range_end)
+    if after is not None:
+        # Row-value comparison, so SQLite seeks straight to the cursor in the index
+        query = query.where(tuple_(Meeting.start_time, Meeting.id) < tuple(after))
+    rows = (await db.execute(query.order_by(Meeting.start_time.desc(), Meeting.id.desc()).limit(limit + 1))).all()
+    return rows[:limit], len(rows) > limit
+
+@traced()
+async def get_meeting_by_id(db: AsyncSession, meeting_id: int):
+    return await db.get(Meeting, meeting_id)
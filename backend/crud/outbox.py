@@ -0,0 +1,78 @@
+from datetime import datetime
+from typing import Dict, Optional
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from db.models import OutboxMessage
+from core.tracing import traced
+
+def create_outbox_message(db: AsyncSession, to_email: str, subject: str, body: str, from_email: str, max_attempts: int, trace_parent: Optional[str] = None):
+    """Add a pending message to the session. The caller commits."""
+    message = OutboxMessage(
+        to_email=to_email,
+        from_email=from_email,
+        subject=subject,
+        body=body,
+        status="pending",
+        attempts=0,
+        max_attempts=max_attempts,
+        next_attempt_at=datetime.utcnow(),
+        trace_parent=trace_parent,
+    )
+    db.add(message)
+    return message
+
+@traced()
+async def claim_outbox_batch(db: AsyncSession, claim_id: str, now: datetime, limit: int):
+    """
+    Mark up to `limit` due messages as sending under claim_id and return them.
+    The conditional UPDATE keeps two senders from claiming the same message.
+    """
+    due_ids = (await db.scalars(select(OutboxMessage.id).where(
+        OutboxMessage.status == "pending",
+        OutboxMessage.next_attempt_at <= now
+    ).order_by(OutboxMessage.next_attempt_at, OutboxMessage.id).limit(limit))).all()
+    if not due_ids:
+        return []
+    await db.execute(update(OutboxMessage).where(
+        OutboxMessage.id.in_(due_ids),
+        OutboxMessage.status == "pending"
+    ).values(
+        status="sending",
+        claim_id=claim_id,
+        claimed_at=now,
+        attempts=OutboxMessage.attempts + 1,
+    ).execution_options(synchronize_session=False))
+    await db.commit()
+    return (await db.scalars(select(OutboxMessage).where(
+        OutboxMessage.claim_id == claim_id,
+        OutboxMessage.status == "sending"
+    ).order_by(OutboxMessage.id).execution_options(populate_existing=True))).all()
+
+def mark_outbox_sent(db: AsyncSession, message: OutboxMessage, sent_at: datetime):
+    message.status = "sent"
+    message.sent_at = sent_at
+    message.last_error = None
+
+def mark_outbox_failed(db: AsyncSession, message: OutboxMessage, error: str, retry_at=None):
+    """Schedule a retry at retry_at, or fail the message for good if it is None."""
+    message.status = "pending" if retry_at else "failed"
+    message.next_attempt_at = retry_at or message.next_attempt_at
+    message.last_error = error
+
+@traced()
+async def requeue_stale_outbox_messages(db: AsyncSession, claimed_before: datetime):
+    """Return messages left in 'sending' by a sender that died to the queue."""
+    count = (await db.execute(update(OutboxMessage).where(
+        OutboxMessage.status == "sending",
+        OutboxMessage.claimed_at < claimed_before
+    ).values(status="pending").execution_options(synchronize_session=False))).rowcount
+    await db.commit()
+    return count
+
+@traced()
+async def get_outbox_depth(db: AsyncSession) -> Dict[str, int]:
+    """Number of messages in each unfinished state."""
+    counts = dict((await db.execute(select(OutboxMessage.status, func.count(OutboxMessage.id)).where(
+        OutboxMessage.status.in_(("pending", "sending", "failed"))
+    ).group_by(OutboxMessage.status))).all())
+    return {status: counts.get(status, 0) for status in ("pending", "sending", "failed")}
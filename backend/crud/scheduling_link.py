@@ -1,9 +1,13 @@
-from sqlalchemy.orm import Session
-from db.models import SchedulingLink
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from db.models import SchedulingLink, User
+from core.public_links import invalidate_public_links
 from datetime import datetime
 from typing import List
+from core.tracing import traced
 
-def create_scheduling_link(db: Session, user_id: int, link_id: str, usage_limit: int, expiration_date: datetime, meeting_length: int, advance_schedule_days: int, questions: List[str]):
+@traced()
+async def create_scheduling_link(db: AsyncSession, user_id: int, link_id: str, usage_limit: int, expiration_date: datetime, meeting_length: int, advance_schedule_days: int, questions: List[str]):
     link = SchedulingLink(
         user_id=user_id,
         link_id=link_id,
@@ -14,9 +18,49 @@ def create_scheduling_link(db: Session, user_id: int, link_id: str, usage_limit:
         questions=questions,
     )
     db.add(link)
-    db.commit()
-    db.refresh(link)
+    await db.commit()
+    invalidate_public_links()
+    await db.refresh(link)
     return link
 
-def get_scheduling_links_by_user_id(db: Session, user_id: int):
-    return db.query(SchedulingLink).filter(SchedulingLink.user_id == user_id).order_by(SchedulingLink.created_at.desc()).all() 
\ No newline at end of file
+@traced()
+async def get_scheduling_links_by_user_id(db: AsyncSession, user_id: int):
+    return (await db.scalars(select(SchedulingLink).where(SchedulingLink.user_id == user_id).order_by(SchedulingLink.created_at.desc()))).all()
+
+@traced()
+async def get_scheduling_link_by_link_id(db: AsyncSession, link_id: str):
+    return await db.scalar(select(SchedulingLink).where(SchedulingLink.link_id == link_id).limit(1))
+
+def active_link_filter(now: datetime):
+    """Links that can still be booked: not expired and not used up."""
+    return and_(
+        or_(SchedulingLink.expiration_date.is_(None), SchedulingLink.expiration_date > now),
+        or_(SchedulingLink.usage_limit.is_(None), SchedulingLink.usage_limit > 0)
+    )
+
+@traced()
+async def get_public_links_page(db: AsyncSession, now: datetime, limit: int, offset: int):
+    """
+    A page of advisors that have bookable links, with those links, in two
+    queries. Returns ([(user, [links])], has_more), ordered by advisor id.
+    """
+    advisor_ids = (await db.scalars(
+        select(SchedulingLink.user_id).join(
+            User, User.id == SchedulingLink.user_id
+        ).where(
+            active_link_filter(now)
+        ).distinct().order_by(SchedulingLink.user_id).offset(offset).limit(limit + 1)
+    )).all()
+    has_more = len(advisor_ids) > limit
+    advisor_ids = advisor_ids[:limit]
+    if not advisor_ids:
+        return [], has_more
+
+    rows = (await db.execute(select(SchedulingLink, User).join(User, User.id == SchedulingLink.user_id).where(
+        SchedulingLink.user_id.in_(advisor_ids),
+        active_link_filter(now)
+    ).order_by(SchedulingLink.user_id, SchedulingLink.created_at.desc()))).all()
+    advisors = {}
+    for link, user in rows:
+        advisors.setdefault(user.id, (user, []))[1].append(link)
+    return list(advisors.values()), has_more
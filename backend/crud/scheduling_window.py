@@ -1,8 +1,12 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from db.models import SchedulingWindow
+from core.slot_cache import invalidate_advisor_slots
 from datetime import time
+from core.tracing import traced
 
-def create_scheduling_window(db: Session, user_id: int, weekday: int, start_time: time, end_time: time):
+@traced()
+async def create_scheduling_window(db: AsyncSession, user_id: int, weekday: int, start_time: time, end_time: time):
     window = SchedulingWindow(
         user_id=user_id,
         weekday=weekday,
@@ -10,28 +14,39 @@ def create_scheduling_window(db: Session, user_id: int, weekday: int, start_time
         end_time=end_time,
     )
     db.add(window)
-    db.commit()
-    db.refresh(window)
+    await db.commit()
+    invalidate_advisor_slots(user_id)
+    await db.refresh(window)
     return window
 
-def get_scheduling_windows_by_user_id(db: Session, user_id: int):
-    return db.query(SchedulingWindow).filter(SchedulingWindow.user_id == user_id).order_by(SchedulingWindow.weekday, SchedulingWindow.start_time).all()
+@traced()
+async def get_scheduling_windows_by_user_id(db: AsyncSession, user_id: int):
+    return (await db.scalars(select(SchedulingWindow).where(SchedulingWindow.user_id == user_id).order_by(SchedulingWindow.weekday, SchedulingWindow.start_time))).all()
 
-def update_scheduling_window(db: Session, window_id: int, start_time: time, end_time: time, weekday: int = None):
-    window = db.query(SchedulingWindow).filter(SchedulingWindow.id == window_id).first()
+@traced()
+async def get_scheduling_window_by_id(db: AsyncSession, window_id: int):
+    return await db.get(SchedulingWindow, window_id)
+
+@traced()
+async def update_scheduling_window(db: AsyncSession, window_id: int, start_time: time, end_time: time, weekday: int = None):
+    window = await get_scheduling_window_by_id(db, window_id)
     if window:
         window.start_time = start_time
         window.end_time = end_time
         if weekday is not None:
             window.weekday = weekday
-        db.commit()
-        db.refresh(window)
+        await db.commit()
+        invalidate_advisor_slots(window.user_id)
+        await db.refresh(window)
     return window
 
-def delete_scheduling_window(db: Session, window_id: int):
-    window = db.query(SchedulingWindow).filter(SchedulingWindow.id == window_id).first()
+@traced()
+async def delete_scheduling_window(db: AsyncSession, window_id: int):
+    window = await get_scheduling_window_by_id(db, window_id)
     if window:
-        db.delete(window)
-        db.commit()
+        user_id = window.user_id
+        await db.delete(window)
+        await db.commit()
+        invalidate_advisor_slots(user_id)
         return True
-    return False 
\ No newline at end of file
+    return False
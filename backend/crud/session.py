@@ -1,23 +1,30 @@
 from datetime import datetime
 from db.models import Session as SessionModel
+from core.session_cache import invalidate_session
 
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.tracing import traced
 
 
-def create_session(db: Session, user_id: int, session_token: str, expires_at: datetime, access_token: str):
+@traced()
+async def create_session(db: AsyncSession, user_id: int, session_token: str, expires_at: datetime, access_token: str):
     db_session = SessionModel(user_id=user_id, session_token=session_token, expires_at=expires_at, access_token=access_token)
     db.add(db_session)
-    db.commit()
-    db.refresh(db_session)
+    await db.commit()
+    await db.refresh(db_session)
     return db_session
 
-def get_session_by_token(db: Session, session_token: str):
-    return db.query(SessionModel).filter(SessionModel.session_token == session_token).first()
+@traced()
+async def get_session_by_token(db: AsyncSession, session_token: str):
+    return await db.scalar(select(SessionModel).where(SessionModel.session_token == session_token).limit(1))
 
-def delete_session(db: Session, session_token: str):
-    session = db.query(SessionModel).filter(SessionModel.session_token == session_token).first()
+@traced()
+async def delete_session(db: AsyncSession, session_token: str):
+    session = await get_session_by_token(db, session_token)
+    invalidate_session(session_token)
     if session:
-        db.delete(session)
-        db.commit()
+        await db.delete(session)
+        await db.commit()
         return True
-    return False
\ No newline at end of file
+    return False
@@ -1,17 +1,21 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from db.models import User
 from schemas.user import UserCreate
+from core.tracing import traced
 
-def get_user_by_google_id(db: Session, google_id: str):
+@traced()
+async def get_user_by_google_id(db: AsyncSession, google_id: str):
     """
     Get a user by their Google ID.
     :param db: The database session.
     :param google_id: The Google ID of the user.
     :return: The user with the given Google ID.
     """
-    return db.query(User).filter(User.google_id == google_id).first()
+    return await db.scalar(select(User).where(User.google_id == google_id).limit(1))
 
-def create_user(db: Session, user: UserCreate):
+@traced()
+async def create_user(db: AsyncSession, user: UserCreate):
     """
     Create a new user.
     :param db: The database session.
@@ -20,15 +24,16 @@ def create_user(db: Session, user: UserCreate):
     """
     db_user = User(google_id=user.google_id, email=user.email, name=user.name)
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
-def get_user_by_id(db: Session, user_id: int):
+@traced()
+async def get_user_by_id(db: AsyncSession, user_id: int):
     """
     Get a user by their ID.
     :param db: The database session.
     :param user_id: The ID of the user.
     :return: The user with the given ID.
     """
-    return db.query(User).filter(User.id == user_id).first()
\ No newline at end of file
+    return await db.get(User, user_id)
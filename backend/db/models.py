@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String, Time, JSON
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Index, Integer, String, Time, JSON, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from core.database import Base
@@ -22,10 +22,11 @@ class ConnectedGoogleAccount(Base):
     __tablename__ = "connected_google_accounts"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
     google_account_id = Column(String, unique=True, index=True)
     access_token = Column(String)
     refresh_token = Column(String)
+    token_expires_at = Column(DateTime)
     email = Column(String, index=True)
     name = Column(String)
     picture = Column(String)
@@ -51,7 +52,7 @@ class HubspotConnection(Base):
     __tablename__ = "hubspot_connections"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
     access_token = Column(String)
     refresh_token = Column(String)
     expires_at = Column(DateTime)
@@ -63,6 +64,7 @@ class HubspotConnection(Base):
 
 class SchedulingWindow(Base):
     __tablename__ = "scheduling_windows"
+    __table_args__ = (Index("ix_scheduling_windows_user_id_weekday", "user_id", "weekday"),)
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -78,7 +80,7 @@ class SchedulingLink(Base):
     __tablename__ = "scheduling_links"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
     link_id = Column(String, unique=True, index=True, default=lambda: str(uuid.uuid4()))
     usage_limit = Column(Integer)
     expiration_date = Column(DateTime)
@@ -92,6 +94,10 @@ class SchedulingLink(Base):
 
 class Meeting(Base):
     __tablename__ = "meetings"
+    __table_args__ = (
+        Index("ix_meetings_link_id_start_time_end_time", "link_id", "start_time", "end_time"),
+        Index("ix_meetings_advisor_id_start_time", "advisor_id", "start_time"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     advisor_id = Column(Integer, ForeignKey("users.id"))
@@ -107,3 +113,76 @@ class Meeting(Base):
 
     advisor = relationship("User", backref="meetings")
     scheduling_link = relationship("SchedulingLink", backref="meetings")
+
+class CalendarEvent(Base):
+    __tablename__ = "calendar_events"
+    __table_args__ = (UniqueConstraint("account_id", "event_id"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    account_id = Column(Integer, ForeignKey("connected_google_accounts.id"), index=True)
+    event_id = Column(String, nullable=False)
+    status = Column(String)
+    transparency = Column(String)
+    start_time = Column(DateTime)  # naive UTC
+    end_time = Column(DateTime)  # naive UTC
+    data = Column(JSON)  # Event resource as returned by Google
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    account = relationship("ConnectedGoogleAccount", backref="calendar_events")
+
+class CalendarSyncState(Base):
+    __tablename__ = "calendar_sync_states"
+
+    id = Column(Integer, primary_key=True, index=True)
+    account_id = Column(Integer, ForeignKey("connected_google_accounts.id"), unique=True)
+    sync_token = Column(String)
+    full_synced_at = Column(DateTime)
+    last_synced_at = Column(DateTime)
+
+    account = relationship("ConnectedGoogleAccount", backref="calendar_sync_state")
+
+class BackgroundJob(Base):
+    __tablename__ = "background_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False)
+    payload = Column(JSON)
+    status = Column(String, default="pending", index=True)  # pending, running, done, failed
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer, default=5)
+    run_at = Column(DateTime, default=datetime.utcnow, index=True)
+    locked_at = Column(DateTime)
+    last_error = Column(String)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class OutboxMessage(Base):
+    __tablename__ = "outbox_messages"
+
+    id = Column(Integer, primary_key=True, index=True)
+    to_email = Column(String, nullable=False)
+    from_email = Column(String)
+    subject = Column(String)
+    body = Column(String)
+    status = Column(String, default="pending", index=True)  # pending, sending, sent, failed
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer, default=8)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, index=True)
+    claim_id = Column(String)
+    claimed_at = Column(DateTime)
+    last_error = Column(String)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    sent_at = Column(DateTime)
+    trace_parent = Column(String)
+
+class CalendarWatchChannel(Base):
+    """A Google events.watch channel pushing change notifications for one account's primary calendar."""
+    __tablename__ = "calendar_watch_channels"
+
+    id = Column(Integer, primary_key=True, index=True)
+    account_id = Column(Integer, ForeignKey("connected_google_accounts.id"), index=True)
+    channel_id = Column(String, unique=True, nullable=False)
+    resource_id = Column(String)
+    token = Column(String)  # echoed back in X-Goog-Channel-Token
+    expiration = Column(DateTime)  # naive UTC
+    created_at = Column(DateTime, default=datetime.utcnow)
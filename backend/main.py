@@ -1,7 +1,14 @@
 from fastapi import FastAPI
 from fastapi.middleware import Middleware
 from api.endpoints import root, auth
-from core.database import init_db
+from core.database import init_db, close_db
+from core.http_client import init_http_clients, close_http_clients
+from core.jobs import job_workers
+from core.calendar_watch import watch_renewer
+from core.outbox import outbox_sender
+from core.metrics import MetricsMiddleware, loop_monitor
+from core.tracing import TracingMiddleware, trace_exporter
+from core.logs import RequestIdMiddleware, setup_logging
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from starlette.middleware.sessions import SessionMiddleware
@@ -12,8 +19,14 @@ from api.endpoints import (
     scheduling_link,
     public_schedule,
     public_links,
+    outbox,
+    metrics,
+    admin,
+    google_webhook,
 )
 
+setup_logging()
+
 middleware = [
     Middleware(SessionMiddleware, secret_key=SECRET_KEY)
 ]
@@ -21,7 +34,20 @@ middleware = [
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     init_db()
+    await loop_monitor.start()
+    await trace_exporter.start()
+    await init_http_clients()
+    await job_workers.start()
+    await outbox_sender.start()
+    await watch_renewer.start()
     yield
+    await watch_renewer.stop()
+    await outbox_sender.stop()
+    await job_workers.stop()
+    await close_http_clients()
+    await close_db()
+    await trace_exporter.stop()
+    await loop_monitor.stop()
 
 app = FastAPI(lifespan=lifespan, middleware=middleware)
 
@@ -35,6 +61,10 @@ app.include_router(scheduling_window.router, prefix="/api")
 app.include_router(scheduling_link.router, prefix="/api")
 app.include_router(public_schedule.router, prefix="/api")
 app.include_router(public_links.router, prefix="/api")
+app.include_router(outbox.router, prefix="/api")
+app.include_router(admin.router, prefix="/api")
+app.include_router(google_webhook.router, prefix="/api")
+app.include_router(metrics.router)
 
 app.add_middleware(
     CORSMiddleware,
@@ -42,4 +72,11 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Link"],
 )
+
+# Outermost, so the timings include the other middleware and every log
+# line of a request carries its id
+app.add_middleware(TracingMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(RequestIdMiddleware)
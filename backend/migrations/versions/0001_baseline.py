@@ -0,0 +1,237 @@
+"""baseline
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 08:50:37.995235
+
+The schema as init_db's create_all left it. Databases created before
+migrations existed already have some or all of these tables, so each table
+is only created when it is missing.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _create_table(existing, name, *columns, indexes=()):
+    if name in existing:
+        return
+    op.create_table(name, *columns)
+    for index_name, index_columns, unique in indexes:
+        op.create_index(index_name, name, index_columns, unique=unique)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    _create_table(existing, 'users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('google_id', sa.String(), nullable=True),
+        sa.Column('email', sa.String(), nullable=True),
+        sa.Column('name', sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        indexes=[
+            ('ix_users_google_id', ['google_id'], True),
+            ('ix_users_id', ['id'], False),
+            ('ix_users_email', ['email'], False),
+        ])
+
+    _create_table(existing, 'connected_google_accounts',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('google_account_id', sa.String(), nullable=True),
+        sa.Column('access_token', sa.String(), nullable=True),
+        sa.Column('refresh_token', sa.String(), nullable=True),
+        sa.Column('email', sa.String(), nullable=True),
+        sa.Column('name', sa.String(), nullable=True),
+        sa.Column('picture', sa.String(), nullable=True),
+        sa.Column('locale', sa.String(), nullable=True),
+        sa.Column('verified', sa.Boolean(), nullable=True),
+        sa.Column('hd', sa.String(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+        indexes=[
+            ('ix_connected_google_accounts_google_account_id', ['google_account_id'], True),
+            ('ix_connected_google_accounts_email', ['email'], False),
+            ('ix_connected_google_accounts_id', ['id'], False),
+        ])
+
+    _create_table(existing, 'sessions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('session_token', sa.String(), nullable=True),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('expires_at', sa.DateTime(), nullable=True),
+        sa.Column('access_token', sa.String(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+        indexes=[
+            ('ix_sessions_id', ['id'], False),
+            ('ix_sessions_session_token', ['session_token'], True),
+        ])
+
+    _create_table(existing, 'hubspot_connections',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('access_token', sa.String(), nullable=True),
+        sa.Column('refresh_token', sa.String(), nullable=True),
+        sa.Column('expires_at', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('portal_id', sa.String(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+        indexes=[
+            ('ix_hubspot_connections_id', ['id'], False),
+        ])
+
+    _create_table(existing, 'scheduling_windows',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('weekday', sa.Integer(), nullable=True),
+        sa.Column('start_time', sa.Time(), nullable=True),
+        sa.Column('end_time', sa.Time(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+        indexes=[
+            ('ix_scheduling_windows_weekday', ['weekday'], False),
+            ('ix_scheduling_windows_id', ['id'], False),
+        ])
+
+    _create_table(existing, 'scheduling_links',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('link_id', sa.String(), nullable=True),
+        sa.Column('usage_limit', sa.Integer(), nullable=True),
+        sa.Column('expiration_date', sa.DateTime(), nullable=True),
+        sa.Column('meeting_length', sa.Integer(), nullable=True),
+        sa.Column('advance_schedule_days', sa.Integer(), nullable=True),
+        sa.Column('questions', sa.JSON(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+        indexes=[
+            ('ix_scheduling_links_link_id', ['link_id'], True),
+            ('ix_scheduling_links_id', ['id'], False),
+        ])
+
+    _create_table(existing, 'meetings',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('advisor_id', sa.Integer(), nullable=True),
+        sa.Column('link_id', sa.String(), nullable=True),
+        sa.Column('start_time', sa.DateTime(), nullable=False),
+        sa.Column('end_time', sa.DateTime(), nullable=False),
+        sa.Column('client_email', sa.String(), nullable=False),
+        sa.Column('client_linkedin', sa.String(), nullable=True),
+        sa.Column('answers', sa.JSON(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('augmented_notes', sa.String(), nullable=True),
+        sa.Column('linkedin_summary', sa.String(), nullable=True),
+        sa.ForeignKeyConstraint(['advisor_id'], ['users.id']),
+        sa.ForeignKeyConstraint(['link_id'], ['scheduling_links.link_id']),
+        sa.PrimaryKeyConstraint('id'),
+        indexes=[
+            ('ix_meetings_id', ['id'], False),
+        ])
+
+    _create_table(existing, 'calendar_events',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('account_id', sa.Integer(), nullable=True),
+        sa.Column('event_id', sa.String(), nullable=False),
+        sa.Column('status', sa.String(), nullable=True),
+        sa.Column('transparency', sa.String(), nullable=True),
+        sa.Column('start_time', sa.DateTime(), nullable=True),
+        sa.Column('end_time', sa.DateTime(), nullable=True),
+        sa.Column('data', sa.JSON(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['account_id'], ['connected_google_accounts.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('account_id', 'event_id'),
+        indexes=[
+            ('ix_calendar_events_account_id', ['account_id'], False),
+            ('ix_calendar_events_id', ['id'], False),
+        ])
+
+    _create_table(existing, 'calendar_sync_states',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('account_id', sa.Integer(), nullable=True),
+        sa.Column('sync_token', sa.String(), nullable=True),
+        sa.Column('full_synced_at', sa.DateTime(), nullable=True),
+        sa.Column('last_synced_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['account_id'], ['connected_google_accounts.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('account_id'),
+        indexes=[
+            ('ix_calendar_sync_states_id', ['id'], False),
+        ])
+
+    _create_table(existing, 'background_jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=True),
+        sa.Column('status', sa.String(), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=True),
+        sa.Column('max_attempts', sa.Integer(), nullable=True),
+        sa.Column('run_at', sa.DateTime(), nullable=True),
+        sa.Column('locked_at', sa.DateTime(), nullable=True),
+        sa.Column('last_error', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        indexes=[
+            ('ix_background_jobs_id', ['id'], False),
+            ('ix_background_jobs_run_at', ['run_at'], False),
+            ('ix_background_jobs_status', ['status'], False),
+        ])
+
+    _create_table(existing, 'outbox_messages',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('to_email', sa.String(), nullable=False),
+        sa.Column('from_email', sa.String(), nullable=True),
+        sa.Column('subject', sa.String(), nullable=True),
+        sa.Column('body', sa.String(), nullable=True),
+        sa.Column('status', sa.String(), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=True),
+        sa.Column('max_attempts', sa.Integer(), nullable=True),
+        sa.Column('next_attempt_at', sa.DateTime(), nullable=True),
+        sa.Column('claim_id', sa.String(), nullable=True),
+        sa.Column('claimed_at', sa.DateTime(), nullable=True),
+        sa.Column('last_error', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('sent_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        indexes=[
+            ('ix_outbox_messages_id', ['id'], False),
+            ('ix_outbox_messages_next_attempt_at', ['next_attempt_at'], False),
+            ('ix_outbox_messages_status', ['status'], False),
+        ])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name in (
+        'outbox_messages',
+        'background_jobs',
+        'calendar_sync_states',
+        'calendar_events',
+        'meetings',
+        'scheduling_links',
+        'scheduling_windows',
+        'hubspot_connections',
+        'sessions',
+        'connected_google_accounts',
+        'users',
+    ):
+        op.drop_table(name)
@@ -0,0 +1,41 @@
+"""indexes for the hot query shapes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 09:05:12.418230
+
+Meeting overlap checks and lists, and the per-user lookups of links,
+windows and connections, were full table scans.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = [
+    ('ix_meetings_link_id_start_time_end_time', 'meetings', ['link_id', 'start_time', 'end_time']),
+    ('ix_meetings_advisor_id_start_time', 'meetings', ['advisor_id', 'start_time']),
+    ('ix_scheduling_links_user_id', 'scheduling_links', ['user_id']),
+    ('ix_scheduling_windows_user_id_weekday', 'scheduling_windows', ['user_id', 'weekday']),
+    ('ix_hubspot_connections_user_id', 'hubspot_connections', ['user_id']),
+    ('ix_connected_google_accounts_user_id', 'connected_google_accounts', ['user_id']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
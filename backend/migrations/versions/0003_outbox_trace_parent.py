@@ -0,0 +1,31 @@
+"""trace context on outbox messages
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 14:20:41.503117
+
+The W3C traceparent of the span that queued a message, so its delivery is
+recorded in the same trace as the booking that caused it.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('outbox_messages', sa.Column('trace_parent', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('outbox_messages') as batch_op:
+        batch_op.drop_column('trace_parent')
@@ -0,0 +1,31 @@
+"""access token expiry on connected Google accounts
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 16:02:17.284951
+
+When the stored access token expires, so it can be refreshed beforehand.
+Rows created before this are refreshed on first use.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('connected_google_accounts', sa.Column('token_expires_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('connected_google_accounts') as batch_op:
+        batch_op.drop_column('token_expires_at')
@@ -0,0 +1,46 @@
+"""Google Calendar push notification channels
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 17:41:09.630284
+
+One row per events.watch channel, so a notification can be mapped back to
+its account and channels can be renewed before they expire.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'calendar_watch_channels',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('account_id', sa.Integer(), nullable=True),
+        sa.Column('channel_id', sa.String(), nullable=False),
+        sa.Column('resource_id', sa.String(), nullable=True),
+        sa.Column('token', sa.String(), nullable=True),
+        sa.Column('expiration', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['account_id'], ['connected_google_accounts.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('channel_id'),
+    )
+    op.create_index('ix_calendar_watch_channels_id', 'calendar_watch_channels', ['id'])
+    op.create_index('ix_calendar_watch_channels_account_id', 'calendar_watch_channels', ['account_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_calendar_watch_channels_account_id', table_name='calendar_watch_channels')
+    op.drop_index('ix_calendar_watch_channels_id', table_name='calendar_watch_channels')
+    op.drop_table('calendar_watch_channels')
@@ -1,3 +1,5 @@
+from datetime import datetime
+from typing import Optional
 from pydantic import BaseModel, ConfigDict
 
 class ConnectedGoogleAccountBase(BaseModel):
@@ -12,6 +14,7 @@ class ConnectedGoogleAccountCreate(ConnectedGoogleAccountBase):
     locale: str
     verified: bool
     hd: str
+    token_expires_at: Optional[datetime] = None
 
 class ConnectedGoogleAccount(ConnectedGoogleAccountBase):
     id: int
@@ -21,4 +21,16 @@ class MeetingOut(BaseModel):
     answers: List[Any]
     created_at: datetime
     augmented_notes: Optional[str] = None
-    linkedin_summary: Optional[str] = None
\ No newline at end of file
+    linkedin_summary: Optional[str] = None
+
+class MeetingSummary(BaseModel):
+    id: int
+    link_id: str
+    start_time: datetime
+    end_time: datetime
+    client_email: EmailStr
+    client_linkedin: Optional[str]
+
+class MeetingPage(BaseModel):
+    items: List[MeetingSummary]
+    next_cursor: Optional[str] = None
@@ -48,6 +48,7 @@ const CalendarEventsPage = () => {
               header={
                 <span>
                   <Tag color="blue">{account.email || account.google_account_id}</Tag>
+                  {account.error && <Tag color="red">Sync failed</Tag>}
                 </span>
               }
               key={account.google_account_id}
@@ -1,5 +1,5 @@
 import React, { useEffect, useState } from 'react';
-import { Table, Typography, Spin, Alert, Tag, Button, Space, Modal } from 'antd';
+import { Table, Typography, Spin, Alert, Tag, Button, Space, Modal, message } from 'antd';
 import * as api from '../services/api';
 import dayjs from 'dayjs';
 
@@ -9,6 +9,8 @@ const MeetingsPage = () => {
   const [meetings, setMeetings] = useState([]);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [selectedMeeting, setSelectedMeeting] = useState(null);
   const [detailLoading, setDetailLoading] = useState(false);
   const [detailError, setDetailError] = useState(null);
@@ -20,7 +22,8 @@ const MeetingsPage = () => {
       setError(null);
       try {
         const response = await api.get('/meetings', { withCredentials: true });
-        setMeetings(response.data);
+        setMeetings(response.data.items);
+        setNextCursor(response.data.next_cursor);
       } catch (e) {
         setError('Failed to fetch meetings.');
       } finally {
@@ -30,6 +33,23 @@ const MeetingsPage = () => {
     fetchMeetings();
   }, []);
 
+  const handleLoadMore = async () => {
+    setLoadingMore(true);
+    try {
+      const response = await api.get('/meetings', {
+        params: { cursor: nextCursor },
+        withCredentials: true,
+      });
+      setMeetings(prev => [...prev, ...response.data.items]);
+      setNextCursor(response.data.next_cursor);
+    } catch (e) {
+      // Keep the meetings already shown; the button stays for a retry
+      message.error('Failed to load more meetings.');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleRowClick = async (record) => {
     setDetailLoading(true);
     setDetailError(null);
@@ -107,6 +127,11 @@ const MeetingsPage = () => {
           pagination={false}
           onRow={record => ({ onClick: () => handleRowClick(record) })}
           style={{ marginBottom: 32 }}
+          footer={nextCursor ? () => (
+            <Button block loading={loadingMore} onClick={handleLoadMore}>
+              Load more
+            </Button>
+          ) : undefined}
         />
       )}
       <Modal
@@ -24,6 +24,8 @@ const PublicLinksPage = () => {
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
   const [search, setSearch] = useState('');
+  const [hasMore, setHasMore] = useState(false);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     const fetchLinks = async () => {
@@ -32,6 +34,7 @@ const PublicLinksPage = () => {
       try {
         const response = await api.get('/public/scheduling-links');
         setAdvisors(response.data);
+        setHasMore(Boolean(response.headers.link));
       } catch (e) {
         setError('Failed to load scheduling links.');
       } finally {
@@ -41,6 +44,21 @@ const PublicLinksPage = () => {
     fetchLinks();
   }, []);
 
+  const handleLoadMore = async () => {
+    setLoadingMore(true);
+    try {
+      const response = await api.get('/public/scheduling-links', {
+        params: { offset: advisors.length },
+      });
+      setAdvisors(prev => [...prev, ...response.data]);
+      setHasMore(Boolean(response.headers.link));
+    } catch (e) {
+      message.error('Failed to load more advisors.');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const filteredAdvisors = useMemo(() => {
     if (!search) return advisors;
     return advisors.filter(a =>
@@ -184,6 +202,13 @@ const PublicLinksPage = () => {
             })}
           </Row>
         )}
+        {!loading && !error && hasMore && (
+          <div style={{ textAlign: 'center', marginTop: 32 }}>
+            <Button loading={loadingMore} onClick={handleLoadMore}>
+              Load more advisors
+            </Button>
+          </div>
+        )}
       </div>
     </div>
   );